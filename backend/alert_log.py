@@ -0,0 +1,168 @@
+"""
+Incremental Alert Log Reader for Rockfall Risk Prediction System
+Keeps the alert history CSV in memory as columns and parses only the rows
+appended since the last read
+"""
+
+import numpy as np
+import pandas as pd
+import io
+import os
+import threading
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Alert CSV columns holding numbers; every other column is kept as text
+NUMERIC_ALERT_COLUMNS = (
+    'risk_score', 'displacement_mm', 'vibration_mm_s',
+    'temperature_c', 'humidity_percent'
+)
+
+# Bytes before the read offset compared to detect a rewritten file
+_TAIL_BYTES = 256
+
+class AlertLog:
+    """Columnar in-memory copy of an append-mostly alert CSV
+
+    refresh() stats the file and, when it grew, parses only the bytes after
+    the last complete line it has seen. A file that shrank, was replaced,
+    was modified without growing, or no longer ends in the bytes already
+    read is read again from the start. AlertManager replaces the whole
+    file when it resolves an alert, which changes its inode. Queries never
+    touch the disk.
+    """
+
+    def __init__(self, path, numeric_columns=NUMERIC_ALERT_COLUMNS):
+        self.path = path
+        self.numeric_columns = numeric_columns
+        self._lock = threading.Lock()
+        self.version = 0
+        self._reset()
+
+    def _reset(self):
+        self.header = None
+        self.offset = 0
+        self.inode = None
+        self.mtime_ns = None
+        self.tail = b''
+        # (columns, timestamps), replaced as a whole on every append so
+        # readers need no lock
+        self.snapshot = ({}, np.empty(0, dtype='datetime64[ns]'))
+        self.version += 1
+
+    def __len__(self):
+        return len(self.snapshot[1])
+
+    def refresh(self):
+        """Parse rows appended since the last call; returns the number of new rows"""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                if self.header is not None:
+                    self._reset()
+                return 0
+
+            if (stat.st_ino == self.inode and stat.st_size == self.offset
+                    and stat.st_mtime_ns == self.mtime_ns):
+                return 0
+
+            with open(self.path, 'rb') as f:
+                if not self._continues(f, stat):
+                    self._reset()
+                    self.inode = stat.st_ino
+                f.seek(self.offset)
+                data = f.read()
+            self.mtime_ns = stat.st_mtime_ns
+
+            # Leave a partially written last line for the next refresh
+            end = data.rfind(b'\n') + 1
+            if end == 0:
+                return 0
+            data = data[:end]
+
+            if self.header is None:
+                header_end = data.index(b'\n') + 1
+                self.header = data[:header_end]
+                self.offset = header_end
+                data = data[header_end:]
+                columns = pd.read_csv(io.BytesIO(self.header), nrows=0).columns
+                self.snapshot = ({col: np.empty(0, dtype=self._dtype(col)) for col in columns},
+                                 self.snapshot[1])
+
+            new_rows = self._append(data) if data else 0
+            self.offset += len(data)
+            self.tail = (self.tail + data)[-_TAIL_BYTES:] if data else self.tail
+            if new_rows:
+                self.version += 1
+                logger.info(f"Alert log: {new_rows} new alerts ({len(self)} total)")
+            return new_rows
+
+    def _continues(self, f, stat):
+        """True when the file still starts with what has already been parsed"""
+        if self.header is None or stat.st_ino != self.inode or stat.st_size < self.offset:
+            return False
+        if stat.st_size == self.offset and stat.st_mtime_ns != self.mtime_ns:
+            # Written without growing: a same-size rewrite, not an append
+            return False
+        f.seek(0)
+        if f.read(len(self.header)) != self.header:
+            return False
+        f.seek(self.offset - len(self.tail))
+        return f.read(len(self.tail)) == self.tail
+
+    def _dtype(self, col):
+        return np.float64 if col in self.numeric_columns else object
+
+    def _append(self, data):
+        """Parse complete CSV lines and extend the column arrays"""
+        old_columns, old_timestamps = self.snapshot
+        names = list(old_columns)
+        chunk = pd.read_csv(io.BytesIO(data), header=None, names=names, dtype=str,
+                            keep_default_na=False)
+        if chunk.empty:
+            return 0
+
+        columns = {}
+        for col in names:
+            values = chunk[col]
+            if col in self.numeric_columns:
+                values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+            else:
+                # Empty cells become None (JSON null)
+                values = values.to_numpy(dtype=object)
+                values[values == ''] = None
+            columns[col] = np.concatenate([old_columns[col], values])
+
+        if 'timestamp' in chunk:
+            timestamps = pd.to_datetime(chunk['timestamp'], errors='coerce').to_numpy('datetime64[ns]')
+        else:
+            timestamps = np.full(len(chunk), np.datetime64('NaT'), 'datetime64[ns]')
+        self.snapshot = (columns, np.concatenate([old_timestamps, timestamps]))
+        return len(chunk)
+
+    def query(self, since=None, zone_id=None, status=None, limit=None):
+        """Alerts in file order, optionally filtered; limit keeps the most recent"""
+        columns, timestamps = self.snapshot
+        mask = np.ones(len(timestamps), dtype=bool)
+
+        if since is not None:
+            mask &= timestamps > np.datetime64(pd.Timestamp(since).to_datetime64(), 'ns')
+        if zone_id is not None and 'zone_id' in columns:
+            mask &= columns['zone_id'] == zone_id
+        if status is not None and 'status' in columns:
+            mask &= columns['status'] == status
+
+        rows = np.flatnonzero(mask)
+        if limit is not None:
+            rows = rows[len(rows) - min(limit, len(rows)):]
+
+        selected = {}
+        for col, values in columns.items():
+            values = values[rows]
+            if values.dtype == np.float64:
+                values = np.where(np.isnan(values), None, values)
+            selected[col] = values.tolist()
+        return [dict(zip(selected, row)) for row in zip(*selected.values())]
@@ -2,16 +2,33 @@
 Flask REST API Backend for Rockfall Risk Prediction System
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-import joblib
 import json
 import os
+import math
+import time
+import threading
 from datetime import datetime
 import logging
 
+from inference_model import InferenceModel, SENSOR_FEATURE_COLUMNS, INFERENCE_ENGINES
+from model_reload import ModelWatcher
+from model_artifact import artifact_path_for
+from inference_pool import InferencePool, MIN_POOL_ROWS
+from zone_index import ZoneIndex
+from response_cache import FileResponseCache
+from alert_log import AlertLog
+import batch_formats
+from micro_batcher import MicroBatcher
+from prediction_cache import PredictionCache
+from feature_state import LiveFeatureState, MODEL_RATE_COLUMNS
+from request_schema import ReadingValidator, ValidationError, coerce_numeric
+from metrics import stage_timer, Histogram, PrometheusText
+from rule_engine import RuleEngine, RISK_LEVELS, HIGH, CRITICAL
+
 app = Flask(__name__)
 CORS(app)
 
@@ -19,115 +36,478 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Readings scored together by /predict/stream, and the longest accepted line
+STREAM_CHUNK_ROWS = 1000
+MAX_STREAM_LINE_BYTES = 64 * 1024
+
+# Sample data files served by the API
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample-data')
+ALERTS_PATH = os.path.join(DATA_DIR, 'fake_alerts.csv')
+
 class RockfallAPI:
-    def __init__(self):
-        self.model = None
-        self.scaler = None
-        self.label_encoder = None
-        self.feature_columns = None
+    def __init__(self, model_path=None, engine='auto'):
+        if engine not in INFERENCE_ENGINES:
+            raise ValueError(f"Unknown inference engine: {engine}")
+        self.model_path = model_path or os.path.join(os.path.dirname(__file__), 'ml_model.pkl')
+        self.engine = engine
+        # The active InferenceModel; replaced by a single assignment, never mutated
+        self.active_model = None
+        self.reload_metrics = {
+            'reloads': 0,
+            'failures': 0,
+            'last_reload_at': None,
+            'last_reload_ms': None,
+            'last_swap_pause_us': None,
+            'max_swap_pause_us': None,
+            'last_error': None
+        }
+        self._reload_lock = threading.Lock()
+        self.watcher = None
+        self.inference_pool = None
+        self.prediction_cache = None
+        self.feature_state = None
+        self.zones_path = os.path.join(DATA_DIR, 'zones.json')
         self.zones_data = None
+        self.rule_engine = RuleEngine()
         self.load_model()
         self.load_zones()
     
     def load_model(self):
-        """Load the trained ML model"""
+        """Load the trained ML model (see InferenceModel.load for engine selection)"""
         try:
-            model_path = os.path.join(os.path.dirname(__file__), 'ml_model.pkl')
-            if os.path.exists(model_path):
-                model_data = joblib.load(model_path)
-                self.model = model_data['model']
-                self.scaler = model_data['scaler']
-                self.label_encoder = model_data['label_encoder']
-                self.feature_columns = model_data['feature_columns']
-                logger.info("Model loaded successfully")
-            else:
+            self.active_model = InferenceModel.load(self.model_path, self.engine)
+            if self.active_model is None:
                 logger.warning("Model file not found, using dummy predictions")
+            else:
+                logger.info(f"Model loaded from {self.active_model.source} "
+                            f"({self.inference_engine} engine)")
         except Exception as e:
             logger.error(f"Error loading model: {e}")
     
-    def load_zones(self):
-        """Load zone configuration"""
-        try:
-            zones_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                    'sample-data', 'zones.json')
-            with open(zones_path, 'r') as f:
-                self.zones_data = json.load(f)
-            logger.info("Zones data loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading zones data: {e}")
+    def reload_model(self):
+        """Load, warm and swap in the current model files without pausing requests
+        
+        The new model is built completely on the calling thread while
+        requests keep using the old one; the swap itself is one reference
+        assignment. Requests already running finish on the model they
+        started with. Returns True when a new model was swapped in.
+        """
+        with self._reload_lock:
+            started = time.perf_counter()
+            try:
+                model = InferenceModel.load(self.model_path, self.engine)
+                if model is None:
+                    raise FileNotFoundError(f"No model found at {self.model_path}")
+                model.warm()
+            except Exception as e:
+                self.reload_metrics['failures'] += 1
+                self.reload_metrics['last_error'] = str(e)
+                logger.error(f"Model reload failed, keeping current model: {e}")
+                return False
+            
+            swap_started = time.perf_counter()
+            self.active_model = model
+            swapped = time.perf_counter()
+            if self.inference_pool is not None:
+                self.inference_pool.reload()
+            
+            pause_us = (swapped - swap_started) * 1e6
+            metrics = self.reload_metrics
+            metrics['reloads'] += 1
+            metrics['last_reload_at'] = datetime.now().isoformat()
+            metrics['last_reload_ms'] = (swapped - started) * 1000
+            metrics['last_swap_pause_us'] = pause_us
+            metrics['max_swap_pause_us'] = max(metrics['max_swap_pause_us'] or 0.0, pause_us)
+            metrics['last_error'] = None
+            logger.info(f"Model reloaded from {model.source} in {metrics['last_reload_ms']:.1f} ms")
+            return True
+    
+    def start_model_watcher(self, interval=2.0):
+        """Reload the model in the background whenever its files change"""
+        if self.watcher is None:
+            self.watcher = ModelWatcher(self, interval=interval)
+        return self.watcher.start()
+    
+    def stop_model_watcher(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+    
+    def enable_inference_pool(self, workers=None):
+        """Score large batches in worker processes that map the model artifact
+        
+        Needs the active model to come from the artifact (engine 'auto' or
+        'compiled' with an up-to-date artifact). Batches under
+        MIN_POOL_ROWS rows and single readings stay in-process.
+        """
+        model = self.active_model
+        artifact_path = artifact_path_for(self.model_path)
+        if model is None or model.source != artifact_path:
+            raise RuntimeError("The inference pool needs a model served from its artifact")
+        self.disable_inference_pool()
+        self.inference_pool = InferencePool(artifact_path, workers=workers)
+        return self.inference_pool
+    
+    def disable_inference_pool(self):
+        pool, self.inference_pool = self.inference_pool, None
+        if pool is not None:
+            pool.close()
+    
+    def _predict_proba(self, model, X):
+        """Class probabilities for a feature matrix, in worker processes when worthwhile"""
+        pool = self.inference_pool
+        if pool is not None and len(X) >= MIN_POOL_ROWS and model.source == pool.artifact_path:
+            try:
+                proba = pool.predict_proba(X)
+                if proba.shape[1] == len(model.risk_classes):
+                    return proba
+                logger.warning("Inference pool returned a different class count, scoring locally")
+            except Exception as e:
+                logger.error(f"Inference pool failed, scoring locally: {e}")
+        return model.predict_proba(X)
+    
+    def enable_prediction_cache(self, max_entries=10000, resolutions=None):
+        """Reuse model predictions for repeated readings (see PredictionCache)"""
+        self.prediction_cache = PredictionCache(max_entries, resolutions)
+        logger.info(f"Prediction cache enabled: up to {max_entries} readings")
+        return self.prediction_cache
+    
+    def disable_prediction_cache(self):
+        self.prediction_cache = None
+    
+    def enable_live_features(self, max_keys=100000):
+        """Derive rates for live readings from per-sensor history (see LiveFeatureState)"""
+        self.feature_state = LiveFeatureState(max_keys)
+        logger.info(f"Live features enabled: up to {max_keys} sensors tracked")
+        return self.feature_state
+    
+    def disable_live_features(self):
+        self.feature_state = None
+    
+    def live_features(self, sensor_data, sensor_id=None):
+        """(reading with its live rates, derived features) for a reading dict
+        
+        The reading is recorded in its sensor's history. Without live
+        features, or for a reading that can't be tracked, it comes back
+        unchanged with no features.
+        """
+        state = self.feature_state
+        if state is None or not isinstance(sensor_data, dict):
+            return sensor_data, None
+        features = state.update(sensor_data.get('zone_id'), sensor_data, sensor_id)
+        if features is None:
+            return sensor_data, None
+        return {**sensor_data, **{col: features[col] for col in MODEL_RATE_COLUMNS}}, features
+    
+    def lookup_prediction(self, sensor_data):
+        """(model, cache key, cached prediction) for a reading dict
+        
+        The key is None when caching is off, no model is loaded or the
+        reading can't be cached; the prediction is None on a miss.
+        """
+        model = self.active_model
+        cache = self.prediction_cache
+        if cache is None or model is None or not isinstance(sensor_data, dict):
+            return model, None, None
+        key = cache.key(model, self.zone_index, sensor_data)
+        if key is None:
+            return model, None, None
+        return model, key, cache.get(key)
+    
+    def store_prediction(self, model, key, prediction):
+        """Remember a model prediction under a key from lookup_prediction"""
+        cache = self.prediction_cache
+        if cache is not None and key is not None:
+            cache.put(model, self.zone_index, key, prediction)
+    
+    @property
+    def zone_index(self):
+        """Zone lookup tables of the active rule engine"""
+        return self.rule_engine.zones
+    
+    @property
+    def model_loaded(self):
+        """True when predictions come from a trained model"""
+        return self.active_model is not None
+    
+    @property
+    def inference_engine(self):
+        """Name of the engine currently evaluating the forest"""
+        model = self.active_model
+        return model.inference_engine if model is not None else None
+    
+    # Read-only views of the active model
+    @property
+    def model(self):
+        return self.active_model.model if self.active_model is not None else None
+    
+    @property
+    def forest(self):
+        return self.active_model.forest if self.active_model is not None else None
+    
+    @property
+    def scaler(self):
+        return self.active_model.scaler if self.active_model is not None else None
+    
+    @property
+    def feature_columns(self):
+        return self.active_model.feature_columns if self.active_model is not None else None
+    
+    @property
+    def n_features(self):
+        return self.active_model.n_features if self.active_model is not None else 0
+    
+    def predict_proba(self, X):
+        """Class probabilities for raw features from the active model"""
+        return self.active_model.predict_proba(X)
     
     def prepare_features(self, df):
         """Prepare features for prediction"""
+        return self.active_model.prepare_features(df)
+    
+    def prepare_features_batch(self, columns, zone_ids):
+        """Build the model feature matrix from already-coerced sensor columns"""
+        return self.active_model.prepare_features_batch(columns, zone_ids)
+    
+    def scale_features(self, X):
+        """Standardize a feature matrix for the active model"""
+        return self.active_model.scale_features(X)
+    
+    def load_zones(self):
+        """Load zone configuration and index it by zone_id
+        
+        A file that fails to load leaves the previous zones in place.
+        """
         try:
-            # Create additional features
-            df['displacement_rate'] = 0  # For single prediction, assume no change
-            df['vibration_rate'] = 0
-            df['acceleration_magnitude'] = np.sqrt(
-                df['accelerometer_x']**2 + 
-                df['accelerometer_y']**2 + 
-                df['accelerometer_z']**2
-            )
-            
-            # Zone encoding
-            if self.label_encoder is not None:
-                try:
-                    df['zone_encoded'] = self.label_encoder.transform(df['zone_id'])
-                except:
-                    # If zone not in training data, use a default value
-                    df['zone_encoded'] = 0
-            else:
-                df['zone_encoded'] = 0
-            
-            feature_cols = self.feature_columns + [
-                'displacement_rate', 'vibration_rate', 
-                'acceleration_magnitude', 'zone_encoded'
-            ]
-            
-            return df[feature_cols]
+            with open(self.zones_path, 'r') as f:
+                zones_data = json.load(f)
+            self.rule_engine = RuleEngine(ZoneIndex(zones_data))
+            self.zones_data = zones_data
+            logger.info(f"Zones data loaded successfully ({len(self.zone_index)} zones)")
         except Exception as e:
-            logger.error(f"Error preparing features: {e}")
-            return None
+            logger.error(f"Error loading zones data: {e}")
     
     def predict_risk(self, sensor_data):
         """Predict risk level for sensor data"""
         try:
-            if self.model is None:
+            # One reference for the whole request, even if a reload swaps models meanwhile
+            model, key, cached = self.lookup_prediction(sensor_data)
+            if cached is not None:
+                return cached
+            if model is None:
                 # Dummy prediction if model not loaded
                 return self.dummy_prediction(sensor_data)
             
-            # Convert to DataFrame
-            if isinstance(sensor_data, dict):
-                df = pd.DataFrame([sensor_data])
-            else:
-                df = sensor_data.copy()
-            
             # Prepare features
-            X = self.prepare_features(df)
+            with stage_timer.span('prepare_features'):
+                if isinstance(sensor_data, dict):
+                    X = model.build_feature_row(sensor_data)
+                else:
+                    X = model.prepare_features(sensor_data.copy())
+                    if X is not None:
+                        X = X.to_numpy(dtype=np.float64)
             if X is None:
                 return self.dummy_prediction(sensor_data)
             
-            # Scale features
-            X_scaled = self.scaler.transform(X)
-            
-            # Predict
-            risk_proba = self.model.predict_proba(X_scaled)
-            risk_pred = self.model.predict(X_scaled)
+            # Scale and predict; the label is the argmax, exactly as RandomForest.predict does
+            risk_proba = model.predict_proba(X)[0]
+            best = int(np.argmax(risk_proba))
             
             # Calculate risk score (0-10 scale)
-            risk_score = np.max(risk_proba[0]) * 10
+            risk_score = risk_proba[best] * 10
             
-            return {
-                'risk_level': risk_pred[0],
+            prediction = {
+                'risk_level': model.risk_classes[best],
                 'risk_score': float(risk_score),
-                'risk_probabilities': {
-                    label: float(prob) for label, prob in 
-                    zip(self.model.classes_, risk_proba[0])
-                }
+                'risk_probabilities': dict(zip(model.risk_classes, risk_proba.tolist()))
             }
+            self.store_prediction(model, key, prediction)
+            return prediction
         except Exception as e:
             logger.error(f"Error in prediction: {e}")
             return self.dummy_prediction(sensor_data)
     
+    def predict_risk_batch(self, readings):
+        """Predict risk levels for a list of sensor readings in one pass
+        
+        Rows with complete numeric sensor values are scored with a single
+        scaler pass (none for a scaler-folded forest) and a single
+        predict_proba call. Rows the model cannot
+        score fall back to the rule-based prediction, and rows that cannot
+        be scored at all are returned as None, keeping the output aligned
+        with the input.
+        """
+        model = self.active_model
+        results = [None] * len(readings)
+        positions = np.array(
+            [i for i, reading in enumerate(readings) if isinstance(reading, dict)],
+            dtype=np.intp
+        )
+        if len(positions) == 0:
+            return results
+        
+        with stage_timer.span('coerce_batch'):
+            df = pd.DataFrame.from_records([readings[i] for i in positions])
+            zone_ids = (df['zone_id'].tolist() if 'zone_id' in df.columns
+                        else [None] * len(df))
+            
+            input_columns = {'displacement_mm', 'vibration_mm_s'}
+            if model is not None:
+                input_columns.update(model.feature_columns)
+            # Live rates, when the readings carry them
+            input_columns.update(col for col in MODEL_RATE_COLUMNS if col in df.columns)
+            columns = {}
+            for col in input_columns:
+                if col in df.columns:
+                    columns[col] = coerce_numeric(df[col])
+                else:
+                    columns[col] = np.full(len(df), np.nan)
+            
+            # Rule-based path: missing readings count as zero, garbage is rejected
+            rule_ok = np.ones(len(df), dtype=bool)
+            for col in ('displacement_mm', 'vibration_mm_s'):
+                if col in df.columns:
+                    rule_ok &= df[col].isna().to_numpy() | np.isfinite(columns[col])
+        
+        for position, result in zip(positions,
+                                    self._predict_columns(model, zone_ids, columns, rule_ok)):
+            results[position] = result
+        return results
+    
+    def predict_risk_columns(self, zone_ids, columns, rule_ok=None, sensor_ids=None):
+        """Predict risk for already-coerced float64 sensor columns
+        
+        Rows whose model features are all finite are scored by the model;
+        the rest use the threshold rules with NaN displacement and vibration
+        counted as zero, except rows excluded by rule_ok (default: rows with
+        infinite values), which are returned as None. With live features
+        enabled the rows are recorded in row order and scored with their rates.
+        """
+        state = self.feature_state
+        if state is not None and len(zone_ids):
+            features = state.update_columns(zone_ids, columns, sensor_ids)
+            columns = dict(columns)
+            for col in MODEL_RATE_COLUMNS:
+                columns[col] = np.array(features[col], dtype=np.float64)
+        return self._predict_columns(self.active_model, zone_ids, columns, rule_ok)
+    
+    def _predict_columns(self, model, zone_ids, columns, rule_ok=None):
+        n_rows = len(zone_ids)
+        results = [None] * n_rows
+        if n_rows == 0:
+            return results
+        
+        displacement = columns.get('displacement_mm', np.full(n_rows, np.nan))
+        vibration = columns.get('vibration_mm_s', np.full(n_rows, np.nan))
+        
+        # Model path: every raw feature must be a finite number
+        model_mask = np.zeros(n_rows, dtype=bool)
+        if model is not None:
+            model_mask[:] = True
+            for col in model.feature_columns:
+                if col in columns:
+                    model_mask &= np.isfinite(columns[col])
+                else:
+                    model_mask[:] = False
+        
+        if model_mask.any():
+            try:
+                with stage_timer.span('prepare_features'):
+                    X = model.prepare_features_batch(
+                        {col: values[model_mask] for col, values in columns.items()},
+                        [zone_id for zone_id, ok in zip(zone_ids, model_mask) if ok]
+                    )
+                risk_proba = self._predict_proba(model, X)
+                risk_pred = np.argmax(risk_proba, axis=1)
+                risk_scores = np.max(risk_proba, axis=1) * 10
+                classes = model.risk_classes
+                
+                for row, position in enumerate(np.flatnonzero(model_mask)):
+                    results[position] = {
+                        'risk_level': classes[risk_pred[row]],
+                        'risk_score': float(risk_scores[row]),
+                        'risk_probabilities': dict(zip(classes, risk_proba[row].tolist()))
+                    }
+            except Exception as e:
+                logger.error(f"Error in batch prediction: {e}")
+                model_mask[:] = False
+        
+        if rule_ok is None:
+            rule_ok = ~np.isinf(displacement) & ~np.isinf(vibration)
+        rule_rows = np.flatnonzero(~model_mask & rule_ok)
+        if len(rule_rows):
+            with stage_timer.span('rule_fallback'):
+                rule_results = self.dummy_prediction_batch(
+                    [zone_ids[row] if isinstance(zone_ids[row], str) else 'A' for row in rule_rows],
+                    np.nan_to_num(displacement[rule_rows]),
+                    np.nan_to_num(vibration[rule_rows])
+                )
+            for row, result in zip(rule_rows, rule_results):
+                results[row] = result
+        
+        return results
+    
+    @property
+    def input_columns(self):
+        """Raw sensor columns of a binary batch record, in order"""
+        model = self.active_model
+        return model.feature_columns if model is not None else SENSOR_FEATURE_COLUMNS
+    
+    def predict_risk_matrix(self, raw, zone_ids):
+        """Score a raw (n, len(input_columns)) sensor matrix without per-row objects
+        
+        Returns (levels, scores, probabilities): level codes and probability
+        columns follow RISK_LEVELS. Rows with non-finite values, or every
+        row when no model is loaded, use the threshold rules with missing
+        displacement and vibration counted as zero.
+        """
+        model = self.active_model
+        columns = model.feature_columns if model is not None else SENSOR_FEATURE_COLUMNS
+        raw = np.asarray(raw, dtype=np.float64)
+        zone_ids = np.asarray(zone_ids, dtype=object)
+        n_rows = len(raw)
+        
+        levels = np.empty(n_rows, dtype=np.int8)
+        scores = np.empty(n_rows)
+        probabilities = np.zeros((n_rows, len(RISK_LEVELS)))
+        
+        model_mask = np.zeros(n_rows, dtype=bool)
+        if model is not None:
+            model_mask = np.isfinite(raw).all(axis=1)
+        
+        if model_mask.any():
+            try:
+                with stage_timer.span('prepare_features'):
+                    X = model.prepare_features_batch(
+                        {col: raw[model_mask, i] for i, col in enumerate(columns)},
+                        zone_ids[model_mask].tolist()
+                    )
+                risk_proba = self._predict_proba(model, X)
+                # Level codes follow RISK_LEVELS; the label is still the model's argmax
+                level_codes = np.array([RISK_LEVELS.index(label) if label in RISK_LEVELS else -1
+                                        for label in model.risk_classes], dtype=np.int8)
+                levels[model_mask] = level_codes[np.argmax(risk_proba, axis=1)]
+                scores[model_mask] = np.max(risk_proba, axis=1) * 10
+                for j, label in enumerate(model.risk_classes):
+                    if level_codes[j] >= 0:
+                        probabilities[model_mask, level_codes[j]] = risk_proba[:, j]
+            except Exception as e:
+                logger.error(f"Error in matrix prediction: {e}")
+                model_mask[:] = False
+        
+        rule_mask = ~model_mask
+        if rule_mask.any():
+            with stage_timer.span('rule_fallback'):
+                rules = self.rule_engine.evaluate(
+                    [zone_id if isinstance(zone_id, str) else 'A' for zone_id in zone_ids[rule_mask]],
+                    np.nan_to_num(raw[rule_mask, columns.index('displacement_mm')]),
+                    np.nan_to_num(raw[rule_mask, columns.index('vibration_mm_s')])
+                )
+            levels[rule_mask] = rules.levels
+            scores[rule_mask] = rules.scores
+            probabilities[rule_mask] = rules.probabilities
+        
+        return levels, scores, probabilities
+    
     def dummy_prediction(self, sensor_data):
         """Dummy prediction when model is not available"""
         # Simple rule-based prediction
@@ -135,58 +515,124 @@ class RockfallAPI:
         vibration = sensor_data.get('vibration_mm_s', 0)
         zone_id = sensor_data.get('zone_id', 'A')
         
-        # Default thresholds (more sensitive for demonstration)
-        thresholds = {
-            'displacement_warning': 5, 
-            'displacement_critical': 8,
-            'vibration_warning': 1.5, 
-            'vibration_critical': 2.5
-        }
-        
-        # Try to get zone-specific thresholds
-        if self.zones_data and 'zones' in self.zones_data:
-            for zone in self.zones_data['zones']:
-                if zone.get('zone_id') == zone_id and 'risk_thresholds' in zone:
-                    thresholds.update(zone['risk_thresholds'])
-                    break
-        
-        logger.info(f"Zone {zone_id}: displacement={displacement}, vibration={vibration}")
-        logger.info(f"Thresholds: {thresholds}")
-        
-        # Calculate risk with explicit logging
-        is_critical = (displacement >= thresholds['displacement_critical'] or 
-                      vibration >= thresholds['vibration_critical'])
-        is_warning = (displacement >= thresholds['displacement_warning'] or 
-                     vibration >= thresholds['vibration_warning'])
-        
-        if is_critical:
-            risk_level = 'critical'
-            risk_score = min(10.0, 7.0 + (displacement / 10.0) + (vibration / 2.0))
-            logger.warning(f"CRITICAL RISK DETECTED: Zone {zone_id}, Score {risk_score}")
-        elif is_warning:
-            risk_level = 'high'
-            risk_score = min(8.0, 5.0 + (displacement / 10.0) + (vibration / 2.0))
-            logger.warning(f"HIGH RISK DETECTED: Zone {zone_id}, Score {risk_score}")
-        else:
-            risk_level = 'low'
-            risk_score = min(5.0, 1.0 + (displacement / 10.0) + (vibration / 2.0))
-        
-        result = {
-            'risk_level': risk_level,
-            'risk_score': float(risk_score),
-            'risk_probabilities': {
-                'low': 0.8 if risk_level == 'low' else 0.1,
-                'high': 0.8 if risk_level == 'high' else 0.1,
-                'critical': 0.8 if risk_level == 'critical' else 0.1
-            }
-        }
-        
-        logger.info(f"Prediction result: {result}")
+        result = self.rule_engine.predict(zone_id, displacement, vibration)
+        if result['risk_level'] == 'critical':
+            logger.warning(f"CRITICAL RISK DETECTED: Zone {zone_id}, Score {result['risk_score']}")
+        elif result['risk_level'] == 'high':
+            logger.warning(f"HIGH RISK DETECTED: Zone {zone_id}, Score {result['risk_score']}")
         return result
+    
+    def dummy_prediction_batch(self, zone_ids, displacement, vibration):
+        """Rule-based predictions for whole arrays of readings at once"""
+        result = self.rule_engine.evaluate(zone_ids, displacement, vibration)
+        
+        n_critical = result.count(CRITICAL)
+        n_high = result.count(HIGH)
+        if n_critical or n_high:
+            logger.warning(f"RULE-BASED RISK DETECTED: {n_critical} critical, {n_high} high "
+                           f"of {len(result)} readings")
+        return result.to_predictions()
 
 # Initialize API
 api = RockfallAPI()
 
+# Reading schema shared by /predict and /predict/batch
+reading_validator = ReadingValidator()
+
+# Coalesces concurrent /predict calls into batches when enabled (see enable_micro_batching)
+micro_batcher = None
+
+def enable_micro_batching(max_wait_ms=2.0, max_batch=256):
+    """Score /predict readings in shared batches of up to max_batch readings,
+    waiting at most max_wait_ms for a batch to fill"""
+    global micro_batcher
+    if micro_batcher is not None:
+        micro_batcher.stop()
+    micro_batcher = MicroBatcher(lambda readings: api.predict_risk_batch(readings),
+                                 max_wait_ms=max_wait_ms, max_batch=max_batch).start()
+    return micro_batcher
+
+def disable_micro_batching():
+    global micro_batcher
+    if micro_batcher is not None:
+        micro_batcher.stop()
+        micro_batcher = None
+
+def predict_single(sensor_data):
+    """Single-reading prediction, through the micro-batcher when it is enabled"""
+    if api.prediction_cache is not None:
+        # Reload zones.json if it changed, which invalidates the cached predictions
+        current_zones()
+    batcher = micro_batcher
+    # The batch path sends non-finite readings to the rules, so keep those on predict_risk
+    if batcher is not None and all(
+            math.isfinite(value) for key, value in sensor_data.items() if key != 'zone_id'):
+        model, key, cached = api.lookup_prediction(sensor_data)
+        if cached is not None:
+            return cached
+        try:
+            prediction = batcher.submit(sensor_data)
+        except Exception as e:
+            # Stopped batcher or failed batch: score this reading on its own
+            logger.warning(f"Micro-batch submit failed, scoring directly: {e}")
+            prediction = None
+        if prediction is not None:
+            api.store_prediction(model, key, prediction)
+            return prediction
+    return api.predict_risk(sensor_data)
+
+# End-to-end handler latency per endpoint, recorded while stage timing is enabled
+request_latency = {}
+_request_latency_lock = threading.Lock()
+
+def enable_stage_timing(enabled=True):
+    """Record per-stage and per-endpoint latency histograms for /metrics"""
+    stage_timer.enabled = enabled
+
+@app.before_request
+def start_request_timer():
+    if stage_timer.enabled:
+        request.environ['rockfall.started_ns'] = time.perf_counter_ns()
+
+@app.after_request
+def record_request_latency(response):
+    started = request.environ.get('rockfall.started_ns')
+    if started is not None:
+        endpoint = request.endpoint or 'unmatched'
+        histogram = request_latency.get(endpoint)
+        if histogram is None:
+            with _request_latency_lock:
+                histogram = request_latency.setdefault(endpoint, Histogram())
+        histogram.observe((time.perf_counter_ns() - started) / 1e6)
+    return response
+
+# Serialized /zones and /alerts bodies, rebuilt only when their file changes
+response_cache = FileResponseCache(app.json.dumps)
+
+def cached_json_response(entry):
+    """Serve a cached body with its ETag; a matching If-None-Match gets a 304"""
+    response = app.response_class(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def load_zones_file(path):
+    """Cache loader for zones.json; also refreshes the API's zone index"""
+    api.load_zones()
+    return api.zones_data
+
+def current_zones():
+    """Cached zones entry, reloading zones.json if it changed on disk"""
+    return response_cache.get(api.zones_path, load_zones_file)
+
+# Alert history, parsed incrementally as alerts are appended
+alert_log = AlertLog(ALERTS_PATH)
+
+def load_alerts_file(path):
+    """Cache loader for the full alert history"""
+    alert_log.refresh()
+    return {'alerts': alert_log.query()}
+
 @app.route('/', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -194,43 +640,114 @@ def health_check():
         'status': 'healthy',
         'service': 'Rockfall Risk Prediction API',
         'timestamp': datetime.now().isoformat(),
-        'model_loaded': api.model is not None
+        'model_loaded': api.model_loaded,
+        'inference_engine': api.inference_engine,
+        'micro_batching': micro_batcher.metrics() if micro_batcher is not None else None,
+        'prediction_cache': (api.prediction_cache.stats()
+                             if api.prediction_cache is not None else None),
+        'live_features': (api.feature_state.stats()
+                          if api.feature_state is not None else None)
+    })
+
+@app.route('/model', methods=['GET'])
+def model_status():
+    """Active model and hot-reload status"""
+    model = api.active_model
+    return jsonify({
+        'model_loaded': model is not None,
+        'inference_engine': model.inference_engine if model is not None else None,
+        'source': model.source if model is not None else None,
+        'loaded_at': (datetime.fromtimestamp(model.loaded_at).isoformat()
+                      if model is not None else None),
+        'watching': api.watcher is not None and api.watcher.running,
+        'reload': api.reload_metrics
     })
 
+@app.route('/model/reload', methods=['POST'])
+def reload_model():
+    """Reload the model files now instead of waiting for the watcher"""
+    if api.reload_model():
+        return jsonify({'status': 'reloaded', 'reload': api.reload_metrics})
+    return jsonify({'error': 'Model reload failed', 'reload': api.reload_metrics}), 500
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of latency, batching, reload and cache metrics
+    
+    Stage and request histograms only fill while stage timing is enabled;
+    latencies are exported in seconds.
+    """
+    text = PrometheusText()
+    text.histograms('rockfall_stage_duration_seconds', 'Time spent in each prediction stage',
+                    stage_timer.histograms, label='stage', scale=0.001)
+    text.histograms('rockfall_request_duration_seconds', 'Handler latency per endpoint',
+                    request_latency, label='endpoint', scale=0.001)
+    
+    batcher = micro_batcher
+    if batcher is not None:
+        text.histograms('rockfall_micro_batch_size', 'Readings scored per micro-batch',
+                        {None: batcher.batch_sizes})
+        text.histograms('rockfall_micro_batch_queue_wait_seconds',
+                        'Time readings wait for their micro-batch',
+                        {None: batcher.queue_wait_ms}, scale=0.001)
+        text.counter('rockfall_micro_batch_failures_total', 'Micro-batches that raised',
+                     batcher.failures)
+    
+    reload = api.reload_metrics
+    text.gauge('rockfall_model_loaded', 'Whether a trained model is active',
+               int(api.model_loaded))
+    text.counter('rockfall_model_reloads_total', 'Successful model reloads', reload['reloads'])
+    text.counter('rockfall_model_reload_failures_total', 'Failed model reloads',
+                 reload['failures'])
+    text.gauge('rockfall_model_last_reload_seconds', 'Duration of the last model reload',
+               reload['last_reload_ms'] / 1000 if reload['last_reload_ms'] is not None else None)
+    text.gauge('rockfall_model_max_swap_pause_seconds', 'Longest model swap pause',
+               reload['max_swap_pause_us'] / 1e6
+               if reload['max_swap_pause_us'] is not None else None)
+    
+    cache = api.prediction_cache
+    if cache is not None:
+        text.counter('rockfall_prediction_cache_hits_total', 'Predictions served from the cache',
+                     cache.hits)
+        text.counter('rockfall_prediction_cache_misses_total', 'Cache lookups that scored the model',
+                     cache.misses)
+        text.counter('rockfall_prediction_cache_invalidations_total',
+                     'Cache flushes after a model or zones change', cache.invalidations)
+        text.gauge('rockfall_prediction_cache_entries', 'Predictions held in the cache', len(cache))
+    
+    text.counter('rockfall_response_cache_hits_total', 'Cached /zones and /alerts bodies served',
+                 response_cache.hits)
+    text.counter('rockfall_response_cache_misses_total', 'Cached bodies rebuilt from disk',
+                 response_cache.misses)
+    return app.response_class(text.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """Predict risk for sensor data"""
     try:
-        data = request.get_json()
+        with stage_timer.span('parse_request'):
+            data = request.get_json()
         
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        # Validate required fields
-        required_fields = ['zone_id', 'displacement_mm', 'vibration_mm_s']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        # Required fields, numeric coercion and defaults for optional fields
+        try:
+            with stage_timer.span('validate_request'):
+                sensor_data = reading_validator.validate(data)
+        except ValidationError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Set default values for optional fields
-        sensor_data = {
-            'zone_id': data['zone_id'],
-            'displacement_mm': float(data['displacement_mm']),
-            'vibration_mm_s': float(data['vibration_mm_s']),
-            'temperature_c': float(data.get('temperature_c', 22.0)),
-            'humidity_percent': float(data.get('humidity_percent', 60.0)),
-            'pressure_kpa': float(data.get('pressure_kpa', 101.3)),
-            'accelerometer_x': float(data.get('accelerometer_x', 0.1)),
-            'accelerometer_y': float(data.get('accelerometer_y', 0.1)),
-            'accelerometer_z': float(data.get('accelerometer_z', 9.8))
-        }
+        # Rates from the sensor's recent readings, when live features are enabled
+        sensor_data, features = api.live_features(sensor_data, data.get('sensor_id'))
         
         # Get prediction
-        prediction = api.predict_risk(sensor_data)
+        prediction = predict_single(sensor_data)
         
         # Add recommendation
-        recommendation = get_recommendation(prediction['risk_level'], 
-                                          prediction['risk_score'])
+        with stage_timer.span('recommendation'):
+            recommendation = get_recommendation(prediction['risk_level'], 
+                                              prediction['risk_score'])
         
         result = {
             'zone_id': data['zone_id'],
@@ -238,54 +755,205 @@ def predict():
             'prediction': prediction,
             'recommendation': recommendation
         }
+        if features is not None:
+            result['features'] = features
         
-        return jsonify(result)
+        with stage_timer.span('serialize_response'):
+            return jsonify(result)
         
     except Exception as e:
         logger.error(f"Error in predict endpoint: {e}")
         return jsonify({'error': str(e)}), 500
 
+def predict_batch_binary():
+    """/predict/batch for packed float32 or Arrow IPC bodies, answered in the same format
+    
+    Packed bodies are records of len(input_columns) little-endian float32
+    values (the X-Feature-Columns response header lists them); an optional
+    zone_id query parameter applies to every record. Arrow streams carry
+    one column per feature plus an optional zone_id column.
+    """
+    columns = api.input_columns
+    mimetype = request.mimetype
+    try:
+        with stage_timer.span('parse_request'):
+            body = request.get_data(cache=False)
+            if mimetype == batch_formats.ARROW_MIMETYPE:
+                if not batch_formats.arrow_available():
+                    return jsonify({'error': 'Arrow requests need pyarrow, which is not installed'}), 415
+                raw, zone_ids = batch_formats.decode_arrow(body, columns)
+            else:
+                raw, zone_ids = batch_formats.decode_packed(body, columns), None
+    except batch_formats.BatchFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if zone_ids is None:
+        zone_ids = [request.args.get('zone_id')] * len(raw)
+    levels, scores, probabilities = api.predict_risk_matrix(raw, zone_ids)
+    
+    with stage_timer.span('serialize_response'):
+        if mimetype == batch_formats.ARROW_MIMETYPE:
+            payload = batch_formats.encode_arrow(levels, scores, probabilities)
+        else:
+            payload = batch_formats.encode_packed(levels, scores, probabilities)
+    response = app.response_class(payload, mimetype=mimetype)
+    response.headers['X-Feature-Columns'] = ','.join(columns)
+    response.headers['X-Result-Columns'] = ','.join(batch_formats.RESULT_COLUMNS)
+    response.headers['X-Risk-Levels'] = ','.join(RISK_LEVELS)
+    return response
+
 @app.route('/predict/batch', methods=['POST'])
 def predict_batch():
-    """Predict risk for multiple sensor readings"""
+    """Predict risk for multiple sensor readings
+    
+    Accepts {"sensors": [...]} JSON, or a binary body (see predict_batch_binary).
+    JSON readings are validated like /predict; each result and each entry
+    of "errors" carries the index of its reading.
+    """
     try:
-        data = request.get_json()
+        if request.mimetype in batch_formats.BINARY_MIMETYPES:
+            return predict_batch_binary()
+        
+        with stage_timer.span('parse_request'):
+            data = request.get_json()
         
         if not data or 'sensors' not in data:
             return jsonify({'error': 'No sensor data provided'}), 400
         
+        if not isinstance(data['sensors'], list):
+            return jsonify({'error': 'sensors must be a list of readings'}), 400
+        
+        with stage_timer.span('validate_request'):
+            batch = reading_validator.validate_batch(data['sensors'])
+            zone_ids, columns = batch.valid_columns()
+            sensor_ids = [data['sensors'][index].get('sensor_id') for index in batch.valid_rows]
+        predictions = api.predict_risk_columns(zone_ids, columns, sensor_ids=sensor_ids)
+        
         results = []
-        for sensor_data in data['sensors']:
-            try:
-                prediction = api.predict_risk(sensor_data)
-                recommendation = get_recommendation(prediction['risk_level'], 
-                                                  prediction['risk_score'])
+        with stage_timer.span('recommendation'):
+            for index, zone_id, prediction in zip(batch.valid_rows, zone_ids, predictions):
+                if prediction is None:
+                    batch.errors[int(index)] = ['Reading could not be scored']
+                    continue
                 
-                result = {
-                    'zone_id': sensor_data.get('zone_id'),
+                results.append({
+                    'index': int(index),
+                    'zone_id': zone_id,
                     'prediction': prediction,
-                    'recommendation': recommendation
-                }
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error processing sensor {sensor_data}: {e}")
-                continue
+                    'recommendation': get_recommendation(prediction['risk_level'],
+                                                         prediction['risk_score'])
+                })
+        if batch.errors:
+            logger.warning(f"Rejected {len(batch.errors)} of {len(batch)} batch readings")
         
-        return jsonify({
-            'timestamp': datetime.now().isoformat(),
-            'results': results
-        })
+        with stage_timer.span('serialize_response'):
+            return jsonify({
+                'timestamp': datetime.now().isoformat(),
+                'results': results,
+                'errors': batch.error_list()
+            })
         
     except Exception as e:
         logger.error(f"Error in batch predict endpoint: {e}")
         return jsonify({'error': str(e)}), 500
 
+def read_ndjson_lines(stream, max_line_bytes=MAX_STREAM_LINE_BYTES):
+    """Yield (line_number, reading or None, error or None) from an NDJSON byte stream
+    
+    Lines are read one at a time, so memory stays bounded by the longest
+    accepted line. Blank lines are skipped.
+    """
+    line_number = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        line_number += 1
+        
+        if len(line) > max_line_bytes and not line.endswith(b'\n'):
+            # Drain the rest of the oversized line before moving on
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_line_bytes + 1)
+            yield line_number, None, f'Line exceeds {max_line_bytes} bytes'
+            continue
+        
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            reading = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(reading, dict):
+            yield line_number, None, 'Reading must be a JSON object'
+            continue
+        yield line_number, reading, None
+
+def stream_predictions(lines, chunk_rows=STREAM_CHUNK_ROWS):
+    """Score parsed NDJSON readings in fixed-size chunks, yielding one NDJSON result line each
+    
+    Each chunk is validated and defaulted like a /predict/batch payload
+    before live features are tracked and the readings scored.
+    """
+    def score(chunk):
+        readings = [reading for _, reading, error in chunk if error is None]
+        batch = reading_validator.validate_batch(readings)
+        zone_ids, columns = batch.valid_columns()
+        sensor_ids = [readings[index].get('sensor_id') for index in batch.valid_rows]
+        predictions = api.predict_risk_columns(zone_ids, columns, sensor_ids=sensor_ids)
+        
+        outcomes = [None] * len(readings)
+        for index, messages in batch.errors.items():
+            outcomes[index] = '; '.join(messages)
+        for index, prediction in zip(batch.valid_rows, predictions):
+            outcomes[index] = prediction if prediction is not None else 'Reading could not be scored'
+        outcomes = iter(outcomes)
+        
+        for line_number, reading, error in chunk:
+            prediction = next(outcomes) if error is None else None
+            if isinstance(prediction, str):
+                error = prediction
+            if error is not None:
+                result = {'line': line_number, 'error': error}
+            else:
+                result = {
+                    'line': line_number,
+                    'zone_id': reading.get('zone_id'),
+                    'prediction': prediction,
+                    'recommendation': get_recommendation(prediction['risk_level'],
+                                                         prediction['risk_score'])
+                }
+            yield json.dumps(result) + '\n'
+    
+    chunk = []
+    for item in lines:
+        chunk.append(item)
+        if len(chunk) >= chunk_rows:
+            yield ''.join(score(chunk))
+            chunk = []
+    if chunk:
+        yield ''.join(score(chunk))
+
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    """Predict risk for newline-delimited JSON readings, streaming NDJSON results
+    
+    Each result line carries the 1-based input line number; lines that
+    cannot be scored produce {"line": n, "error": ...} instead of a prediction.
+    """
+    return app.response_class(
+        stream_with_context(stream_predictions(read_ndjson_lines(request.stream))),
+        mimetype='application/x-ndjson'
+    )
+
 @app.route('/zones', methods=['GET'])
 def get_zones():
     """Get all zone information"""
     try:
-        if api.zones_data:
-            return jsonify(api.zones_data)
+        entry = current_zones()
+        if entry is not None and entry.data:
+            return cached_json_response(entry)
         else:
             return jsonify({'error': 'Zones data not available'}), 500
     except Exception as e:
@@ -296,12 +964,13 @@ def get_zones():
 def get_zone(zone_id):
     """Get specific zone information"""
     try:
-        if not api.zones_data:
+        entry = current_zones()
+        if entry is None or not entry.data:
             return jsonify({'error': 'Zones data not available'}), 500
         
-        for zone in api.zones_data['zones']:
-            if zone['zone_id'] == zone_id:
-                return jsonify(zone)
+        zone = api.zone_index.get(zone_id)
+        if zone is not None:
+            return jsonify(zone)
         
         return jsonify({'error': 'Zone not found'}), 404
         
@@ -311,18 +980,35 @@ def get_zone(zone_id):
 
 @app.route('/alerts', methods=['GET'])
 def get_alerts():
-    """Get alert history"""
+    """Get alert history
+    
+    Optional filters: since=<timestamp> (strictly later alerts),
+    zone_id=, status= and limit=<n> (the n most recent matches).
+    """
     try:
-        alerts_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                 'sample-data', 'fake_alerts.csv')
-        
-        if os.path.exists(alerts_path):
-            df = pd.read_csv(alerts_path)
-            # Convert to list of dictionaries
-            alerts = df.to_dict('records')
-            return jsonify({'alerts': alerts})
-        else:
-            return jsonify({'alerts': []})
+        filters = {key: request.args.get(key) for key in ('since', 'zone_id', 'status', 'limit')}
+        if not any(value is not None for value in filters.values()):
+            entry = response_cache.get(alert_log.path, load_alerts_file)
+            if entry is not None:
+                return cached_json_response(entry)
+            else:
+                return jsonify({'alerts': []})
+        
+        if filters['limit'] is not None:
+            try:
+                filters['limit'] = int(filters['limit'])
+            except ValueError:
+                filters['limit'] = -1
+            if filters['limit'] < 0:
+                return jsonify({'error': 'limit must be a non-negative integer'}), 400
+        if filters['since'] is not None:
+            try:
+                filters['since'] = pd.Timestamp(filters['since'])
+            except ValueError:
+                return jsonify({'error': f"Invalid since timestamp: {filters['since']}"}), 400
+        
+        alert_log.refresh()
+        return jsonify({'alerts': alert_log.query(**filters)})
             
     except Exception as e:
         logger.error(f"Error in alerts endpoint: {e}")
@@ -353,6 +1039,25 @@ def get_recommendation(risk_level, risk_score):
         }
 
 if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Rockfall Risk Prediction API')
+    parser.add_argument('--micro-batch', action='store_true',
+                        help='Coalesce concurrent /predict calls into batched forest passes')
+    parser.add_argument('--micro-batch-wait-ms', type=float, default=2.0,
+                        help='Longest time a reading waits for its batch to fill')
+    parser.add_argument('--micro-batch-max', type=int, default=256,
+                        help='Largest number of readings scored together')
+    parser.add_argument('--inference-workers', type=int, default=0,
+                        help='Worker processes for large batches (0 scores in-process)')
+    parser.add_argument('--prediction-cache', type=int, default=0, metavar='ENTRIES',
+                        help='Cache up to ENTRIES predictions for repeated readings (0 disables)')
+    parser.add_argument('--live-features', type=int, default=0, metavar='SENSORS',
+                        help='Derive live rates from the history of up to SENSORS sensors (0 disables)')
+    parser.add_argument('--stage-timing', action='store_true',
+                        help='Record per-stage latency histograms, exported on /metrics')
+    args = parser.parse_args()
+    
     # Train model if it doesn't exist
     model_path = os.path.join(os.path.dirname(__file__), 'ml_model.pkl')
     if not os.path.exists(model_path):
@@ -361,8 +1066,35 @@ if __name__ == '__main__':
             from train_model import train_and_save_model
             train_and_save_model()
             # Reload API with new model
-            api = RockfallAPI()
+            api.reload_model()
         except Exception as e:
             logger.error(f"Error training model: {e}")
     
+    # debug=True runs the Werkzeug reloader: this process only watches the source
+    # files and re-runs the script in a child that serves requests. Threads and
+    # worker processes are started in that child alone, so none are orphaned.
+    serving = os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+    
+    # Pick up retrained models without restarting the server
+    if serving:
+        api.start_model_watcher()
+    
+    if args.stage_timing:
+        enable_stage_timing()
+    
+    if args.prediction_cache:
+        api.enable_prediction_cache(args.prediction_cache)
+    
+    if args.live_features:
+        api.enable_live_features(args.live_features)
+    
+    if args.micro_batch and serving:
+        enable_micro_batching(args.micro_batch_wait_ms, args.micro_batch_max)
+    
+    if args.inference_workers and serving:
+        try:
+            api.enable_inference_pool(args.inference_workers)
+        except Exception as e:
+            logger.error(f"Inference pool not started: {e}")
+    
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
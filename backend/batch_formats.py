@@ -0,0 +1,91 @@
+"""
+Binary Batch Formats for Rockfall Risk Prediction System
+Columnar request/response encodings for /predict/batch that avoid
+per-reading JSON parsing: packed little-endian float32 records, and Arrow
+IPC streams when pyarrow is installed
+"""
+
+import numpy as np
+
+from rule_engine import RISK_LEVELS
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow is optional; the packed format needs only NumPy
+    pa = None
+
+PACKED_MIMETYPE = 'application/x-rockfall-float32'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+BINARY_MIMETYPES = (PACKED_MIMETYPE, ARROW_MIMETYPE)
+
+# Packed response record: level code (index into RISK_LEVELS), score, probabilities
+RESULT_COLUMNS = ['risk_level', 'risk_score'] + [f'probability_{level}' for level in RISK_LEVELS]
+
+PACKED_DTYPE = np.dtype('<f4')
+
+class BatchFormatError(ValueError):
+    """Request body does not match the declared binary layout"""
+
+def arrow_available():
+    return pa is not None
+
+def decode_packed(body, feature_columns):
+    """View a packed float32 body as an (n, len(feature_columns)) array without copying"""
+    record_size = PACKED_DTYPE.itemsize * len(feature_columns)
+    if len(body) % record_size:
+        raise BatchFormatError(
+            f"Body length {len(body)} is not a multiple of the {record_size}-byte record "
+            f"({', '.join(feature_columns)} as little-endian float32)"
+        )
+    return np.frombuffer(body, dtype=PACKED_DTYPE).reshape(-1, len(feature_columns))
+
+def encode_packed(levels, scores, probabilities):
+    """Pack results as little-endian float32 records in RESULT_COLUMNS order"""
+    records = np.empty((len(levels), len(RESULT_COLUMNS)), dtype=PACKED_DTYPE)
+    records[:, 0] = levels
+    records[:, 1] = scores
+    records[:, 2:] = probabilities
+    return records.tobytes()
+
+def decode_arrow(body, feature_columns):
+    """Read an Arrow IPC stream into an (n, n_features) array and optional zone ids
+
+    Each column is cast to float64 and copied into one row-major matrix, the
+    layout the model scores; nulls become NaN.
+    """
+    if pa is None:
+        raise BatchFormatError("Arrow requests need pyarrow, which is not installed")
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except pa.ArrowInvalid as e:
+        raise BatchFormatError(f"Invalid Arrow stream: {e}")
+
+    missing = [col for col in feature_columns if col not in table.column_names]
+    if missing:
+        raise BatchFormatError(f"Arrow stream is missing columns: {', '.join(missing)}")
+
+    raw = np.empty((table.num_rows, len(feature_columns)))
+    for i, col in enumerate(feature_columns):
+        column = table.column(col).cast(pa.float64())
+        raw[:, i] = column.to_numpy(zero_copy_only=False)
+
+    zone_ids = None
+    if 'zone_id' in table.column_names:
+        zone_ids = table.column('zone_id').to_pylist()
+    return raw, zone_ids
+
+def encode_arrow(levels, scores, probabilities):
+    """Results as an Arrow IPC stream with a string risk_level column"""
+    names = np.array(RISK_LEVELS, dtype=object)
+    columns = {
+        'risk_level': pa.array(names[levels].tolist(), type=pa.string()),
+        'risk_score': pa.array(scores)
+    }
+    for j, level in enumerate(RISK_LEVELS):
+        columns[f'probability_{level}'] = pa.array(probabilities[:, j])
+    table = pa.table(columns)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
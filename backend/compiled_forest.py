@@ -0,0 +1,236 @@
+"""
+Compiled Random Forest for Rockfall Risk Prediction System
+Flattens a fitted RandomForestClassifier into contiguous arrays and
+evaluates every tree for a whole batch of rows at once
+"""
+
+import numpy as np
+import os
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Trees are padded to complete binary trees, so depth bounds the array size
+MAX_COMPILED_DEPTH = 14
+
+# Rows traversed together; keeps the per-level work arrays cache resident
+CHUNK_ROWS = 512
+
+class CompiledForest:
+    """Array-backed evaluator producing the same probabilities as sklearn
+
+    Every tree is laid out as a complete binary tree of the forest depth,
+    stored level by level: the node arrays for level L hold n_trees * 2**L
+    entries, and node k at level L has children 2k and 2k + 1 at level L + 1.
+    Shallow leaves are padded with pass-through splits, so traversal is a
+    fixed number of gather/compare steps without any child-pointer lookups.
+    """
+
+    ARRAY_NAMES = ('feature', 'threshold', 'missing_left', 'value', 'classes',
+                   'scaler_folded')
+
+    def __init__(self, feature, threshold, missing_left, value, classes,
+                 scaler_folded=False):
+        self.feature = feature
+        self.threshold = threshold
+        self.missing_left = missing_left
+        self.value = value
+        self.classes = classes
+        self.scaler_folded = bool(scaler_folded)
+        self.n_classes = value.shape[1]
+
+        # value holds n_trees * 2**depth leaves, the split arrays the levels above
+        n_trees = len(value) - len(feature)
+        self.depth = (len(value) // n_trees).bit_length() - 1
+        self.n_trees = n_trees
+
+        self.levels = []
+        for level in range(self.depth):
+            start = n_trees * (2**level - 1)
+            stop = n_trees * (2**(level + 1) - 1)
+            self.levels.append((feature[start:stop], threshold[start:stop],
+                                missing_left[start:stop]))
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten a fitted RandomForestClassifier"""
+        n_trees = len(model.estimators_)
+        n_classes = model.n_classes_
+        depth = max(estimator.tree_.max_depth for estimator in model.estimators_)
+        if depth > MAX_COMPILED_DEPTH:
+            raise ValueError(f"Tree depth {depth} exceeds compilable depth {MAX_COMPILED_DEPTH}")
+
+        n_splits = 2**depth - 1
+        feature = np.zeros((n_trees, n_splits), dtype=np.intp)
+        # Padding splits send every row left; both subtrees end in the same leaf
+        threshold = np.full((n_trees, n_splits), np.inf)
+        missing_left = np.ones((n_trees, n_splits), dtype=bool)
+        value = np.zeros((n_trees, 2**depth, n_classes))
+
+        for t, estimator in enumerate(model.estimators_):
+            tree = estimator.tree_
+            leaf_proba = cls._leaf_probabilities(tree.value[:, 0, :n_classes])
+            missing = getattr(tree, 'missing_go_to_left', None)
+
+            stack = [(0, 0, 0)]  # (node, level, position within level)
+            while stack:
+                node, level, position = stack.pop()
+                if tree.children_left[node] == -1:
+                    span = 2**(depth - level)
+                    value[t, position * span:(position + 1) * span] = leaf_proba[node]
+                    continue
+
+                slot = 2**level - 1 + position
+                feature[t, slot] = tree.feature[node]
+                threshold[t, slot] = tree.threshold[node]
+                missing_left[t, slot] = bool(missing[node]) if missing is not None else False
+                stack.append((tree.children_left[node], level + 1, 2 * position))
+                stack.append((tree.children_right[node], level + 1, 2 * position + 1))
+
+        def level_major(arr):
+            return np.concatenate([
+                arr[:, 2**level - 1:2**(level + 1) - 1].ravel() for level in range(depth)
+            ] or [arr.ravel()])
+
+        return cls(
+            feature=level_major(feature),
+            threshold=level_major(threshold),
+            missing_left=level_major(missing_left),
+            value=value.reshape(n_trees * 2**depth, n_classes),
+            classes=np.asarray(model.classes_).astype(str)
+        )
+
+    @staticmethod
+    def _leaf_probabilities(value):
+        """Per-node class probabilities exactly as DecisionTreeClassifier reports them"""
+        totals = value.sum(axis=1)
+        if np.allclose(totals[totals > 0], 1.0):
+            # scikit-learn >= 1.4 already stores class fractions
+            return value
+        # Older releases store weighted counts and normalize at predict time
+        totals[totals == 0] = 1.0
+        return value / totals[:, np.newaxis]
+
+    def fold_scaler(self, mean, scale):
+        """Return a forest that takes raw features instead of standardized ones
+
+        sklearn compares float32((x - mean) / scale) against each threshold.
+        That expression is non-decreasing in x, so every split is equivalent
+        to x <= t for the largest float64 t that still goes left; t is found
+        by bisecting over the ordered float64 bit patterns, which makes the
+        folded forest agree with scaler + forest on every finite input.
+        """
+        if self.scaler_folded:
+            raise ValueError("Scaler is already folded into this forest")
+
+        mean = np.asarray(mean, dtype=np.float64)[self.feature]
+        scale = np.asarray(scale, dtype=np.float64)[self.feature]
+        threshold = self.threshold
+
+        def goes_left(keys):
+            raw = _keys_to_floats(keys)
+            with np.errstate(over='ignore', invalid='ignore'):
+                return ((raw - mean) / scale).astype(np.float32) <= threshold
+
+        largest = np.finfo(np.float64).max
+        lo = np.full(threshold.shape, _floats_to_keys(np.array(-largest)))
+        hi = np.full(threshold.shape, _floats_to_keys(np.array(largest)))
+        all_left = goes_left(hi)
+        none_left = ~goes_left(lo)
+
+        # Invariant: lo goes left, hi goes right
+        active = ~(all_left | none_left)
+        while active.any():
+            gap = (hi - lo).view(np.uint64)
+            active &= gap > 1
+            mid = lo + (gap // 2).astype(np.int64)
+            left = goes_left(mid)
+            lo = np.where(active & left, mid, lo)
+            hi = np.where(active & ~left, mid, hi)
+
+        raw_threshold = _keys_to_floats(lo)
+        raw_threshold[all_left] = np.inf
+        raw_threshold[none_left] = -np.inf
+
+        return CompiledForest(self.feature, raw_threshold, self.missing_left,
+                              self.value, self.classes, scaler_folded=True)
+
+    def predict_proba(self, X):
+        """Average class probabilities over all trees for a 2D batch"""
+        # sklearn evaluates splits on float32 inputs against float64 thresholds;
+        # folded thresholds are exact for the raw float64 values instead
+        X = np.ascontiguousarray(X, dtype=np.float64 if self.scaler_folded else np.float32)
+        # sklearn rejects infinite inputs (NaN follows the learned missing-value side)
+        if np.isinf(X).any():
+            raise ValueError("Input X contains infinity or a value too large for dtype('float32').")
+        proba = np.empty((X.shape[0], self.n_classes), dtype=np.float64)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            stop = start + CHUNK_ROWS
+            proba[start:stop] = self._predict_chunk(X[start:stop])
+        return proba
+
+    def _predict_chunk(self, X):
+        n_rows, n_features = X.shape
+        # Widening float32 -> float64 is exact and keeps the comparisons single-typed
+        flat_X = X.astype(np.float64, copy=False).ravel()
+        row_offsets = np.arange(0, n_rows * n_features, n_features)
+        has_nan = np.isnan(flat_X).any()
+
+        # Node index within the current level, one per (tree, row)
+        nodes = np.repeat(np.arange(self.n_trees)[:, np.newaxis], n_rows, axis=1)
+        cells = np.empty_like(nodes)
+        x = np.empty(nodes.shape)
+        threshold_x = np.empty(nodes.shape)
+        go_right = np.empty(nodes.shape, dtype=bool)
+
+        # mode='clip' lets take() write into the buffers without a bounds-check copy
+        for feature, threshold, missing_left in self.levels:
+            np.take(feature, nodes, out=cells, mode='clip')
+            cells += row_offsets
+            np.take(flat_X, cells, out=x, mode='clip')
+            np.take(threshold, nodes, out=threshold_x, mode='clip')
+            np.greater(x, threshold_x, out=go_right)
+            if has_nan:
+                # NaN compares False (left); send it where the split's missing values went
+                go_right |= np.isnan(x) & ~np.take(missing_left, nodes)
+            nodes <<= 1
+            nodes += go_right
+
+        # Sum trees strictly in order, as RandomForestClassifier accumulates them
+        leaf_proba = np.take(self.value, nodes, axis=0)
+        proba = leaf_proba[0].copy()
+        for tree_proba in leaf_proba[1:]:
+            proba += tree_proba
+        proba /= self.n_trees
+        return proba
+
+    def save(self, dirpath):
+        """Save each array as an uncompressed .npy file so it can be memory-mapped"""
+        os.makedirs(dirpath, exist_ok=True)
+        for name in self.ARRAY_NAMES:
+            np.save(os.path.join(dirpath, f'{name}.npy'), np.asarray(getattr(self, name)))
+
+    @classmethod
+    def load(cls, dirpath, mmap_mode=None):
+        """Load a forest written by save(), optionally memory-mapping its arrays"""
+        arrays = {}
+        for name in cls.ARRAY_NAMES:
+            array_file = os.path.join(dirpath, f'{name}.npy')
+            if os.path.exists(array_file):
+                # np.asarray drops the memmap subclass but keeps the shared mapping
+                arrays[name] = np.asarray(np.load(array_file, mmap_mode=mmap_mode,
+                                                  allow_pickle=False))
+        return cls(**arrays)
+
+_SIGN_BIT = np.int64(-2**63)
+
+def _floats_to_keys(values):
+    """Map float64 values to int64 keys with the same ordering"""
+    bits = np.asarray(values, dtype=np.float64).view(np.int64)
+    return np.where(bits < 0, -(bits & ~_SIGN_BIT), bits)
+
+def _keys_to_floats(keys):
+    """Inverse of _floats_to_keys"""
+    bits = np.where(keys < 0, (-keys) | _SIGN_BIT, keys)
+    return bits.view(np.float64)
@@ -14,6 +14,8 @@ import requests
 import logging
 import os
 
+from sensor_storage import read_sensor_data
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -276,14 +278,21 @@ class DataIngestionService:
         if self.mqtt_client:
             self.mqtt_client.publish_sensor_data(sensor_data['zone_id'], sensor_data)
     
-    def load_historical_data(self, csv_file=None):
-        """Load and replay historical sensor data"""
+    def load_historical_data(self, csv_file=None, zone_id=None, date=None):
+        """Load and replay historical sensor data
+        
+        csv_file may also be a Parquet dataset; zone_id and date replay
+        only those zones and days ('YYYY-MM-DD').
+        """
         if csv_file is None:
             csv_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
                                   'sample-data', 'demo_sensor.csv')
         
         try:
-            df = pd.read_csv(csv_file)
+            df = read_sensor_data(csv_file, zone_id=zone_id, date=date)
+            if pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+                # Parquet keeps real timestamps; send them as the CSV text
+                df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
             logger.info(f"Loaded {len(df)} historical records")
             
             # Group by timestamp and send in batches
@@ -312,6 +321,12 @@ def main():
                        help='Enable MQTT publishing')
     parser.add_argument('--api-url', default='http://localhost:5000',
                        help='API base URL')
+    parser.add_argument('--data-file', default=None,
+                       help='Historical CSV file or Parquet dataset')
+    parser.add_argument('--zone', default=None,
+                       help='Replay only this zone')
+    parser.add_argument('--date', default=None,
+                       help='Replay only this day (YYYY-MM-DD)')
     
     args = parser.parse_args()
     
@@ -322,7 +337,7 @@ def main():
         if args.mode == 'simulate':
             service.start_simulation(duration_minutes=args.duration)
         elif args.mode == 'historical':
-            service.load_historical_data()
+            service.load_historical_data(args.data_file, zone_id=args.zone, date=args.date)
     except KeyboardInterrupt:
         logger.info("Service interrupted")
     finally:
@@ -0,0 +1,131 @@
+"""
+Live Feature State for Rockfall Risk Prediction System
+Per-zone (and per-sensor) ring buffers of recent readings, so single live
+readings get the rates and moving averages DataProcessor.engineer_features
+computes in batch, without rereading any history
+"""
+
+import math
+import threading
+from collections import OrderedDict, deque
+
+# Readings kept per sensor: the 3-point moving average needs the two before the current one
+MOVING_AVERAGE_WINDOW = 3
+
+# Reading fields the history tracks, and the features derived from them
+TRACKED_FIELDS = ('displacement_mm', 'vibration_mm_s', 'temperature_c')
+LIVE_FEATURE_COLUMNS = (
+    'displacement_rate', 'vibration_rate', 'temperature_rate',
+    'displacement_ma', 'vibration_ma',
+    'acceleration_magnitude', 'gravity_deviation'
+)
+
+# Derived features the model takes as input
+MODEL_RATE_COLUMNS = ('displacement_rate', 'vibration_rate')
+
+class LiveFeatureState:
+    """Size-bounded LRU of per-sensor reading histories
+
+    Each (zone_id, sensor_id) key keeps a ring of its last
+    MOVING_AVERAGE_WINDOW - 1 readings, so every update is O(1): the rate
+    is the difference to the newest buffered reading (0 for a sensor's first
+    reading, as the batch fillna(0)) and the moving average covers the
+    buffer plus the current reading (min_periods=1). Readings are taken in
+    arrival order; the batch pipeline sorts by timestamp instead.
+    """
+
+    def __init__(self, max_keys=100000, window=MOVING_AVERAGE_WINDOW):
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.max_keys = max_keys
+        self.window = window
+        self._histories = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.updates = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._histories)
+
+    def update(self, zone_id, reading, sensor_id=None):
+        """Derived features of a reading dict, recording it in its sensor's history
+
+        Readings with a missing or non-finite tracked field, or with an
+        unhashable zone or sensor id, are not recorded and get None, since
+        the batch pipeline would have filled or rejected them first.
+        """
+        try:
+            current = tuple(float(reading[field]) for field in TRACKED_FIELDS)
+            ax = float(reading['accelerometer_x'])
+            ay = float(reading['accelerometer_y'])
+            az = float(reading['accelerometer_z'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not all(math.isfinite(value) for value in current):
+            return None
+
+        key = (zone_id, sensor_id)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        with self._lock:
+            history = self._histories.get(key)
+            if history is None:
+                history = self._histories[key] = deque(maxlen=self.window - 1)
+                if len(self._histories) > self.max_keys:
+                    self._histories.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._histories.move_to_end(key)
+            previous = history[-1] if history else current
+            displacement_sum = current[0] + sum(past[0] for past in history)
+            vibration_sum = current[1] + sum(past[1] for past in history)
+            count = len(history) + 1
+            history.append(current)
+            self.updates += 1
+
+        acceleration = math.sqrt(ax * ax + ay * ay + az * az)
+        return {
+            'displacement_rate': current[0] - previous[0],
+            'vibration_rate': current[1] - previous[1],
+            'temperature_rate': current[2] - previous[2],
+            'displacement_ma': displacement_sum / count,
+            'vibration_ma': vibration_sum / count,
+            'acceleration_magnitude': acceleration,
+            'gravity_deviation': abs(acceleration - 9.8)
+        }
+
+    def update_columns(self, zone_ids, columns, sensor_ids=None):
+        """update() for each row of coerced float64 columns, in row order
+
+        Returns {feature: list} with None for rows that were not recorded.
+        """
+        features = {name: [None] * len(zone_ids) for name in LIVE_FEATURE_COLUMNS}
+        if sensor_ids is None:
+            sensor_ids = [None] * len(zone_ids)
+        fields = TRACKED_FIELDS + ('accelerometer_x', 'accelerometer_y', 'accelerometer_z')
+        if any(field not in columns for field in fields):
+            return features
+        for row, (zone_id, sensor_id) in enumerate(zip(zone_ids, sensor_ids)):
+            derived = self.update(zone_id, {field: columns[field][row] for field in fields}, sensor_id)
+            if derived is not None:
+                for name, value in derived.items():
+                    features[name][row] = value
+        return features
+
+    def clear(self):
+        with self._lock:
+            self._histories.clear()
+
+    def stats(self):
+        """Tracked sensors and update/eviction counters"""
+        return {
+            'sensors': len(self._histories),
+            'max_keys': self.max_keys,
+            'updates': self.updates,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,221 @@
+"""
+Loaded Inference Model for Rockfall Risk Prediction System
+Bundles everything one trained model needs to score readings, so the API
+can replace a model by swapping a single reference
+"""
+
+import numpy as np
+import joblib
+import os
+import math
+import time
+import threading
+import logging
+
+from compiled_forest import CompiledForest
+from model_artifact import ModelArtifact, artifact_path_for, artifact_is_current
+from metrics import stage_timer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Raw sensor columns the training script uses, in model order; binary
+# requests use this layout when no model is loaded
+SENSOR_FEATURE_COLUMNS = [
+    'displacement_mm', 'vibration_mm_s', 'temperature_c',
+    'humidity_percent', 'pressure_kpa', 'accelerometer_x',
+    'accelerometer_y', 'accelerometer_z'
+]
+
+# Engineered features appended to the raw sensor columns, in model order
+DERIVED_FEATURE_COLUMNS = [
+    'displacement_rate', 'vibration_rate',
+    'acceleration_magnitude', 'zone_encoded'
+]
+
+# Inference engines accepted by RockfallAPI
+INFERENCE_ENGINES = ('auto', 'compiled', 'sklearn')
+
+class InferenceModel:
+    """A fully loaded model; never modified after construction
+
+    Requests take one reference to the active InferenceModel and use it for
+    the whole prediction, so replacing the API's reference can never mix
+    arrays from two different models.
+    """
+
+    def __init__(self, feature_columns, zone_classes, risk_classes, scaler_mean,
+                 scaler_scale, model=None, scaler=None, forest=None, source=None):
+        self.model = model
+        self.scaler = scaler
+        self.forest = forest
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        self.feature_columns = list(feature_columns)
+        self.zone_codes = {zone_id: code for code, zone_id in enumerate(zone_classes)}
+        self.risk_classes = list(risk_classes)
+        self.source = source
+        self.loaded_at = time.time()
+
+        # Resolve feature positions once so single readings skip pandas entirely
+        self.n_features = len(self.feature_columns) + len(DERIVED_FEATURE_COLUMNS)
+        self._raw_feature_slots = list(enumerate(self.feature_columns))
+        self._derived_slot = len(self.feature_columns)
+        self._row_buffers = threading.local()
+
+    @classmethod
+    def load(cls, model_path, engine='auto'):
+        """Load the model stored at model_path, or None when there is none
+
+        'auto' and 'compiled' prefer the memory-mapped model artifact, which
+        needs no unpickling and whose arrays are shared between worker
+        processes through the page cache. Without an up-to-date artifact the
+        pickle is loaded; 'compiled' then compiles its forest in memory.
+        'sklearn' always evaluates the pickled RandomForest itself.
+        """
+        artifact_path = artifact_path_for(model_path)
+        if engine != 'sklearn' and artifact_is_current(artifact_path, model_path):
+            return cls.from_artifact(ModelArtifact.load(artifact_path), source=artifact_path)
+        if os.path.exists(model_path):
+            return cls.from_model_data(joblib.load(model_path), compile_forest=engine == 'compiled',
+                                       source=model_path)
+        return None
+
+    @classmethod
+    def from_artifact(cls, artifact, source=None):
+        """Use a model artifact for inference"""
+        return cls(
+            feature_columns=artifact.feature_columns,
+            zone_classes=artifact.zone_classes,
+            risk_classes=artifact.risk_classes,
+            scaler_mean=artifact.scaler_mean,
+            scaler_scale=artifact.scaler_scale,
+            forest=artifact.forest,
+            source=source
+        )
+
+    @classmethod
+    def from_model_data(cls, model_data, compile_forest=False, source=None):
+        """Use the pickled model dict (model, scaler, label_encoder, ...) for inference"""
+        model = model_data['model']
+        scaler = model_data['scaler']
+        return cls(
+            feature_columns=model_data['feature_columns'],
+            zone_classes=model_data['label_encoder'].classes_,
+            risk_classes=[str(label) for label in model.classes_],
+            scaler_mean=scaler.mean_,
+            scaler_scale=scaler.scale_,
+            model=model,
+            scaler=scaler,
+            forest=CompiledForest.from_sklearn(model) if compile_forest else None,
+            source=source
+        )
+
+    @property
+    def inference_engine(self):
+        """Name of the engine evaluating the forest"""
+        return 'compiled' if self.forest is not None else 'sklearn'
+
+    def warm(self):
+        """Fault in the mapped arrays and run one prediction before serving"""
+        if self.forest is not None:
+            for name in ('feature', 'threshold', 'missing_left', 'value'):
+                np.asarray(getattr(self.forest, name)).sum()
+        self.predict_proba(np.zeros((1, self.n_features)))
+
+    def zone_code(self, zone_id):
+        """Encoded zone; unknown, non-string and unhashable ids get the default code 0"""
+        return self.zone_codes.get(zone_id, 0) if isinstance(zone_id, str) else 0
+
+    def predict_proba(self, X):
+        """Class probabilities for raw features
+
+        A scaler-folded forest takes raw features directly; every other
+        engine standardizes them first.
+        """
+        if self.forest is None or not self.forest.scaler_folded:
+            with stage_timer.span('scale_features'):
+                X = self.scale_features(X)
+        with stage_timer.span('model_predict'):
+            if self.forest is not None:
+                return self.forest.predict_proba(X)
+            return self.model.predict_proba(X)
+
+    def scale_features(self, X):
+        """Standardize a feature matrix (same arithmetic as StandardScaler.transform,
+        without the per-call DataFrame feature-name validation)"""
+        return (X - self.scaler_mean) / self.scaler_scale
+
+    def build_feature_row(self, sensor_data):
+        """Map a reading dict straight into a (1, n_features) float64 row
+
+        The row is a per-thread preallocated buffer, so callers must finish
+        with it before building the next one on the same thread.
+        """
+        row = getattr(self._row_buffers, 'row', None)
+        if row is None:
+            row = np.empty((1, self.n_features), dtype=np.float64)
+            self._row_buffers.row = row
+
+        try:
+            values = row[0]
+            for slot, col in self._raw_feature_slots:
+                values[slot] = sensor_data[col]
+
+            ax = float(sensor_data['accelerometer_x'])
+            ay = float(sensor_data['accelerometer_y'])
+            az = float(sensor_data['accelerometer_z'])
+            derived = self._derived_slot
+            # Rates come from LiveFeatureState when enabled; otherwise assume no change
+            values[derived] = sensor_data.get('displacement_rate', 0)
+            values[derived + 1] = sensor_data.get('vibration_rate', 0)
+            values[derived + 2] = math.sqrt(ax * ax + ay * ay + az * az)
+            values[derived + 3] = self.zone_code(sensor_data.get('zone_id'))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Error preparing features: {e}")
+            return None
+
+        return row
+
+    def prepare_features(self, df):
+        """Prepare features for prediction"""
+        try:
+            # Create additional features
+            # Rates supplied by LiveFeatureState are kept; otherwise assume no change
+            for col in ('displacement_rate', 'vibration_rate'):
+                df[col] = df[col].fillna(0) if col in df.columns else 0
+            df['acceleration_magnitude'] = np.sqrt(
+                df['accelerometer_x']**2 +
+                df['accelerometer_y']**2 +
+                df['accelerometer_z']**2
+            )
+
+            # Zone encoding; zones not in the training data use a default value
+            df['zone_encoded'] = [self.zone_code(zone_id) for zone_id in df['zone_id']]
+
+            feature_cols = self.feature_columns + DERIVED_FEATURE_COLUMNS
+
+            return df[feature_cols]
+        except Exception as e:
+            logger.error(f"Error preparing features: {e}")
+            return None
+
+    def prepare_features_batch(self, columns, zone_ids):
+        """Build the model feature matrix from already-coerced sensor columns"""
+        n_rows = len(zone_ids)
+        X = np.empty((n_rows, self.n_features))
+        for i, col in enumerate(self.feature_columns):
+            X[:, i] = columns[col]
+
+        # Rates need per-zone history: given by LiveFeatureState, or 0 (no history)
+        derived = self._derived_slot
+        X[:, derived] = np.nan_to_num(columns['displacement_rate']) if 'displacement_rate' in columns else 0
+        X[:, derived + 1] = np.nan_to_num(columns['vibration_rate']) if 'vibration_rate' in columns else 0
+        X[:, derived + 2] = np.sqrt(
+            columns['accelerometer_x']**2 +
+            columns['accelerometer_y']**2 +
+            columns['accelerometer_z']**2
+        )
+        # Unknown or malformed zones get the same default code as the single-reading path
+        X[:, derived + 3] = [self.zone_code(zone_id) for zone_id in zone_ids]
+        return X
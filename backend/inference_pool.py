@@ -0,0 +1,237 @@
+"""
+Process-Pool Inference for Rockfall Risk Prediction System
+Worker processes that memory-map the model artifact and score feature
+matrices passed through shared memory, so large batches use every core
+instead of queueing behind the GIL
+"""
+
+import numpy as np
+import multiprocessing as mp
+import os
+import queue
+import threading
+import logging
+from multiprocessing import shared_memory
+
+from inference_model import InferenceModel
+from model_artifact import ModelArtifact
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rows each worker scores per round trip; larger batches are split up
+WORKER_CAPACITY_ROWS = 8192
+
+# Upper bound on feature and class columns, so buffers survive a model reload
+MAX_BUFFER_COLUMNS = 64
+
+# Smaller batches are scored in-process; the round trip would cost more
+MIN_POOL_ROWS = 1024
+
+# Longest wait for a worker's reply, or for an idle worker, before giving up on it
+WORKER_TIMEOUT_S = 30.0
+
+def _worker_main(artifact_path, conn, input_name, output_name):
+    """Worker loop: (generation, n_rows, n_features) in, ('ok', n_classes) out"""
+    # Spawned workers share the parent's resource tracker; the parent unlinks
+    input_block = shared_memory.SharedMemory(name=input_name)
+    output_block = shared_memory.SharedMemory(name=output_name)
+    # Map the artifact up front so the first batch does not pay for it
+    model = InferenceModel.from_artifact(ModelArtifact.load(artifact_path), source=artifact_path)
+    loaded_generation = 0
+    try:
+        while True:
+            task = conn.recv()
+            if task is None:
+                return
+            generation, n_rows, n_features = task
+            try:
+                if generation != loaded_generation:
+                    model = InferenceModel.from_artifact(ModelArtifact.load(artifact_path),
+                                                         source=artifact_path)
+                    loaded_generation = generation
+                X = np.ndarray((n_rows, n_features), dtype=np.float64, buffer=input_block.buf)
+                proba = model.predict_proba(X)
+                np.ndarray(proba.shape, dtype=np.float64, buffer=output_block.buf)[...] = proba
+                conn.send(('ok', proba.shape[1]))
+            except Exception as e:
+                conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        input_block.close()
+        output_block.close()
+
+class _Worker:
+    """Parent-side handle: process, pipe and its two shared buffers"""
+
+    def __init__(self, context, artifact_path):
+        size = WORKER_CAPACITY_ROWS * MAX_BUFFER_COLUMNS * np.dtype(np.float64).itemsize
+        self.input_block = shared_memory.SharedMemory(create=True, size=size)
+        self.output_block = shared_memory.SharedMemory(create=True, size=size)
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, name='inference-worker', daemon=True,
+            args=(artifact_path, child_conn, self.input_block.name, self.output_block.name)
+        )
+        self.process.start()
+        child_conn.close()
+
+    def send(self, X, generation):
+        n_rows, n_features = X.shape
+        np.ndarray(X.shape, dtype=np.float64, buffer=self.input_block.buf)[...] = X
+        self.conn.send((generation, n_rows, n_features))
+
+    def receive(self, n_rows, timeout=None):
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Inference worker gave no reply within {timeout} s")
+        status, detail = self.conn.recv()
+        if status != 'ok':
+            raise RuntimeError(f"Inference worker failed: {detail}")
+        return np.ndarray((n_rows, detail), dtype=np.float64, buffer=self.output_block.buf).copy()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self._release()
+
+    def kill(self):
+        """Stop a dead or hung worker without waiting on its pipe"""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(5)
+        self.conn.close()
+        self._release()
+
+    def _release(self):
+        for block in (self.input_block, self.output_block):
+            block.close()
+            block.unlink()
+
+class InferencePool:
+    """Worker processes scoring feature matrices from a model artifact
+
+    Each worker maps the artifact once; the arrays are shared with every
+    other process through the page cache. A batch is split into chunks of
+    at most WORKER_CAPACITY_ROWS rows spread over the workers, copied into the
+    workers' shared input buffers and scored in parallel; only the chunk
+    sizes travel through the pipes. Call reload() after the artifact
+    changes and workers re-map it before their next chunk. A worker that
+    dies or gives no reply within timeout seconds fails its call and is
+    replaced by a fresh one.
+    """
+
+    def __init__(self, artifact_path, workers=None, timeout=WORKER_TIMEOUT_S):
+        if not os.path.exists(artifact_path):
+            raise FileNotFoundError(f"Model artifact not found: {artifact_path}")
+        self.artifact_path = artifact_path
+        self.n_workers = workers or os.cpu_count() or 1
+        self.generation = 0
+        self.timeout = timeout
+        self.respawns = 0
+        # spawn: workers must not inherit the API's threads or locks
+        self._context = mp.get_context('spawn')
+        self._workers = [_Worker(self._context, artifact_path) for _ in range(self.n_workers)]
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._closed = False
+        self._lock = threading.Lock()
+        logger.info(f"Inference pool started: {self.n_workers} workers on {artifact_path}")
+
+    def reload(self):
+        """Have every worker re-map the artifact before its next chunk"""
+        with self._lock:
+            self.generation += 1
+
+    def _replace(self, worker):
+        """Swap a broken worker for a fresh one"""
+        worker.kill()
+        if self._closed:
+            return
+        try:
+            replacement = _Worker(self._context, self.artifact_path)
+        except Exception as e:
+            logger.error(f"Could not replace inference worker: {e}")
+            with self._lock:
+                self._workers.remove(worker)
+            return
+        with self._lock:
+            self._workers[self._workers.index(worker)] = replacement
+            self.respawns += 1
+        logger.warning("Replaced a broken inference worker")
+        self._idle.put(replacement)
+
+    def predict_proba(self, X):
+        """Class probabilities for a raw feature matrix, scored across the workers
+
+        Raises if a worker fails; the caller scores that batch in-process.
+        """
+        if self._closed:
+            raise RuntimeError("Inference pool is closed")
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if len(X) == 0:
+            raise ValueError("Cannot score an empty batch")
+        if X.shape[1] > MAX_BUFFER_COLUMNS:
+            raise ValueError(f"{X.shape[1]} features exceed the pool buffer width")
+        generation = self.generation
+        # Spread the rows over every worker, within each worker's buffer
+        chunk_rows = min(WORKER_CAPACITY_ROWS, -(-len(X) // self.n_workers))
+        starts = range(0, len(X), chunk_rows)
+        results = [None] * len(starts)
+
+        pending = list(enumerate(starts))
+        while pending:
+            # Wait for one worker, then take every other idle one for this round
+            try:
+                workers = [self._idle.get(timeout=self.timeout)]
+            except queue.Empty:
+                raise RuntimeError("No inference worker available")
+            while len(workers) < len(pending):
+                try:
+                    workers.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+
+            round_chunks, pending = pending[:len(workers)], pending[len(workers):]
+            errors = []
+            broken = []
+            try:
+                sent = []
+                for worker, (index, start) in zip(workers, round_chunks):
+                    try:
+                        worker.send(X[start:start + chunk_rows], generation)
+                        sent.append((worker, index, start))
+                    except (OSError, EOFError, ValueError) as e:
+                        broken.append(worker)
+                        errors.append(e)
+                # Collect every reply, even after a failure, to keep the pipes in step
+                for worker, index, start in sent:
+                    try:
+                        results[index] = worker.receive(len(X[start:start + chunk_rows]), self.timeout)
+                    except RuntimeError as e:
+                        errors.append(e)
+                    except (OSError, EOFError) as e:
+                        # Dead or hung: its pipe is out of step, so it can't be reused
+                        broken.append(worker)
+                        errors.append(e)
+            finally:
+                for worker in workers:
+                    if any(worker is dead for dead in broken):
+                        self._replace(worker)
+                    else:
+                        self._idle.put(worker)
+            if errors:
+                raise errors[0]
+
+        return np.concatenate(results)
+
+    def close(self):
+        """Stop the workers and release the shared memory"""
+        self._closed = True
+        for worker in self._workers:
+            worker.close()
+        self._workers = []
@@ -0,0 +1,156 @@
+"""
+Metrics Primitives for Rockfall Risk Prediction System
+Thread-safe cumulative histograms for latency and size distributions,
+per-stage timing spans, and Prometheus text exposition
+"""
+
+import bisect
+import threading
+import time
+
+# Default bucket upper bounds for latencies, in milliseconds
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+class Histogram:
+    """Counts of observations per bucket plus their sum, Prometheus style
+
+    Buckets are upper bounds; an implicit +Inf bucket catches the rest.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self):
+        return self._count
+
+    def snapshot(self):
+        """Cumulative bucket counts keyed by upper bound ('+Inf' last), with sum and count"""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip([f'{b:g}' for b in self.buckets] + ['+Inf'], counts):
+            running += bucket_count
+            cumulative[bound] = running
+        return {'buckets': cumulative, 'sum': total, 'count': count}
+
+    def prometheus_lines(self, name, labels=None, scale=1.0):
+        """Prometheus text lines for this histogram; scale converts the unit (ms -> s)"""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        label_text = ''.join(f'{key}="{value}",' for key, value in (labels or {}).items())
+        lines = []
+        running = 0
+        bounds = [f'{bound * scale:g}' for bound in self.buckets] + ['+Inf']
+        for bound, bucket_count in zip(bounds, counts):
+            running += bucket_count
+            lines.append(f'{name}_bucket{{{label_text}le="{bound}"}} {running}')
+        plain = '{' + label_text.rstrip(',') + '}' if label_text else ''
+        lines.append(f'{name}_sum{plain} {total * scale:.9g}')
+        lines.append(f'{name}_count{plain} {count}')
+        return lines
+
+class _NullSpan:
+    """Shared do-nothing span handed out while timing is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('timer', 'stage', 'start')
+
+    def __init__(self, timer, stage):
+        self.timer = timer
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer.observe(self.stage, (time.perf_counter_ns() - self.start) / 1e6)
+        return False
+
+class StageTimer:
+    """Latency histograms per named pipeline stage
+
+    span(stage) times a with-block on the monotonic clock. While disabled
+    it returns a shared no-op object, so instrumented code costs one
+    attribute check and an empty with-block.
+    """
+
+    def __init__(self, enabled=False, buckets=LATENCY_BUCKETS_MS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def observe(self, stage, elapsed_ms):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, Histogram(self.buckets))
+        histogram.observe(elapsed_ms)
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+# Process-wide stage timings, enabled by the API at startup
+stage_timer = StageTimer()
+
+class PrometheusText:
+    """Builder for the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.lines = []
+
+    def _header(self, name, kind, help_text):
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {kind}')
+
+    def counter(self, name, help_text, value):
+        self._header(name, 'counter', help_text)
+        self.lines.append(f'{name} {value}')
+
+    def gauge(self, name, help_text, value):
+        self._header(name, 'gauge', help_text)
+        self.lines.append(f'{name} {"NaN" if value is None else f"{value:.9g}"}')
+
+    def histograms(self, name, help_text, histograms, label=None, scale=1.0):
+        """One histogram family; histograms maps label value -> Histogram (or None -> unlabelled)"""
+        self._header(name, 'histogram', help_text)
+        for label_value, histogram in sorted(histograms.items(), key=lambda item: str(item[0])):
+            labels = {label: label_value} if label is not None else None
+            self.lines.extend(histogram.prometheus_lines(name, labels, scale))
+
+    def render(self):
+        return '\n'.join(self.lines) + '\n'
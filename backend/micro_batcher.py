@@ -0,0 +1,165 @@
+"""
+Micro-Batching for Rockfall Risk Prediction System
+Coalesces concurrent single-reading predictions into one batched forest
+evaluation
+"""
+
+import queue
+import threading
+import time
+import logging
+
+from metrics import Histogram
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Batch size histogram buckets (powers of two up to the default max batch)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+class _Pending:
+    """One submitted reading waiting for its batch"""
+
+    __slots__ = ('reading', 'enqueued', 'done', 'result', 'error')
+
+    def __init__(self, reading):
+        self.reading = reading
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class MicroBatcher:
+    """Collects readings submitted by request threads and scores them together
+
+    A single worker thread takes the first waiting reading, keeps
+    collecting until max_batch readings are queued or max_wait_ms has
+    passed since that first reading arrived, then runs predict_batch once
+    and hands each result back to its waiting request. While a batch is
+    being scored, new requests queue up for the next one, so under load
+    batches grow without waiting for the timer.
+    """
+
+    def __init__(self, predict_batch, max_wait_ms=2.0, max_batch=256):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.predict_batch = predict_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        # Guards the stop sentinel, so no reading is queued behind it
+        self._lock = threading.Lock()
+        self._stopping = False
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram()
+        self.failures = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+            self._thread.start()
+            logger.info(f"Micro-batching /predict: up to {self.max_batch} readings "
+                        f"or {self.max_wait * 1000:g} ms")
+        return self
+
+    def stop(self, timeout=None):
+        """Finish the queued readings, then stop the worker
+
+        Readings still queued once the worker has exited are failed, so no
+        submitter is left waiting.
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            if not self._stopping:
+                self._stopping = True
+                self._queue.put(None)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning("Micro-batcher still scoring after stop timeout")
+            return
+        self._thread = None
+        self._fail_queued(RuntimeError("Micro-batcher stopped"))
+
+    def _fail_queued(self, error):
+        while True:
+            try:
+                pending = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if pending is not None:
+                pending.error = error
+                pending.done.set()
+
+    def submit(self, reading):
+        """Score one reading as part of the next batch; blocks until it is done
+
+        Raises RuntimeError once the batcher is stopping or stopped.
+        """
+        pending = _Pending(reading)
+        with self._lock:
+            if self._stopping or not self.running:
+                raise RuntimeError("Micro-batcher is not running")
+            self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = first.enqueued + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Stop after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = self._collect(first)
+            started = time.perf_counter()
+            for pending in batch:
+                self.queue_wait_ms.observe((started - pending.enqueued) * 1000)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                results = self.predict_batch([pending.reading for pending in batch])
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Error in micro-batch of {len(batch)}: {e}")
+                for pending in batch:
+                    pending.error = e
+            for pending in batch:
+                pending.done.set()
+
+    def metrics(self):
+        """Batch size distribution and queueing latency"""
+        return {
+            'max_wait_ms': self.max_wait * 1000,
+            'max_batch': self.max_batch,
+            'batch_size': self.batch_sizes.snapshot(),
+            'queue_wait_ms': self.queue_wait_ms.snapshot(),
+            'failures': self.failures
+        }
@@ -0,0 +1,126 @@
+"""
+Model Artifact Format for Rockfall Risk Prediction System
+Stores the trained model as uncompressed arrays that worker processes
+memory-map instead of unpickling, so they share pages via the OS page cache
+"""
+
+import numpy as np
+import json
+import os
+import shutil
+import logging
+
+from compiled_forest import CompiledForest
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ARTIFACT_VERSION = 1
+META_FILE = 'meta.json'
+
+class ModelArtifact:
+    """Everything the API needs for inference, without any sklearn objects"""
+
+    def __init__(self, forest, scaler_mean, scaler_scale, feature_columns,
+                 zone_classes, risk_classes):
+        self.forest = forest
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        self.feature_columns = feature_columns
+        self.zone_classes = zone_classes
+        self.risk_classes = risk_classes
+
+    @classmethod
+    def from_model_data(cls, model_data, fold_scaler=False):
+        """Build an artifact from the pickled model dict (model, scaler, ...)"""
+        scaler = model_data['scaler']
+        forest = CompiledForest.from_sklearn(model_data['model'])
+        if fold_scaler:
+            forest = forest.fold_scaler(scaler.mean_, scaler.scale_)
+
+        return cls(
+            forest=forest,
+            scaler_mean=np.asarray(scaler.mean_, dtype=np.float64),
+            scaler_scale=np.asarray(scaler.scale_, dtype=np.float64),
+            feature_columns=list(model_data['feature_columns']),
+            zone_classes=[_plain(zone) for zone in model_data['label_encoder'].classes_],
+            risk_classes=[str(label) for label in model_data['model'].classes_]
+        )
+
+    def save(self, path):
+        """Write the artifact directory, replacing any previous one in a single rename"""
+        staging = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        self.forest.save(os.path.join(staging, 'forest'))
+        np.save(os.path.join(staging, 'scaler_mean.npy'), self.scaler_mean)
+        np.save(os.path.join(staging, 'scaler_scale.npy'), self.scaler_scale)
+        with open(os.path.join(staging, META_FILE), 'w') as f:
+            json.dump({
+                'format_version': ARTIFACT_VERSION,
+                'feature_columns': self.feature_columns,
+                'zone_classes': self.zone_classes,
+                'risk_classes': self.risk_classes
+            }, f, indent=2)
+
+        # Readers that already mapped the old arrays keep them until they let go
+        retired = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.rename(path, retired)
+        os.rename(staging, path)
+        shutil.rmtree(retired, ignore_errors=True)
+        logger.info(f"Model artifact saved to {path}")
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Open an artifact; large arrays are memory-mapped, not read"""
+        with open(os.path.join(path, META_FILE), 'r') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported model artifact version: {meta.get('format_version')}")
+
+        return cls(
+            forest=CompiledForest.load(os.path.join(path, 'forest'), mmap_mode=mmap_mode),
+            scaler_mean=np.load(os.path.join(path, 'scaler_mean.npy')),
+            scaler_scale=np.load(os.path.join(path, 'scaler_scale.npy')),
+            feature_columns=meta['feature_columns'],
+            zone_classes=meta['zone_classes'],
+            risk_classes=meta['risk_classes']
+        )
+
+def _plain(value):
+    """Convert numpy scalars to JSON-serializable Python values"""
+    return value.item() if isinstance(value, np.generic) else value
+
+def artifact_path_for(model_path):
+    """Location of the artifact directory stored next to a pickled model"""
+    return os.path.splitext(model_path)[0] + '_artifact'
+
+def artifact_is_current(artifact_path, model_path):
+    """True when the artifact exists and is not older than the pickle"""
+    meta_file = os.path.join(artifact_path, META_FILE)
+    if not os.path.exists(meta_file):
+        return False
+    if not os.path.exists(model_path):
+        return True
+    return os.path.getmtime(meta_file) >= os.path.getmtime(model_path)
+
+def main():
+    """Export the artifact for an existing pickled model"""
+    import argparse
+    import joblib
+
+    parser = argparse.ArgumentParser(description='Export a trained rockfall model artifact')
+    parser.add_argument('--model', default=os.path.join(os.path.dirname(__file__), 'ml_model.pkl'),
+                        help='Pickled model file')
+    parser.add_argument('--fold-scaler', action='store_true',
+                        help='Express thresholds in raw units so inference skips the scaler')
+
+    args = parser.parse_args()
+
+    artifact = ModelArtifact.from_model_data(joblib.load(args.model), fold_scaler=args.fold_scaler)
+    artifact.save(artifact_path_for(args.model))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Hot Model Reloading for Rockfall Risk Prediction System
+Watches the trained model files and has the API swap in a new model
+without restarting or pausing request handling
+"""
+
+import hashlib
+import os
+import threading
+import logging
+
+from model_artifact import META_FILE, artifact_path_for
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def model_files(model_path):
+    """Files whose contents define the served model"""
+    artifact_path = artifact_path_for(model_path)
+    files = [model_path, os.path.join(artifact_path, META_FILE)]
+    for root, _, names in os.walk(artifact_path):
+        files.extend(os.path.join(root, name) for name in sorted(names)
+                     if name.endswith('.npy'))
+    return files
+
+def model_signature(model_path):
+    """Cheap change marker: (mtime, size) of the pickle and the artifact metadata"""
+    signature = []
+    for path in (model_path, os.path.join(artifact_path_for(model_path), META_FILE)):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def model_digest(model_path):
+    """Content hash of every model file, used to ignore touched-but-unchanged files"""
+    digest = hashlib.sha256()
+    for path in model_files(model_path):
+        if not os.path.exists(path):
+            continue
+        digest.update(os.path.relpath(path, os.path.dirname(model_path)).encode())
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+class ModelWatcher:
+    """Background thread that reloads the API's model when its files change
+
+    Polling only stats two files; the content hash is computed only after a
+    change is seen, so a retrain that rewrites identical bytes (or a plain
+    touch) does not trigger a reload. Loading and warming happen on this
+    thread, never on a request thread.
+    """
+
+    def __init__(self, api, interval=2.0):
+        self.api = api
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.signature = None
+        self.digest = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start watching; the current files are taken as already loaded"""
+        if self.running:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {self.api.model_path} for model updates every {self.interval}s")
+        return self
+
+    def stop(self, timeout=None):
+        """Stop watching and wait for an in-progress reload to finish"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        self.signature = model_signature(self.api.model_path)
+        self.digest = model_digest(self.api.model_path)
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error checking for model updates: {e}")
+
+    def check(self):
+        """Reload when the model files changed since the last check; True if reloaded"""
+        signature = model_signature(self.api.model_path)
+        if signature == self.signature:
+            return False
+
+        # Writers may still be renaming files; wait until two polls agree
+        if self._stop.wait(min(self.interval, 0.2)) or model_signature(self.api.model_path) != signature:
+            return False
+
+        digest = model_digest(self.api.model_path)
+        if digest == self.digest:
+            self.signature = signature
+            return False
+
+        # A failed reload (say, a half-written pickle) keeps the old signature,
+        # so the next check tries again
+        if self.api.reload_model():
+            self.signature = signature
+            self.digest = digest
+            return True
+        return False
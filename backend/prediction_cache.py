@@ -0,0 +1,137 @@
+"""
+Prediction Cache for Rockfall Risk Prediction System
+Reuses recent predictions for readings that only differ below the sensors'
+resolution, instead of evaluating the forest again
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+from feature_state import MODEL_RATE_COLUMNS
+
+# Reporting resolution of each sensor; readings closer than this share a prediction
+DEFAULT_RESOLUTIONS = {
+    'displacement_mm': 0.01,
+    'vibration_mm_s': 0.01,
+    'temperature_c': 0.1,
+    'humidity_percent': 0.1,
+    'pressure_kpa': 0.01,
+    'accelerometer_x': 0.001,
+    'accelerometer_y': 0.001,
+    'accelerometer_z': 0.001,
+    'displacement_rate': 0.01,
+    'vibration_rate': 0.01
+}
+
+class PredictionCache:
+    """Size-bounded LRU of predictions keyed on zone_id and quantized readings
+
+    Each feature is rounded to a multiple of its resolution (columns without
+    one are compared exactly), so a sensor repeating the same values every
+    tick hits the cache. Live rates (see LiveFeatureState) are part of the
+    key, a missing rate counting as 0. Entries belong to one model and one zone index:
+    binding a different one empties the cache, so a reload or a changed
+    zones.json never serves a stale prediction.
+    """
+
+    def __init__(self, max_entries=10000, resolutions=None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.resolutions = dict(DEFAULT_RESOLUTIONS if resolutions is None else resolutions)
+        for col, resolution in self.resolutions.items():
+            if not resolution > 0:
+                raise ValueError(f"Resolution for {col} must be positive")
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model = None
+        self._zones = None
+        self._slots = ()
+        self._rate_slots = ()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _bind(self, model, zones):
+        with self._lock:
+            if model is self._model and zones is self._zones:
+                return
+            if self._model is not None:
+                self.invalidations += 1
+            self._entries.clear()
+            self._model = model
+            self._zones = zones
+            self._slots = tuple((col, self.resolutions.get(col)) for col in model.feature_columns)
+            self._rate_slots = tuple((col, self.resolutions.get(col)) for col in MODEL_RATE_COLUMNS)
+
+    def key(self, model, zones, sensor_data):
+        """Cache key of a reading for this model and zone index, or None if it can't be cached
+
+        Non-numeric and non-finite readings are never cached.
+        """
+        if model is not self._model or zones is not self._zones:
+            self._bind(model, zones)
+        try:
+            zone_id = sensor_data.get('zone_id')
+            hash(zone_id)
+            values = []
+            for col, resolution in self._slots:
+                value = float(sensor_data[col])
+                if resolution is not None:
+                    value = round(value / resolution)
+                elif not math.isfinite(value):
+                    return None
+                values.append(value)
+            for col, resolution in self._rate_slots:
+                value = float(sensor_data.get(col, 0))
+                if resolution is not None:
+                    value = round(value / resolution)
+                elif not math.isfinite(value):
+                    return None
+                values.append(value)
+        except (KeyError, TypeError, ValueError, OverflowError):
+            return None
+        return (zone_id, tuple(values))
+
+    def get(self, key):
+        """Cached prediction for key (a fresh copy), or None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return {**result, 'risk_probabilities': dict(result['risk_probabilities'])}
+
+    def put(self, model, zones, key, result):
+        """Store a prediction made with model, unless the cache has moved on to another one"""
+        with self._lock:
+            if model is not self._model or zones is not self._zones:
+                return
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Size, hit/miss counters and hit rate"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'invalidations': self.invalidations
+        }
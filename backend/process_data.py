@@ -9,10 +9,46 @@ import json
 import os
 from datetime import datetime, timedelta
 import logging
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from zone_stream import RunningZoneStats, ExactMedians, FileStatistics, SummaryAccumulator, JsonArrayWriter
+from sensor_storage import read_sensor_data, iter_sensor_data, write_sensor_data, output_path_for
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _json_default(value):
+    """JSON fallback for the timestamps and NumPy scalars in anomaly records"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Sensor readings whose missing values clean_sensor_data fills
+NUMERIC_COLUMNS = [
+    'displacement_mm', 'vibration_mm_s', 'temperature_c',
+    'humidity_percent', 'pressure_kpa', 'accelerometer_x',
+    'accelerometer_y', 'accelerometer_z'
+]
+
+# Features min-max normalized per zone by calculate_risk_scores
+NORMALIZED_FEATURES = [
+    'displacement_mm', 'vibration_mm_s', 'displacement_rate',
+    'vibration_rate', 'gravity_deviation', 'weather_index'
+]
+
+# Columns checked by detect_anomalies: 3-sigma outliers and rate spikes
+STATISTICAL_COLUMNS = ['displacement_mm', 'vibration_mm_s']
+RATE_COLUMNS = ['displacement_rate', 'vibration_rate']
+
+def _process_zone_partition(processor, partition, fill_values):
+    """Pool task: the in-memory pipeline for the rows of a few zones"""
+    df = processor.clean_sensor_data(partition, fill_values)
+    df = processor.engineer_features(df)
+    df = processor.calculate_risk_scores(df)
+    return df, processor.detect_anomalies(df), processor.generate_summary_report(df)
+
 class DataProcessor:
     """Main class for processing sensor data"""
     
@@ -28,24 +64,23 @@ class DataProcessor:
         for zone in self.zones_data['zones']:
             self.zone_thresholds[zone['zone_id']] = zone['risk_thresholds']
     
-    def clean_sensor_data(self, df):
-        """Clean and validate sensor data"""
+    def clean_sensor_data(self, df, fill_values=None):
+        """Clean and validate sensor data
+        
+        fill_values maps a column to the value its missing readings get;
+        by default each column's median in df is used.
+        """
         logger.info(f"Cleaning {len(df)} sensor records")
         
         # Remove duplicates
         df = df.drop_duplicates()
         
         # Handle missing values
-        numeric_columns = [
-            'displacement_mm', 'vibration_mm_s', 'temperature_c', 
-            'humidity_percent', 'pressure_kpa', 'accelerometer_x',
-            'accelerometer_y', 'accelerometer_z'
-        ]
-        
-        for col in numeric_columns:
+        for col in NUMERIC_COLUMNS:
             if col in df.columns:
                 # Fill missing with median
-                df[col] = df[col].fillna(df[col].median())
+                fill = df[col].median() if fill_values is None else fill_values[col]
+                df[col] = df[col].fillna(fill)
                 
                 # Remove obvious outliers (beyond reasonable sensor ranges)
                 if col == 'temperature_c':
@@ -122,16 +157,35 @@ class DataProcessor:
         df['zone_stability'] = df['zone_id'].map(zone_stability).fillna(0.5)
         
         # Risk indicators
-        df['displacement_risk_flag'] = df.apply(
-            lambda row: self._check_threshold(row, 'displacement_mm', 'displacement'), axis=1
-        )
-        df['vibration_risk_flag'] = df.apply(
-            lambda row: self._check_threshold(row, 'vibration_mm_s', 'vibration'), axis=1
-        )
+        df['displacement_risk_flag'] = self._threshold_flags(df, 'displacement_mm', 'displacement')
+        df['vibration_risk_flag'] = self._threshold_flags(df, 'vibration_mm_s', 'vibration')
         
         logger.info(f"Feature engineering complete. Shape: {df.shape}")
         return df
     
+    def _threshold_columns(self, zone_ids, threshold_type):
+        """Warning and critical thresholds joined onto each row's zone_id
+        
+        Thresholds missing from a zone are infinite; rows of unknown zones
+        get NaN, which never compares as exceeded.
+        """
+        keys = [f"{threshold_type}_warning", f"{threshold_type}_critical"]
+        table = np.full((len(self.zone_thresholds) + 1, 2), np.nan)
+        for row, thresholds in enumerate(self.zone_thresholds.values()):
+            table[row] = [thresholds.get(key, float('inf')) for key in keys]
+        
+        # get_indexer gives -1 for unknown zones, which selects the NaN row
+        rows = pd.Index(list(self.zone_thresholds)).get_indexer(zone_ids)
+        joined = table[rows]
+        return joined[:, 0], joined[:, 1]
+    
+    def _threshold_flags(self, df, column, threshold_type):
+        """_check_threshold for every row at once: 2 critical, 1 warning, 0 normal"""
+        warning, critical = self._threshold_columns(df['zone_id'], threshold_type)
+        values = df[column].to_numpy()
+        flags = np.select([values >= critical, values >= warning], [2, 1], default=0)
+        return pd.Series(flags, index=df.index, dtype=np.int64)
+    
     def _check_threshold(self, row, column, threshold_type):
         """Check if value exceeds zone threshold"""
         zone_id = row['zone_id']
@@ -151,22 +205,20 @@ class DataProcessor:
         else:
             return 0  # Normal
     
-    def calculate_risk_scores(self, df):
-        """Calculate comprehensive risk scores"""
-        logger.info("Calculating risk scores...")
+    def calculate_risk_scores(self, df, zone_stats=None):
+        """Calculate comprehensive risk scores
         
-        # Normalize features to 0-1 scale for scoring
-        features_to_normalize = [
-            'displacement_mm', 'vibration_mm_s', 'displacement_rate', 
-            'vibration_rate', 'gravity_deviation', 'weather_index'
-        ]
+        zone_stats (zone_min_max layout) supplies the per-zone ranges to
+        normalize against; by default they come from df itself.
+        """
+        logger.info("Calculating risk scores...")
         
-        for feature in features_to_normalize:
-            if feature in df.columns:
-                # Min-max normalization per zone
-                df[f'{feature}_norm'] = df.groupby('zone_id')[feature].transform(
-                    lambda x: (x - x.min()) / (x.max() - x.min()) if x.max() > x.min() else 0
-                )
+        # Min-max normalization per zone, features scaled to 0-1 for scoring
+        features = [feature for feature in NORMALIZED_FEATURES if feature in df.columns]
+        if features:
+            stats = self.zone_min_max(df, features) if zone_stats is None else zone_stats
+            for feature, normalized in self._normalize_per_zone(df, features, stats).items():
+                df[f'{feature}_norm'] = normalized
         
         # Calculate composite risk score
         df['composite_risk_score'] = (
@@ -195,52 +247,135 @@ class DataProcessor:
         
         return df
     
-    def detect_anomalies(self, df):
+    def zone_min_max(self, df, features):
+        """Per-zone min and max of every feature in one grouped aggregation
+        
+        Returns a frame indexed by zone_id with (feature, 'min'/'max') columns.
+        """
+        return df.groupby('zone_id', sort=False)[features].agg(['min', 'max'])
+    
+    def _normalize_per_zone(self, df, features, stats):
+        """(x - zone min) / (zone max - zone min) for each feature, from zone_min_max stats
+        
+        Zones whose max is not above their min get 0, and rows of zones
+        missing from stats get NaN, as a groupby transform would give them.
+        """
+        # Broadcast the zone stats back onto the rows; -1 marks a zone without stats
+        rows = stats.index.get_indexer(df['zone_id'])
+        known = rows >= 0
+        
+        normalized = {}
+        for feature in features:
+            # A trailing NaN entry is what rows of -1 pick up
+            low = np.append(stats[(feature, 'min')].to_numpy(dtype=np.float64), np.nan)
+            high = np.append(stats[(feature, 'max')].to_numpy(dtype=np.float64), np.nan)
+            spread = high > low
+            if known.all() and not spread.any():
+                # Every zone degenerate: the transform returns integer zeros
+                normalized[feature] = pd.Series(0, index=df.index, dtype=np.int64)
+                continue
+            
+            row_low, row_high = low[rows], high[rows]
+            values = df[feature].to_numpy(dtype=np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scaled = np.where(spread[rows], (values - row_low) / (row_high - row_low), 0.0)
+            scaled[~known] = np.nan
+            normalized[feature] = pd.Series(scaled, index=df.index)
+        return normalized
+    
+    def detect_anomalies(self, df, zone_stats=None):
         """Detect anomalies in sensor data"""
         logger.info("Detecting anomalies...")
         
+        frame = self.anomaly_frame(df, zone_stats)
         anomalies = []
-        
-        for zone_id in df['zone_id'].unique():
-            zone_data = df[df['zone_id'] == zone_id].copy()
-            
-            # Statistical anomaly detection (3-sigma rule)
-            for column in ['displacement_mm', 'vibration_mm_s']:
-                if len(zone_data) > 5:  # Need enough data
-                    mean = zone_data[column].mean()
-                    std = zone_data[column].std()
-                    threshold = mean + 3 * std
-                    
-                    anomaly_indices = zone_data[zone_data[column] > threshold].index
-                    
-                    for idx in anomaly_indices:
-                        anomalies.append({
-                            'timestamp': zone_data.loc[idx, 'timestamp'],
-                            'zone_id': zone_id,
-                            'anomaly_type': f'{column}_statistical',
-                            'value': zone_data.loc[idx, column],
-                            'threshold': threshold,
-                            'severity': 'high' if zone_data.loc[idx, column] > threshold * 1.5 else 'medium'
-                        })
-            
-            # Rate of change anomalies
-            for column in ['displacement_rate', 'vibration_rate']:
-                if column in zone_data.columns:
-                    # Sudden spikes in rate of change
-                    high_rate_indices = zone_data[np.abs(zone_data[column]) > zone_data[column].std() * 2].index
-                    
-                    for idx in high_rate_indices:
-                        anomalies.append({
-                            'timestamp': zone_data.loc[idx, 'timestamp'],
-                            'zone_id': zone_id,
-                            'anomaly_type': f'{column}_spike',
-                            'value': zone_data.loc[idx, column],
-                            'severity': 'medium'
-                        })
+        for timestamp, zone_id, anomaly_type, value, threshold, severity in zip(
+                frame['timestamp'], frame['zone_id'], frame['anomaly_type'],
+                frame['value'].to_numpy(), frame['threshold'].to_numpy(), frame['severity']):
+            anomaly = {
+                'timestamp': timestamp,
+                'zone_id': zone_id,
+                'anomaly_type': anomaly_type,
+                'value': value
+            }
+            # Rate spikes carry no threshold
+            if anomaly_type.endswith('_statistical'):
+                anomaly['threshold'] = threshold
+            anomaly['severity'] = severity
+            anomalies.append(anomaly)
         
         logger.info(f"Detected {len(anomalies)} anomalies")
         return anomalies
     
+    def zone_moments(self, df):
+        """Per-zone mean and std of the anomaly columns, plus the zone's row count
+        
+        Returns a frame indexed by zone_id (in order of first appearance)
+        with (column, 'mean'/'std') and ('readings', 'count') columns.
+        """
+        columns = STATISTICAL_COLUMNS + [column for column in RATE_COLUMNS if column in df.columns]
+        grouped = df.groupby('zone_id', sort=False)
+        stats = grouped[columns].agg(['mean', 'std'])
+        stats[('readings', 'count')] = grouped.size()
+        return stats
+    
+    def anomaly_frame(self, df, zone_stats=None):
+        """All anomalies as one DataFrame, in detect_anomalies order
+        
+        Per-zone statistics come from a single groupby (or zone_stats, in
+        zone_moments layout). Values above mean + 3 std of zones with more
+        than 5 readings are statistical anomalies; rates beyond 2 std of
+        their zone are spikes. Rows are ordered by zone (first appearance),
+        check, then input order.
+        """
+        columns = ['timestamp', 'zone_id', 'anomaly_type', 'value', 'threshold', 'severity']
+        statistical = STATISTICAL_COLUMNS
+        rates = [column for column in RATE_COLUMNS if column in df.columns]
+        
+        stats = self.zone_moments(df) if zone_stats is None else zone_stats
+        sizes = stats[('readings', 'count')]
+        # Row -> zone position in order of first appearance; -1 for rows without a zone
+        rows = stats.index.get_indexer(df['zone_id'])
+        known = rows >= 0
+        
+        checks = []
+        for column in statistical:
+            threshold = (stats[(column, 'mean')] + 3 * stats[(column, 'std')]).to_numpy()
+            # Zones need enough data for a meaningful spread
+            threshold = np.where(sizes.to_numpy() > 5, threshold, np.nan)
+            row_threshold = np.append(threshold, np.nan)[rows]
+            values = df[column].to_numpy(dtype=np.float64)
+            mask = known & (values > row_threshold)
+            checks.append((f'{column}_statistical', mask, values, row_threshold,
+                           np.where(values > row_threshold * 1.5, 'high', 'medium')))
+        for column in rates:
+            spread = (stats[(column, 'std')] * 2).to_numpy()
+            values = df[column].to_numpy(dtype=np.float64)
+            mask = known & (np.abs(values) > np.append(spread, np.nan)[rows])
+            checks.append((f'{column}_spike', mask, values, np.full(len(df), np.nan),
+                           np.full(len(df), 'medium', dtype=object)))
+        
+        positions, order_keys, parts = [], [], {column: [] for column in columns[2:]}
+        for check_number, (anomaly_type, mask, values, thresholds, severity) in enumerate(checks):
+            hits = np.flatnonzero(mask)
+            positions.append(hits)
+            order_keys.append(rows[hits] * len(checks) + check_number)
+            parts['anomaly_type'].append(np.full(len(hits), anomaly_type, dtype=object))
+            parts['value'].append(values[hits])
+            parts['threshold'].append(thresholds[hits])
+            parts['severity'].append(np.asarray(severity, dtype=object)[hits])
+        
+        positions = np.concatenate(positions)
+        # Stable sort: zone first, then check, keeping input order within each
+        order = np.argsort(np.concatenate(order_keys), kind='stable')
+        positions = positions[order]
+        
+        return pd.DataFrame({
+            'timestamp': df['timestamp'].iloc[positions].to_numpy(),
+            'zone_id': df['zone_id'].iloc[positions].to_numpy(),
+            **{column: np.concatenate(values)[order] for column, values in parts.items()}
+        }, columns=columns)
+    
     def generate_summary_report(self, df):
         """Generate summary report of processed data"""
         report = {
@@ -254,10 +389,8 @@ class DataProcessor:
             'zone_summary': {}
         }
         
-        # Per-zone summary
-        for zone_id in df['zone_id'].unique():
-            zone_data = df[df['zone_id'] == zone_id]
-            
+        # Per-zone summary, one pass over the groups in order of first appearance
+        for zone_id, zone_data in df.groupby('zone_id', sort=False):
             report['zone_summary'][zone_id] = {
                 'record_count': len(zone_data),
                 'avg_displacement': float(zone_data['displacement_mm'].mean()),
@@ -270,51 +403,277 @@ class DataProcessor:
         
         return report
     
-    def process_batch(self, input_file, output_file=None):
-        """Process a batch of sensor data"""
+    def process_batch(self, input_file, output_file=None, chunk_rows=None, two_pass=False, stats_file=None,
+                      workers=None):
+        """Process a batch of sensor data
+        
+        With workers > 1 the zones are processed in parallel by
+        process_zones_parallel, with the same result.
+        With chunk_rows the file is streamed through process_batch_chunked;
+        processed rows and anomalies then go straight to their output files
+        and (None, None, report) is returned. two_pass (or a stats_file)
+        scores the chunks against whole-file statistics from a first pass.
+        
+        Input and output may be CSV files or Parquet datasets (paths ending
+        in .parquet), which are written partitioned by zone_id and date.
+        """
+        if chunk_rows and workers and workers > 1:
+            raise ValueError("workers applies to in-memory processing, not chunk_rows")
+        if chunk_rows:
+            file_stats = None
+            if two_pass or stats_file:
+                file_stats = self.collect_file_statistics(input_file, chunk_rows, stats_file)
+            report, _ = self.process_batch_chunked(input_file, output_file, chunk_rows, file_stats)
+            return None, None, report
+        
         logger.info(f"Processing batch file: {input_file}")
         
         # Load data
-        df = pd.read_csv(input_file)
-        
-        # Process pipeline
-        df = self.clean_sensor_data(df)
-        df = self.engineer_features(df)
-        df = self.calculate_risk_scores(df)
-        
-        # Detect anomalies
-        anomalies = self.detect_anomalies(df)
+        df = read_sensor_data(input_file)
         
-        # Generate report
-        report = self.generate_summary_report(df)
+        if workers and workers > 1:
+            df, anomalies, report = self.process_zones_parallel(df, workers)
+        else:
+            # Process pipeline
+            df = self.clean_sensor_data(df)
+            df = self.engineer_features(df)
+            df = self.calculate_risk_scores(df)
+            
+            # Detect anomalies
+            anomalies = self.detect_anomalies(df)
+            
+            # Generate report
+            report = self.generate_summary_report(df)
         
         # Save processed data
         if output_file:
-            df.to_csv(output_file, index=False)
+            write_sensor_data(df, output_file)
             logger.info(f"Processed data saved to: {output_file}")
         
         # Save anomalies
         if anomalies:
-            anomalies_file = output_file.replace('.csv', '_anomalies.json') if output_file else 'anomalies.json'
+            anomalies_file = output_path_for(output_file, '_anomalies.json') if output_file else 'anomalies.json'
             with open(anomalies_file, 'w') as f:
-                json.dump(anomalies, f, indent=2)
+                json.dump(anomalies, f, indent=2, default=_json_default)
             logger.info(f"Anomalies saved to: {anomalies_file}")
         
         # Save report
-        report_file = output_file.replace('.csv', '_report.json') if output_file else 'processing_report.json'
+        report_file = output_path_for(output_file, '_report.json') if output_file else 'processing_report.json'
         with open(report_file, 'w') as f:
             json.dump(report, f, indent=2)
         logger.info(f"Report saved to: {report_file}")
         
         return df, anomalies, report
+    
+    def process_zones_parallel(self, df, workers, tasks_per_worker=4):
+        """Clean, engineer, score and detect anomalies zone by zone in a process pool
+        
+        Every step is per zone except the missing-value fill, so duplicates
+        are dropped and fill medians taken over the whole frame first. Zones
+        are packed into tasks of similar row counts; the merged rows,
+        anomalies and report come out in the same order as the single
+        process pipeline. Returns (df, anomalies, report).
+        """
+        df = df.drop_duplicates()
+        fill_values = {col: df[col].median() for col in NUMERIC_COLUMNS if col in df.columns}
+        
+        # Largest zones first, each into the task with the fewest rows so far
+        sizes = df.groupby('zone_id', sort=True).size().sort_values(ascending=False, kind='stable')
+        n_tasks = max(1, min(len(sizes), workers * tasks_per_worker))
+        task_rows = np.zeros(n_tasks, dtype=np.int64)
+        task_of_zone = {}
+        for zone_id, size in sizes.items():
+            task = int(task_rows.argmin())
+            task_rows[task] += size
+            task_of_zone[zone_id] = task
+        task_ids = df['zone_id'].map(task_of_zone)
+        partitions = [part for _, part in df.groupby(task_ids, sort=True)]
+        if not partitions:
+            return _process_zone_partition(self, df, fill_values)
+        logger.info(f"Processing {len(sizes)} zones in {len(partitions)} tasks on {workers} workers")
+        
+        # spawn: workers must not inherit the caller's threads or locks
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn')) as pool:
+            results = list(pool.map(_process_zone_partition, [self] * len(partitions), partitions,
+                                    [fill_values] * len(partitions)))
+        
+        # Each task is sorted by zone and time; a stable sort by zone interleaves them back
+        merged = pd.concat([frame for frame, _, _ in results]).sort_values('zone_id', kind='stable')
+        anomalies = sorted((anomaly for _, found, _ in results for anomaly in found),
+                           key=lambda anomaly: anomaly['zone_id'])
+        return merged, anomalies, self._merge_reports([report for _, _, report in results])
+    
+    def _merge_reports(self, reports):
+        """One generate_summary_report result from reports over disjoint zones"""
+        zone_summary = {}
+        for report in reports:
+            zone_summary.update(report['zone_summary'])
+        starts = [report['time_range']['start'] for report in reports if report['time_range']['start']]
+        ends = [report['time_range']['end'] for report in reports if report['time_range']['end']]
+        return {
+            'processing_timestamp': datetime.now().isoformat(),
+            'total_records': sum(report['total_records'] for report in reports),
+            'zones_processed': len(zone_summary),
+            'time_range': {
+                'start': min(starts, key=pd.Timestamp) if starts else None,
+                'end': max(ends, key=pd.Timestamp) if ends else None
+            },
+            'zone_summary': {zone_id: zone_summary[zone_id] for zone_id in sorted(zone_summary)}
+        }
+    
+    def _read_chunks(self, input_file, chunk_rows):
+        """Input row blocks, without rows repeated from the previous block"""
+        previous_hashes = pd.Index([])
+        for chunk in iter_sensor_data(input_file, chunk_rows):
+            hashes = pd.util.hash_pandas_object(chunk, index=False)
+            yield chunk[~hashes.isin(previous_hashes).to_numpy()]
+            previous_hashes = pd.Index(hashes.to_numpy())
+    
+    def _engineered_chunks(self, input_file, chunk_rows, fill_values=None):
+        """Cleaned and engineered row blocks, with rate and moving-average history carried over
+        
+        Each zone's last two cleaned readings are prepended to the next
+        block, so diff and rolling see the same history they would in memory.
+        """
+        carry = None
+        warned_order = False
+        for chunk in self._read_chunks(input_file, chunk_rows):
+            cleaned = self.clean_sensor_data(chunk, fill_values)
+            if cleaned.empty:
+                continue
+            raw_columns = list(cleaned.columns)
+            start = cleaned.index.min()
+            
+            if carry is not None and not carry.empty:
+                if not warned_order:
+                    last_seen = carry.groupby('zone_id')['timestamp'].max()
+                    first_new = cleaned.groupby('zone_id')['timestamp'].min()
+                    if (first_new < last_seen.reindex(first_new.index)).any():
+                        logger.warning("Readings are out of time order across chunks; "
+                                       "rates at chunk boundaries may differ from process_batch")
+                        warned_order = True
+                cleaned = pd.concat([carry, cleaned])
+            
+            engineered = self.engineer_features(cleaned)
+            # The carried rows only provide history for diff and rolling
+            carry = engineered[raw_columns].groupby('zone_id').tail(2)
+            yield engineered[engineered.index >= start].copy()
+    
+    def collect_file_statistics(self, input_file, chunk_rows=100000, stats_file=None):
+        """First pass of exact chunked processing: whole-file medians and per-zone stats
+        
+        Reads the file twice, once for the exact medians that fill missing
+        readings and once for the per-zone min/max and moments of the
+        engineered features. With stats_file the result is saved there as a
+        JSON sidecar, and reused instead of rescanning while it is newer
+        than the input file.
+        
+        The medians keep a count per distinct value of each reading column,
+        capped at MAX_DISTINCT_VALUES: past that a column is rounded and its
+        fill value becomes approximate (see ExactMedians), which is logged.
+        """
+        if stats_file and os.path.exists(stats_file) and \
+                os.path.getmtime(stats_file) >= os.path.getmtime(input_file):
+            logger.info(f"Loading statistics from: {stats_file}")
+            return FileStatistics.load(stats_file)
+        
+        logger.info(f"Collecting statistics in chunks of {chunk_rows} rows: {input_file}")
+        
+        medians = ExactMedians(NUMERIC_COLUMNS)
+        for chunk in self._read_chunks(input_file, chunk_rows):
+            medians.update(chunk)
+        fill_values = medians.medians()
+        for column, decimals in medians.decimals.items():
+            logger.warning(f"Too many distinct {column} values for an exact median; "
+                           f"fill value is approximate (values rounded to {decimals} decimals)")
+        
+        zone_stats = RunningZoneStats(NORMALIZED_FEATURES, STATISTICAL_COLUMNS + RATE_COLUMNS)
+        for engineered in self._engineered_chunks(input_file, chunk_rows, fill_values):
+            zone_stats.update(engineered)
+        
+        logger.info(f"Collected statistics for {len(zone_stats.zones)} zones")
+        file_stats = FileStatistics(fill_values, zone_stats)
+        if stats_file:
+            file_stats.save(stats_file)
+            logger.info(f"Statistics saved to: {stats_file}")
+        return file_stats
+    
+    def process_batch_chunked(self, input_file, output_file=None, chunk_rows=100000, file_stats=None):
+        """Process a sensor file in blocks of chunk_rows, with memory bounded by the chunk size
+        
+        Rates and 3-point moving averages match the in-memory pipeline as
+        long as every zone's readings appear in time order. Without
+        file_stats this is a single pass: missing values are filled with the
+        chunk median, and normalization ranges and anomaly statistics are
+        running per-zone values covering all rows up to the current chunk.
+        With file_stats from collect_file_statistics, every row is scored
+        against whole-file values, so the scored rows match process_batch's:
+        equal, except that the moving averages and anomaly thresholds agree
+        only up to rounding in the last bits (compare them with allclose).
+        Fill values are exact unless a reading column has more than
+        MAX_DISTINCT_VALUES distinct values (see collect_file_statistics).
+        
+        In both modes duplicates are only dropped within a chunk or against
+        the previous one, and output rows are sorted by zone and time within
+        each chunk. Returns (report, anomaly_count).
+        """
+        logger.info(f"Processing batch file in chunks of {chunk_rows} rows: {input_file}")
+        
+        if file_stats is None:
+            fill_values = None
+            stats = RunningZoneStats(NORMALIZED_FEATURES, STATISTICAL_COLUMNS + RATE_COLUMNS)
+        else:
+            fill_values = file_stats.fill_values
+            stats = file_stats.zone_stats
+            min_max, moments = stats.min_max_frame(), stats.moments_frame()
+        summary = SummaryAccumulator()
+        anomalies_file = output_path_for(output_file, '_anomalies.json') if output_file else 'anomalies.json'
+        anomaly_writer = JsonArrayWriter(anomalies_file, default=_json_default)
+        
+        part = 0
+        try:
+            for fresh in self._engineered_chunks(input_file, chunk_rows, fill_values):
+                if file_stats is None:
+                    stats.update(fresh)
+                    min_max, moments = stats.min_max_frame(), stats.moments_frame()
+                scored = self.calculate_risk_scores(fresh, min_max)
+                anomaly_writer.write(self.detect_anomalies(scored, moments))
+                summary.update(scored)
+                
+                if output_file:
+                    write_sensor_data(scored, output_file, append=part > 0, part=part)
+                part += 1
+        finally:
+            anomaly_writer.close()
+        
+        if output_file:
+            logger.info(f"Processed data saved to: {output_file}")
+        if anomaly_writer.count:
+            logger.info(f"Anomalies saved to: {anomalies_file}")
+        
+        report = summary.report(datetime.now().isoformat())
+        report_file = output_path_for(output_file, '_report.json') if output_file else 'processing_report.json'
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Report saved to: {report_file}")
+        
+        return report, anomaly_writer.count
 
 def main():
     """Main function for testing data processing"""
     import argparse
     
     parser = argparse.ArgumentParser(description='Rockfall Data Processing')
-    parser.add_argument('--input', required=True, help='Input CSV file')
-    parser.add_argument('--output', help='Output CSV file')
+    parser.add_argument('--input', required=True, help='Input CSV file or Parquet dataset')
+    parser.add_argument('--output', help='Output CSV file or Parquet dataset (.parquet)')
+    parser.add_argument('--chunk-rows', type=int,
+                        help='Stream the input in blocks of this many rows')
+    parser.add_argument('--two-pass', action='store_true',
+                        help='With --chunk-rows, score against whole-file statistics')
+    parser.add_argument('--workers', type=int,
+                        help='Process zones in parallel on this many processes')
+    parser.add_argument('--stats-file',
+                        help='JSON sidecar for the first-pass statistics, reused while newer than the input')
     
     args = parser.parse_args()
     
@@ -323,7 +682,19 @@ def main():
     
     # Process data
     try:
-        df, anomalies, report = processor.process_batch(args.input, args.output)
+        if args.chunk_rows:
+            file_stats = None
+            if args.two_pass or args.stats_file:
+                file_stats = processor.collect_file_statistics(args.input, args.chunk_rows, args.stats_file)
+            report, anomaly_count = processor.process_batch_chunked(args.input, args.output,
+                                                                    args.chunk_rows, file_stats)
+            print("Processing complete!")
+            print(f"Records processed: {report['total_records']}")
+            print(f"Anomalies detected: {anomaly_count}")
+            print(f"Zones: {list(report['zone_summary'])}")
+            return
+        
+        df, anomalies, report = processor.process_batch(args.input, args.output, workers=args.workers)
         
         print(f"Processing complete!")
         print(f"Records processed: {len(df)}")
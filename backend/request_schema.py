@@ -0,0 +1,169 @@
+"""
+Request Validation for Rockfall Risk Prediction System
+One reading schema, compiled once, that validates and coerces single
+/predict readings and whole /predict/batch payloads into typed arrays
+"""
+
+import math
+import numpy as np
+import pandas as pd
+
+# (field, default) for every numeric reading field; None marks a required field
+READING_FIELDS = (
+    ('displacement_mm', None),
+    ('vibration_mm_s', None),
+    ('temperature_c', 22.0),
+    ('humidity_percent', 60.0),
+    ('pressure_kpa', 101.3),
+    ('accelerometer_x', 0.1),
+    ('accelerometer_y', 0.1),
+    ('accelerometer_z', 9.8)
+)
+
+def coerce_numeric(values):
+    """Coerce a column of raw JSON values to float64, invalid entries become NaN"""
+    try:
+        return pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+    except (TypeError, ValueError):
+        # Nested payloads (lists, dicts) make pandas give up on the whole column
+        coerced = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                coerced[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return coerced
+
+class ValidationError(ValueError):
+    """A single reading does not match the schema"""
+
+class ValidatedBatch:
+    """A batch coerced to typed columns
+
+    zone_ids is an object array and columns maps each numeric field to a
+    float64 array, both covering every input row; valid marks the rows
+    without errors, and errors maps a row index to its messages.
+    """
+
+    def __init__(self, zone_ids, columns, valid, errors):
+        self.zone_ids = zone_ids
+        self.columns = columns
+        self.valid = valid
+        self.errors = errors
+
+    def __len__(self):
+        return len(self.valid)
+
+    @property
+    def valid_rows(self):
+        return np.flatnonzero(self.valid)
+
+    def valid_columns(self):
+        """(zone_ids, columns) of the valid rows only"""
+        valid = self.valid
+        return self.zone_ids[valid].tolist(), {col: values[valid] for col, values in self.columns.items()}
+
+    def error_list(self):
+        """[{'index': i, 'error': message}, ...] in row order"""
+        return [{'index': int(index), 'error': '; '.join(messages)}
+                for index, messages in sorted(self.errors.items())]
+
+class ReadingValidator:
+    """Validator compiled from a field list
+
+    Required fields must be present and non-null; optional ones take their
+    default when absent or null. Numeric fields accept anything float()
+    accepts that is finite: NaN and infinite readings are rejected, so
+    /predict, /predict/batch and /predict/stream treat them alike.
+    The zone id must be a string; the optional sensor id a string or an
+    integer.
+    """
+
+    def __init__(self, fields=READING_FIELDS, zone_field='zone_id', sensor_field='sensor_id'):
+        self.zone_field = zone_field
+        self.sensor_field = sensor_field
+        self.fields = tuple(fields)
+        self.columns = [name for name, _ in self.fields]
+        self._required = [name for name, default in self.fields if default is None]
+        self._defaults = [(name, float(default)) for name, default in self.fields if default is not None]
+
+    def validate(self, data):
+        """Coerced reading dict for one request body; raises ValidationError"""
+        if not isinstance(data, dict):
+            raise ValidationError('Reading must be a JSON object')
+        if data.get(self.zone_field) is None:
+            raise ValidationError(f'Missing required field: {self.zone_field}')
+        error = self._id_error(data)
+        if error is not None:
+            raise ValidationError(error)
+
+        reading = {self.zone_field: data[self.zone_field]}
+        for name in self._required:
+            value = data.get(name)
+            if value is None:
+                raise ValidationError(f'Missing required field: {name}')
+            reading[name] = self._number(name, value)
+        for name, default in self._defaults:
+            value = data.get(name)
+            reading[name] = default if value is None else self._number(name, value)
+        return reading
+
+    def _id_error(self, row):
+        """Message for a zone or sensor id of the wrong type, or None"""
+        zone_id = row.get(self.zone_field)
+        if zone_id is not None and not isinstance(zone_id, str):
+            return f'Invalid value for {self.zone_field}: {zone_id!r}'
+        sensor_id = row.get(self.sensor_field)
+        if sensor_id is not None and (isinstance(sensor_id, bool) or not isinstance(sensor_id, (str, int))):
+            return f'Invalid value for {self.sensor_field}: {sensor_id!r}'
+        return None
+
+    @staticmethod
+    def _number(name, value):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = math.nan
+        if not math.isfinite(number):
+            raise ValidationError(f'Invalid value for {name}: {value!r}')
+        return number
+
+    def validate_batch(self, readings):
+        """Validate a list of readings column by column into a ValidatedBatch"""
+        n_rows = len(readings)
+        errors = {}
+        rows = []
+        for index, reading in enumerate(readings):
+            if isinstance(reading, dict):
+                rows.append(reading)
+            else:
+                rows.append({})
+                errors[index] = ['Reading must be a JSON object']
+
+        zone_ids = np.empty(n_rows, dtype=object)
+        zone_ids[:] = [row.get(self.zone_field) for row in rows]
+        for index in np.flatnonzero(np.equal(zone_ids, None)):
+            errors.setdefault(int(index), []).append(f'Missing required field: {self.zone_field}')
+        for index, row in enumerate(rows):
+            error = self._id_error(row)
+            if error is not None:
+                errors.setdefault(index, []).append(error)
+
+        columns = {}
+        for name, default in self.fields:
+            raw = [row.get(name) for row in rows]
+            values = np.array(coerce_numeric(pd.Series(raw, dtype=object)))
+            missing = np.fromiter((value is None for value in raw), dtype=bool, count=n_rows)
+            if default is None:
+                for index in np.flatnonzero(missing):
+                    errors.setdefault(int(index), []).append(f'Missing required field: {name}')
+            else:
+                values[missing] = default
+            # Garbage coerces to NaN; it is rejected like genuine NaN and infinite readings
+            for index in np.flatnonzero(~np.isfinite(values) & ~missing):
+                errors.setdefault(int(index), []).append(f'Invalid value for {name}: {raw[index]!r}')
+            columns[name] = values
+
+        valid = np.ones(n_rows, dtype=bool)
+        valid[list(errors)] = False
+        return ValidatedBatch(zone_ids, columns, valid, errors)
@@ -0,0 +1,82 @@
+"""
+File-Backed Response Cache for Rockfall Risk Prediction System
+Keeps the serialized JSON of file-backed endpoints until the file changes,
+with a strong ETag so polling clients can revalidate with a 304
+"""
+
+import hashlib
+import os
+import threading
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def file_signature(path):
+    """(mtime, size, inode) of a file, or None when it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+class CachedResponse:
+    """Serialized response body for one version of a source file"""
+
+    def __init__(self, signature, data, body):
+        self.signature = signature
+        self.data = data
+        self.body = body
+        # Strong validator: the hash of the exact bytes served
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+
+class FileResponseCache:
+    """Per-file cache of JSON response bytes
+
+    get() only stats the file on a hit. When the file's signature changes,
+    the loader runs again and the new body replaces the old one; readers
+    always see one complete entry.
+    """
+
+    def __init__(self, dumps):
+        self.dumps = dumps
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, load):
+        """Cached response for path, rebuilt with load(path) after a change
+
+        Returns None when the file does not exist.
+        """
+        signature = file_signature(path)
+        if signature is None:
+            return None
+
+        entry = self._entries.get(path)
+        if entry is not None and entry.signature == signature:
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            # Another request may have rebuilt it while we waited
+            entry = self._entries.get(path)
+            if entry is not None and entry.signature == signature:
+                self.hits += 1
+                return entry
+
+            self.misses += 1
+            data = load(path)
+            entry = CachedResponse(signature, data, self.dumps(data).encode('utf-8'))
+            self._entries[path] = entry
+            logger.info(f"Response cache rebuilt for {os.path.basename(path)}")
+            return entry
+
+    def invalidate(self, path=None):
+        """Drop one cached file, or all of them"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
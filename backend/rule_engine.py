@@ -0,0 +1,95 @@
+"""
+Rule-Based Risk Engine for Rockfall Risk Prediction System
+Threshold rules used when no trained model is available, evaluated for
+whole arrays of readings at once
+"""
+
+import numpy as np
+
+from zone_index import ZoneIndex
+
+# Level codes index into this tuple, in increasing severity
+RISK_LEVELS = ('low', 'high', 'critical')
+LOW, HIGH, CRITICAL = range(len(RISK_LEVELS))
+
+# Probability reported for the predicted level and for each other level
+LEVEL_PROBABILITY = 0.8
+OTHER_PROBABILITY = 0.1
+
+# Risk score per level as a function of displacement and vibration arrays
+DEFAULT_SCORE_RULES = (
+    lambda d, v: np.fmin(5.0, 1.0 + d / 10.0 + v / 2.0),
+    lambda d, v: np.fmin(8.0, 5.0 + d / 10.0 + v / 2.0),
+    lambda d, v: np.fmin(10.0, 7.0 + d / 10.0 + v / 2.0),
+)
+
+class RuleResult:
+    """Rule-based predictions for a batch, as parallel arrays"""
+
+    def __init__(self, levels, scores):
+        self.levels = levels
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.levels)
+
+    @property
+    def probabilities(self):
+        """(n, 3) class probabilities in RISK_LEVELS order"""
+        probabilities = np.full((len(self.levels), len(RISK_LEVELS)), OTHER_PROBABILITY)
+        probabilities[np.arange(len(self.levels)), self.levels] = LEVEL_PROBABILITY
+        return probabilities
+
+    def count(self, level):
+        """Number of readings at one level code"""
+        return int(np.count_nonzero(self.levels == level))
+
+    def to_predictions(self):
+        """One prediction dict per reading, in the API response layout"""
+        templates = [
+            {name: LEVEL_PROBABILITY if i == level else OTHER_PROBABILITY
+             for i, name in enumerate(RISK_LEVELS)}
+            for level in range(len(RISK_LEVELS))
+        ]
+        return [
+            {
+                'risk_level': RISK_LEVELS[level],
+                'risk_score': score,
+                'risk_probabilities': dict(templates[level])
+            }
+            for level, score in zip(self.levels.tolist(), self.scores.tolist())
+        ]
+
+class RuleEngine:
+    """Displacement/vibration threshold rules with per-zone thresholds
+
+    A reading is critical when either value reaches its zone's critical
+    threshold, high when either reaches the warning threshold, and low
+    otherwise; the score is then given by that level's score rule.
+    """
+
+    def __init__(self, zones=None, score_rules=DEFAULT_SCORE_RULES):
+        self.zones = zones if zones is not None else ZoneIndex()
+        self.score_rules = score_rules
+
+    def evaluate(self, zone_ids, displacement, vibration):
+        """Levels and scores for arrays of zone ids, displacement and vibration"""
+        thresholds = self.zones.thresholds[self.zones.rows_for(zone_ids)]
+        displacement = np.asarray(displacement, dtype=np.float64)
+        vibration = np.asarray(vibration, dtype=np.float64)
+
+        is_critical = (displacement >= thresholds[:, 1]) | (vibration >= thresholds[:, 3])
+        is_warning = (displacement >= thresholds[:, 0]) | (vibration >= thresholds[:, 2])
+        levels = np.where(is_critical, CRITICAL, np.where(is_warning, HIGH, LOW)).astype(np.int8)
+
+        scores = np.empty(len(levels))
+        for level, rule in enumerate(self.score_rules):
+            mask = levels == level
+            if mask.any():
+                scores[mask] = rule(displacement[mask], vibration[mask])
+        return RuleResult(levels, scores)
+
+    def predict(self, zone_id, displacement, vibration):
+        """Prediction dict for a single reading"""
+        result = self.evaluate([zone_id], [displacement], [vibration])
+        return result.to_predictions()[0]
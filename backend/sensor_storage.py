@@ -0,0 +1,190 @@
+"""
+Sensor Data Storage for Rockfall Risk Prediction System
+Reads and writes sensor and processed data as CSV files or as Parquet
+datasets partitioned by zone_id and date, when pyarrow is installed
+"""
+
+import os
+import shutil
+import itertools
+import logging
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet is optional; CSV needs only pandas
+    pa = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Hive-style partition directories: <root>/zone_id=A/date=2024-09-19/part-0.parquet
+PARTITION_COLUMNS = ['zone_id', 'date']
+
+def parquet_available():
+    return pa is not None
+
+def is_parquet(path):
+    """Parquet files end in .parquet; a partitioned dataset is a directory"""
+    path = str(path).rstrip('/\\')
+    return path.endswith('.parquet') or os.path.isdir(path)
+
+def output_path_for(output_file, suffix):
+    """Sidecar file next to an output file or dataset: x.csv or x.parquet -> x<suffix>"""
+    return os.path.splitext(str(output_file).rstrip('/\\'))[0] + suffix
+
+def _require_parquet():
+    if pa is None:
+        raise ImportError("Parquet support needs pyarrow, which is not installed")
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+def _partitioning():
+    return ds.partitioning(pa.schema([('zone_id', pa.string()), ('date', pa.string())]), flavor='hive')
+
+def _dataset(path):
+    _require_parquet()
+    return ds.dataset(str(path), format='parquet', partitioning=_partitioning())
+
+def _filter_expression(zone_id, date):
+    """Partition predicate; pyarrow skips every directory that cannot match"""
+    expression = None
+    for column, value in (('zone_id', zone_id), ('date', date)):
+        if value is None:
+            continue
+        condition = ds.field(column).isin([str(v) for v in _as_list(value)])
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def _filter_frame(df, zone_id, date):
+    """The same predicate applied to a CSV frame after reading"""
+    mask = pd.Series(True, index=df.index)
+    if zone_id is not None:
+        mask &= df['zone_id'].astype(str).isin([str(v) for v in _as_list(zone_id)])
+    if date is not None:
+        days = pd.to_datetime(df['timestamp']).dt.strftime('%Y-%m-%d')
+        mask &= days.isin([str(v) for v in _as_list(date)])
+    return df[mask]
+
+def _read_columns(columns, zone_id, date):
+    """Columns to load: the projection plus whatever the filters need"""
+    needed = list(columns)
+    if zone_id is not None and 'zone_id' not in needed:
+        needed.append('zone_id')
+    if date is not None and 'timestamp' not in needed:
+        needed.append('timestamp')
+    return needed
+
+def _available_columns(dataset, columns):
+    """Requested columns present in a dataset; 'date' only exists as a partition key"""
+    names = set(dataset.schema.names)
+    return [col for col in columns if col in names]
+
+def read_sensor_data(path, columns=None, zone_id=None, date=None):
+    """Load sensor or processed data from a CSV file or Parquet dataset
+
+    columns projects the read onto those columns; zone_id and date (a
+    value or list, dates as 'YYYY-MM-DD') select rows. On a partitioned
+    Parquet dataset only the matching zone/date files are opened and only
+    the projected columns decoded; CSV input is filtered after parsing.
+    """
+    if not is_parquet(path):
+        usecols = _read_columns(columns, zone_id, date) if columns is not None else None
+        df = pd.read_csv(path, usecols=usecols)
+        if zone_id is not None or date is not None:
+            df = _filter_frame(df, zone_id, date).reset_index(drop=True)
+        return df[list(columns)] if columns is not None else df
+
+    dataset = _dataset(path)
+    read_columns = None
+    if columns is not None:
+        read_columns = _available_columns(dataset, columns)
+    table = dataset.to_table(columns=read_columns, filter=_filter_expression(zone_id, date))
+    df = table.to_pandas()
+    # The date partition key is derived from timestamp; keep it only when asked for
+    if 'date' in df.columns and (columns is None or 'date' not in columns):
+        df = df.drop(columns='date')
+    if 'zone_id' in df.columns:
+        df['zone_id'] = df['zone_id'].astype(object)
+    return df
+
+def iter_sensor_data(path, chunk_rows, columns=None):
+    """Row blocks of about chunk_rows, indexed by their position in the whole input
+
+    Parquet blocks gather whole batches, so they can run up to one batch
+    over chunk_rows.
+    """
+    if not is_parquet(path):
+        yield from pd.read_csv(path, chunksize=chunk_rows, usecols=columns)
+        return
+
+    dataset = _dataset(path)
+    read_columns = _available_columns(dataset, columns) if columns is not None else None
+    # Partition files are small; gather their batches into chunk_rows blocks
+    pending, pending_rows, offset = [], 0, 0
+    batches = dataset.to_batches(columns=read_columns, batch_size=chunk_rows)
+    for batch in itertools.chain(batches, [None]):
+        if batch is not None:
+            if batch.num_rows == 0:
+                continue
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows < chunk_rows:
+                continue
+        if not pending:
+            break
+        df = pa.Table.from_batches(pending).to_pandas()
+        pending, pending_rows = [], 0
+        df = df.drop(columns='date', errors='ignore')
+        if 'zone_id' in df.columns:
+            df['zone_id'] = df['zone_id'].astype(object)
+        df.index = pd.RangeIndex(offset, offset + len(df))
+        offset += len(df)
+        yield df
+
+def write_sensor_data(df, path, append=False, part=0):
+    """Write a frame as CSV, or as a Parquet dataset partitioned by zone_id and date
+
+    Without append an existing output is replaced. Appends to a dataset
+    need a distinct part number per call so files are not overwritten.
+    """
+    if not is_parquet(path):
+        df.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+        return
+
+    _require_parquet()
+    if not append and os.path.isdir(path):
+        shutil.rmtree(path)
+    frame = df.assign(
+        zone_id=df['zone_id'].astype(str),
+        date=pd.to_datetime(df['timestamp']).dt.strftime('%Y-%m-%d')
+    )
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    pq.write_to_dataset(table, str(path), partition_cols=PARTITION_COLUMNS,
+                        basename_template=f'part-{part:05d}-{{i}}.parquet',
+                        existing_data_behavior='overwrite_or_ignore')
+
+def main():
+    """Convert a sensor CSV into a partitioned Parquet dataset"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Rockfall Sensor Data Conversion')
+    parser.add_argument('--input', required=True, help='Input CSV file')
+    parser.add_argument('--output', required=True, help='Output Parquet dataset directory')
+    parser.add_argument('--chunk-rows', type=int, default=1000000,
+                        help='Rows converted at a time')
+
+    args = parser.parse_args()
+
+    rows = 0
+    for part, chunk in enumerate(iter_sensor_data(args.input, args.chunk_rows)):
+        chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+        write_sensor_data(chunk, args.output, append=part > 0, part=part)
+        rows += len(chunk)
+    logger.info(f"Wrote {rows} rows to: {args.output}")
+
+if __name__ == "__main__":
+    main()
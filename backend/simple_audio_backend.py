@@ -8,6 +8,9 @@ import json
 import os
 from datetime import datetime
 import logging
+import numpy as np
+
+from rule_engine import RuleEngine
 
 app = Flask(__name__)
 CORS(app)
@@ -16,6 +19,15 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Audio test scores: same thresholds as the main API, steeper low/high scores
+AUDIO_SCORE_RULES = (
+    lambda d, v: np.fmax(1.0, (d * 0.05) + (v * 0.2)),
+    lambda d, v: np.fmin(8.0, 4.0 + (d * 0.1) + (v * 0.5)),
+    lambda d, v: np.fmin(10.0, 7.0 + (d * 0.1) + (v * 0.5)),
+)
+
+rule_engine = RuleEngine(score_rules=AUDIO_SCORE_RULES)
+
 @app.route('/', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -41,37 +53,24 @@ def predict():
         
         logger.info(f"Testing Zone {zone_id}: displacement={displacement}mm, vibration={vibration}mm/s")
         
-        # Audio alert thresholds (optimized for testing)
-        thresholds = {
-            'displacement_warning': 5.0,
-            'displacement_critical': 8.0,
-            'vibration_warning': 1.5,
-            'vibration_critical': 2.5
-        }
-        
-        # Determine risk level
-        is_critical = (displacement >= thresholds['displacement_critical'] or 
-                      vibration >= thresholds['vibration_critical'])
-        is_warning = (displacement >= thresholds['displacement_warning'] or 
-                     vibration >= thresholds['vibration_warning'])
+        # Audio alert thresholds (optimized for testing) are the engine defaults
+        prediction = rule_engine.predict(zone_id, displacement, vibration)
+        risk_level = prediction['risk_level']
+        risk_score = prediction['risk_score']
+        is_critical = risk_level == 'critical'
+        is_warning = risk_level == 'high'
         
         if is_critical:
-            risk_level = 'critical'
-            risk_score = min(10.0, 7.0 + (displacement * 0.1) + (vibration * 0.5))
             action = 'IMMEDIATE_EVACUATION'
             message = 'Critical risk detected. Immediate evacuation required.'
             color = 'red'
             logger.warning(f"🚨 CRITICAL ALERT: Zone {zone_id} - Score {risk_score:.1f}")
         elif is_warning:
-            risk_level = 'high'
-            risk_score = min(8.0, 4.0 + (displacement * 0.1) + (vibration * 0.5))
             action = 'INCREASED_MONITORING'
             message = 'High risk detected. Increase monitoring and restrict access.'
             color = 'orange'
             logger.warning(f"⚠️ WARNING ALERT: Zone {zone_id} - Score {risk_score:.1f}")
         else:
-            risk_level = 'low'
-            risk_score = max(1.0, (displacement * 0.05) + (vibration * 0.2))
             action = 'NORMAL_OPERATIONS'
             message = 'Low risk. Continue normal operations with routine monitoring.'
             color = 'green'
@@ -80,15 +79,7 @@ def predict():
         result = {
             'zone_id': zone_id,
             'timestamp': datetime.now().isoformat(),
-            'prediction': {
-                'risk_level': risk_level,
-                'risk_score': float(risk_score),
-                'risk_probabilities': {
-                    'low': 0.8 if risk_level == 'low' else 0.1,
-                    'high': 0.8 if risk_level == 'high' else 0.1,
-                    'critical': 0.8 if risk_level == 'critical' else 0.1
-                }
-            },
+            'prediction': prediction,
             'recommendation': {
                 'action': action,
                 'message': message,
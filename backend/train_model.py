@@ -11,6 +11,9 @@ import joblib
 import json
 import os
 
+from model_artifact import ModelArtifact, artifact_path_for
+from sensor_storage import read_sensor_data
+
 class RockfallRiskModel:
     def __init__(self):
         self.model = RandomForestClassifier(
@@ -98,9 +101,9 @@ class RockfallRiskModel:
         return df[feature_cols]
     
     def train(self, data_file):
-        """Train the model"""
-        # Load data
-        df = pd.read_csv(data_file)
+        """Train the model from a sensor CSV file or Parquet dataset"""
+        # Load data: only the sensor columns the features are built from
+        df = read_sensor_data(data_file, columns=['zone_id'] + self.feature_columns)
         
         # Create risk labels
         df = self.create_risk_labels(df)
@@ -157,8 +160,12 @@ class RockfallRiskModel:
             'risk_score': np.max(risk_proba[0]) * 10  # Scale to 0-10
         }
     
-    def save_model(self, filepath):
-        """Save the trained model"""
+    def save_model(self, filepath, export_artifact=True, fold_scaler=False):
+        """Save the trained model, plus its memory-mappable artifact next to it
+        
+        With fold_scaler the compiled forest takes raw sensor features, so
+        the API can skip the StandardScaler pass entirely.
+        """
         model_data = {
             'model': self.model,
             'scaler': self.scaler,
@@ -167,6 +174,10 @@ class RockfallRiskModel:
         }
         joblib.dump(model_data, filepath)
         print(f"Model saved to {filepath}")
+        
+        if export_artifact:
+            artifact = ModelArtifact.from_model_data(model_data, fold_scaler=fold_scaler)
+            artifact.save(artifact_path_for(filepath))
     
     def load_model(self, filepath):
         """Load a trained model"""
@@ -177,11 +188,12 @@ class RockfallRiskModel:
         self.feature_columns = model_data['feature_columns']
         print(f"Model loaded from {filepath}")
 
-def train_and_save_model():
+def train_and_save_model(fold_scaler=False, data_file=None):
     """Train and save the model"""
     # Get the path to the data file
     current_dir = os.path.dirname(__file__)
-    data_file = os.path.join(os.path.dirname(current_dir), 'sample-data', 'demo_sensor.csv')
+    if data_file is None:
+        data_file = os.path.join(os.path.dirname(current_dir), 'sample-data', 'demo_sensor.csv')
     model_file = os.path.join(current_dir, 'ml_model.pkl')
     
     # Create and train model
@@ -189,7 +201,7 @@ def train_and_save_model():
     model.train(data_file)
     
     # Save model
-    model.save_model(model_file)
+    model.save_model(model_file, fold_scaler=fold_scaler)
     
     return model
 
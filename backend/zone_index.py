@@ -0,0 +1,83 @@
+"""
+Zone Index for Rockfall Risk Prediction System
+Resolves zone records and risk thresholds in constant time, and packs the
+thresholds into one array so rule-based risk can be evaluated per batch
+"""
+
+import numpy as np
+from types import MappingProxyType
+
+# Column order of the packed threshold matrix
+THRESHOLD_KEYS = (
+    'displacement_warning', 'displacement_critical',
+    'vibration_warning', 'vibration_critical'
+)
+
+# Default thresholds (more sensitive for demonstration)
+DEFAULT_THRESHOLDS = MappingProxyType({
+    'displacement_warning': 5,
+    'displacement_critical': 8,
+    'vibration_warning': 1.5,
+    'vibration_critical': 2.5
+})
+
+class ZoneIndex:
+    """Read-only lookup tables built once from zones.json
+
+    records maps zone_id to the zone's configuration record. thresholds is a
+    (n_zones + 1, 4) matrix in THRESHOLD_KEYS order whose last row holds the
+    defaults used for unknown zones; zone_rows maps zone_id to its row.
+    """
+
+    def __init__(self, zones_data=None):
+        zones = (zones_data or {}).get('zones', [])
+
+        records = {}
+        threshold_rows = {}
+        for zone in zones:
+            zone_id = zone.get('zone_id')
+            records.setdefault(zone_id, zone)
+            if 'risk_thresholds' in zone and zone_id not in threshold_rows:
+                # Zones may override only some thresholds; the rest keep the defaults
+                threshold_rows[zone_id] = {**DEFAULT_THRESHOLDS, **zone['risk_thresholds']}
+
+        self.records = MappingProxyType(records)
+        self.zone_rows = MappingProxyType(
+            {zone_id: row for row, zone_id in enumerate(threshold_rows)}
+        )
+        self.default_row = len(threshold_rows)
+
+        thresholds = np.array(
+            [[float(values[key]) for key in THRESHOLD_KEYS]
+             for values in list(threshold_rows.values()) + [DEFAULT_THRESHOLDS]],
+            dtype=np.float64
+        )
+        thresholds.flags.writeable = False
+        self.thresholds = thresholds
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, zone_id):
+        """Zone record for zone_id, or None"""
+        try:
+            return self.records.get(zone_id)
+        except TypeError:
+            # Unhashable ids from JSON payloads (lists, objects) match no zone
+            return None
+
+    def row_for(self, zone_id):
+        """Threshold matrix row for one zone, the default row when it has none"""
+        try:
+            return self.zone_rows.get(zone_id, self.default_row)
+        except TypeError:
+            return self.default_row
+
+    def rows_for(self, zone_ids):
+        """Threshold matrix rows for a sequence of zone ids"""
+        return np.fromiter((self.row_for(zone_id) for zone_id in zone_ids),
+                           dtype=np.intp, count=len(zone_ids))
+
+    def thresholds_for(self, zone_id):
+        """Thresholds of one zone as a dict keyed by THRESHOLD_KEYS"""
+        return dict(zip(THRESHOLD_KEYS, self.thresholds[self.row_for(zone_id)].tolist()))
@@ -0,0 +1,310 @@
+"""
+Streaming Zone State for Rockfall Risk Prediction System
+Per-zone statistics and report totals that are updated chunk by chunk, so
+sensor files larger than memory can be processed in bounded memory
+"""
+
+import json
+import textwrap
+import numpy as np
+import pandas as pd
+
+# Distinct values counted per column before ExactMedians starts rounding
+MAX_DISTINCT_VALUES = 100000
+
+class RunningZoneStats:
+    """Per-zone min/max and mean/std, merged one chunk at a time
+
+    Min and max feed the per-zone normalization (zone_min_max layout);
+    count, mean and the sum of squared deviations are combined with Chan's
+    parallel update and feed anomaly detection (zone_moments layout).
+    Zones keep the order in which they were first seen.
+    """
+
+    def __init__(self, minmax_features, moment_columns):
+        self.minmax_features = list(minmax_features)
+        self.moment_columns = list(moment_columns)
+        self.zones = pd.Index([], dtype=object)
+        self.low = np.empty((0, len(self.minmax_features)))
+        self.high = np.empty((0, len(self.minmax_features)))
+        self.count = np.empty((0, len(self.moment_columns)))
+        self.mean = np.empty((0, len(self.moment_columns)))
+        self.m2 = np.empty((0, len(self.moment_columns)))
+        self.readings = np.empty(0, dtype=np.int64)
+
+    def _rows_for(self, zone_ids):
+        """Row of each zone, adding zones not seen before"""
+        rows = self.zones.get_indexer(zone_ids)
+        new = rows < 0
+        if new.any():
+            n_new = int(new.sum())
+            self.zones = self.zones.append(pd.Index(zone_ids[new], dtype=object))
+            self.low = np.vstack([self.low, np.full((n_new, self.low.shape[1]), np.nan)])
+            self.high = np.vstack([self.high, np.full((n_new, self.high.shape[1]), np.nan)])
+            for name in ('count', 'mean', 'm2'):
+                setattr(self, name, np.vstack([getattr(self, name), np.zeros((n_new, len(self.moment_columns)))]))
+            self.readings = np.append(self.readings, np.zeros(n_new, dtype=np.int64))
+            rows = self.zones.get_indexer(zone_ids)
+        return rows
+
+    def update(self, df):
+        """Fold one chunk of engineered rows into the running statistics"""
+        grouped = df.groupby('zone_id', sort=False)
+        sizes = grouped.size()
+        rows = self._rows_for(sizes.index)
+        self.readings[rows] += sizes.to_numpy()
+
+        features = [feature for feature in self.minmax_features if feature in df.columns]
+        if features:
+            extremes = grouped[features].agg(['min', 'max'])
+            slots = [self.minmax_features.index(feature) for feature in features]
+            for slot, feature in zip(slots, features):
+                # fmin/fmax ignore the NaN of a zone that had no values yet
+                self.low[rows, slot] = np.fmin(self.low[rows, slot], extremes[(feature, 'min')].to_numpy())
+                self.high[rows, slot] = np.fmax(self.high[rows, slot], extremes[(feature, 'max')].to_numpy())
+
+        columns = [column for column in self.moment_columns if column in df.columns]
+        if columns:
+            moments = grouped[columns].agg(['count', 'mean', 'var'])
+            for column in columns:
+                slot = self.moment_columns.index(column)
+                n_b = moments[(column, 'count')].to_numpy(dtype=np.float64)
+                mean_b = moments[(column, 'mean')].to_numpy()
+                m2_b = np.nan_to_num(moments[(column, 'var')].to_numpy()) * np.maximum(n_b - 1, 0)
+
+                n_a, mean_a, m2_a = self.count[rows, slot], self.mean[rows, slot], self.m2[rows, slot]
+                n = n_a + n_b
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    delta = np.nan_to_num(mean_b) - mean_a
+                    weight = np.where(n > 0, n_b / n, 0.0)
+                    self.mean[rows, slot] = mean_a + delta * weight
+                    self.m2[rows, slot] = m2_a + np.nan_to_num(m2_b) + delta ** 2 * n_a * weight
+                self.count[rows, slot] = n
+
+    def min_max_frame(self):
+        """Running extremes in DataProcessor.zone_min_max layout"""
+        columns = pd.MultiIndex.from_product([self.minmax_features, ['min', 'max']])
+        values = np.empty((len(self.zones), 2 * len(self.minmax_features)))
+        values[:, 0::2] = self.low
+        values[:, 1::2] = self.high
+        return pd.DataFrame(values, index=self.zones, columns=columns)
+
+    def moments_frame(self):
+        """Running mean/std and row counts in DataProcessor.zone_moments layout"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(self.count > 0, self.mean, np.nan)
+            std = np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+        stats = pd.DataFrame(index=self.zones)
+        for slot, column in enumerate(self.moment_columns):
+            stats[(column, 'mean')] = mean[:, slot]
+            stats[(column, 'std')] = std[:, slot]
+        stats[('readings', 'count')] = self.readings
+        stats.columns = pd.MultiIndex.from_tuples(stats.columns)
+        return stats
+    
+    def to_dict(self):
+        """JSON-ready state; from_dict restores it exactly"""
+        state = {'minmax_features': self.minmax_features, 'moment_columns': self.moment_columns,
+                 'zones': self.zones.tolist(), 'readings': self.readings.tolist()}
+        for name in ('low', 'high', 'count', 'mean', 'm2'):
+            state[name] = getattr(self, name).tolist()
+        return state
+    
+    @classmethod
+    def from_dict(cls, state):
+        stats = cls(state['minmax_features'], state['moment_columns'])
+        stats.zones = pd.Index(state['zones'], dtype=object)
+        stats.readings = np.asarray(state['readings'], dtype=np.int64)
+        for name in ('low', 'high'):
+            setattr(stats, name, np.asarray(state[name], dtype=np.float64).reshape(-1, len(stats.minmax_features)))
+        for name in ('count', 'mean', 'm2'):
+            setattr(stats, name, np.asarray(state[name], dtype=np.float64).reshape(-1, len(stats.moment_columns)))
+        return stats
+
+class ExactMedians:
+    """Column medians from per-value counts, merged chunk by chunk
+
+    Exact while a column has at most max_distinct distinct values, which
+    holds for sensor readings recorded at a fixed precision. Past that the
+    column's values are rounded to fewer decimal places until the counts
+    fit again, so memory stays bounded and its median becomes approximate:
+    off by at most half a rounding step (decimals lists the columns and
+    their final precision).
+    """
+    
+    def __init__(self, columns, max_distinct=MAX_DISTINCT_VALUES):
+        if max_distinct < 1:
+            raise ValueError("max_distinct must be at least 1")
+        self.columns = list(columns)
+        self.max_distinct = max_distinct
+        self.counts = {column: pd.Series(dtype=np.int64) for column in self.columns}
+        self.decimals = {}
+    
+    @property
+    def approximate(self):
+        return bool(self.decimals)
+    
+    def update(self, df):
+        for column in self.columns:
+            if column in df.columns:
+                values = df[column]
+                if column in self.decimals:
+                    values = values.round(self.decimals[column])
+                counts = values.value_counts()
+                self.counts[column] = self.counts[column].add(counts, fill_value=0).astype(np.int64)
+                if len(self.counts[column]) > self.max_distinct:
+                    self._coarsen(column)
+    
+    def _coarsen(self, column):
+        """Round a column's counted values until at most max_distinct remain"""
+        counts = self.counts[column]
+        values = counts.index.to_numpy(dtype=np.float64)
+        span = values.max() - values.min()
+        # A step of span / max_distinct leaves about max_distinct values
+        decimals = int(np.floor(-np.log10(span / self.max_distinct)))
+        decimals = min(decimals, self.decimals.get(column, decimals))
+        while True:
+            rounded = counts.groupby(np.round(values, decimals)).sum()
+            if len(rounded) <= self.max_distinct:
+                break
+            decimals -= 1
+        self.counts[column] = rounded.astype(np.int64)
+        self.decimals[column] = decimals
+    
+    def medians(self):
+        """{column: median}, as Series.median would give over every row seen
+
+        Columns listed in decimals give the median of their rounded values.
+        """
+        medians = {}
+        for column, counts in self.counts.items():
+            if counts.empty:
+                medians[column] = np.nan
+                continue
+            counts = counts.sort_index()
+            cumulative = counts.to_numpy().cumsum()
+            n = cumulative[-1]
+            # Values at sorted positions (n - 1) // 2 and n // 2
+            lower = counts.index[np.searchsorted(cumulative, (n - 1) // 2, side='right')]
+            upper = counts.index[np.searchsorted(cumulative, n // 2, side='right')]
+            medians[column] = float(np.mean([lower, upper]))
+        return medians
+
+class FileStatistics:
+    """Whole-file fill values and per-zone statistics from a first pass over a sensor file
+    
+    Saved as a JSON sidecar so later scoring runs can skip the first pass.
+    """
+    
+    def __init__(self, fill_values, zone_stats):
+        self.fill_values = fill_values
+        self.zone_stats = zone_stats
+    
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'fill_values': self.fill_values, 'zone_stats': self.zone_stats.to_dict()}, f)
+    
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            state = json.load(f)
+        return cls(state['fill_values'], RunningZoneStats.from_dict(state['zone_stats']))
+
+class SummaryAccumulator:
+    """Totals for DataProcessor.generate_summary_report, built chunk by chunk
+
+    Chunks must arrive in time order per zone: the latest row seen for a
+    zone supplies its current risk score and category.
+    """
+
+    def __init__(self):
+        self.total_records = 0
+        self.start = None
+        self.end = None
+        self.zones = {}
+
+    def update(self, df):
+        if df.empty:
+            return
+        self.total_records += len(df)
+        start, end = df['timestamp'].min(), df['timestamp'].max()
+        self.start = start if self.start is None else min(self.start, start)
+        self.end = end if self.end is None else max(self.end, end)
+
+        grouped = df.groupby('zone_id', sort=False)
+        totals = grouped.agg(
+            record_count=('displacement_mm', 'size'),
+            displacement_sum=('displacement_mm', 'sum'),
+            max_displacement=('displacement_mm', 'max'),
+            vibration_sum=('vibration_mm_s', 'sum'),
+            max_vibration=('vibration_mm_s', 'max')
+        )
+        # The last row of each zone, as iloc[-1] would pick it
+        latest = df.drop_duplicates('zone_id', keep='last').set_index('zone_id')
+        totals['current_risk_score'] = latest['risk_score_10']
+        totals['risk_category'] = latest['risk_category'].astype(object)
+        for zone_id, row in totals.iterrows():
+            zone = self.zones.get(zone_id)
+            if zone is None:
+                self.zones[zone_id] = row.to_dict()
+                continue
+            zone['record_count'] += row['record_count']
+            zone['displacement_sum'] += row['displacement_sum']
+            zone['vibration_sum'] += row['vibration_sum']
+            zone['max_displacement'] = max(zone['max_displacement'], row['max_displacement'])
+            zone['max_vibration'] = max(zone['max_vibration'], row['max_vibration'])
+            zone['current_risk_score'] = row['current_risk_score']
+            zone['risk_category'] = row['risk_category']
+
+    def report(self, processing_timestamp):
+        """The summary report, zones in sorted order as the in-memory report lists them"""
+        zone_summary = {}
+        for zone_id in sorted(self.zones):
+            zone = self.zones[zone_id]
+            zone_summary[zone_id] = {
+                'record_count': int(zone['record_count']),
+                'avg_displacement': float(zone['displacement_sum'] / zone['record_count']),
+                'max_displacement': float(zone['max_displacement']),
+                'avg_vibration': float(zone['vibration_sum'] / zone['record_count']),
+                'max_vibration': float(zone['max_vibration']),
+                'current_risk_score': float(zone['current_risk_score']),
+                'risk_category': str(zone['risk_category'])
+            }
+        return {
+            'processing_timestamp': processing_timestamp,
+            'total_records': self.total_records,
+            'zones_processed': len(self.zones),
+            'time_range': {
+                'start': self.start.isoformat() if self.start is not None else None,
+                'end': self.end.isoformat() if self.end is not None else None
+            },
+            'zone_summary': zone_summary
+        }
+
+class JsonArrayWriter:
+    """Writes a JSON array one item at a time, formatted like json.dump(items, indent=2)
+
+    The file is only created once the first item arrives.
+    """
+
+    def __init__(self, path, default=None):
+        self.path = path
+        self.default = default
+        self.count = 0
+        self._file = None
+
+    def write(self, items):
+        for item in items:
+            if self._file is None:
+                self._file = open(self.path, 'w')
+                self._file.write('[\n')
+            else:
+                self._file.write(',\n')
+            self._file.write(textwrap.indent(json.dumps(item, indent=2, default=self.default), '  '))
+            self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.write('\n]')
+            self._file.close()
+            self._file = None
@@ -0,0 +1,304 @@
+"""
+Inference Benchmark Script
+Measures prediction latency of the backend inference paths
+"""
+
+import sys
+import os
+import json
+import time
+import subprocess
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add paths to import modules
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+logging.disable(logging.WARNING)
+
+SENSOR_FILE = os.path.join(os.path.dirname(__file__), 'sample-data', 'demo_sensor.csv')
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+# Run in a fresh interpreter, like a newly forked API worker
+STARTUP_PROBE = """
+import sys, time, json, logging
+start = time.perf_counter()
+sys.path.insert(0, {backend!r})
+logging.disable(logging.WARNING)
+from app import RockfallAPI
+imported = time.perf_counter()
+api = RockfallAPI(model_path={model!r}, engine={engine!r})
+api.predict_risk({reading!r})
+done = time.perf_counter()
+memory = {{}}
+with open('/proc/self/smaps_rollup') as f:
+    for line in f:
+        parts = line.split()
+        if parts[0] in ('Rss:', 'Anonymous:'):
+            memory[parts[0][:-1]] = int(parts[1])
+print(json.dumps({{'startup_ms': (done - start) * 1000, 'load_ms': (done - imported) * 1000,
+                  'engine': api.inference_engine, **memory}}))
+"""
+
+def make_synthetic_readings(n_rows, seed=42):
+    """Jitter the demo readings into a larger data set with the same layout"""
+    rng = np.random.default_rng(seed)
+    demo = pd.read_csv(SENSOR_FILE)
+    df = demo.sample(n_rows, replace=True, random_state=seed).reset_index(drop=True)
+
+    noise = {
+        'displacement_mm': 2.0, 'vibration_mm_s': 0.6, 'temperature_c': 2.0,
+        'humidity_percent': 5.0, 'pressure_kpa': 0.3, 'accelerometer_x': 0.1,
+        'accelerometer_y': 0.1, 'accelerometer_z': 0.05
+    }
+    for col, scale in noise.items():
+        df[col] = df[col] + rng.normal(0, scale, n_rows)
+    df[['displacement_mm', 'vibration_mm_s']] = df[['displacement_mm', 'vibration_mm_s']].clip(lower=0)
+    df['timestamp'] = pd.Timestamp('2024-09-19') + pd.to_timedelta(np.arange(n_rows) // 4 * 15, unit='s')
+    return df
+
+def prepare_model(model_dir, train_rows=0):
+    """Train a model into a scratch directory (demo data, or a synthetic set)"""
+    from backend.train_model import RockfallRiskModel
+
+    data_file = SENSOR_FILE
+    if train_rows:
+        data_file = os.path.join(model_dir, 'train.csv')
+        make_synthetic_readings(train_rows).to_csv(data_file, index=False)
+
+    model_file = os.path.join(model_dir, 'ml_model.pkl')
+    model = RockfallRiskModel()
+    model.train(data_file)
+    model.save_model(model_file)
+    return model_file
+
+def load_readings():
+    """Demo sensor rows as API request payloads"""
+    df = pd.read_csv(SENSOR_FILE)
+    return df.drop(columns=['timestamp', 'zone_name', 'risk_factors']).to_dict('records')
+
+def legacy_predict(api, sensor_data):
+    """The original DataFrame-based single prediction, kept as the baseline"""
+    df = pd.DataFrame([sensor_data])
+    X = api.prepare_features(df)
+    X_scaled = api.scaler.transform(X)
+    risk_proba = api.model.predict_proba(X_scaled)
+    risk_pred = api.model.predict(X_scaled)
+    return {
+        'risk_level': risk_pred[0],
+        'risk_score': float(np.max(risk_proba[0]) * 10),
+        'risk_probabilities': {
+            label: float(prob) for label, prob in
+            zip(api.model.classes_, risk_proba[0])
+        }
+    }
+
+def time_calls(func, payloads, repeat):
+    """Latency of each call in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        for payload in payloads:
+            start = time.perf_counter()
+            func(payload)
+            timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+def report(name, timings):
+    print(f"{name:<28} p50={np.percentile(timings, 50):8.3f} ms  "
+          f"p99={np.percentile(timings, 99):8.3f} ms  n={len(timings)}")
+
+def bench_single(reference, api, readings, repeat):
+    """p50/p99 latency of one /predict reading, before and after"""
+    print("\n⏱️  Single reading latency")
+    # Warm up both paths before measuring
+    time_calls(lambda r: legacy_predict(reference, r), readings, 1)
+    time_calls(api.predict_risk, readings, 1)
+
+    report("legacy DataFrame path", time_calls(lambda r: legacy_predict(reference, r), readings, repeat))
+    report("predict_risk fast path", time_calls(api.predict_risk, readings, repeat))
+
+def bench_stage_timing(api, readings, repeat):
+    """Overhead of the per-stage latency spans on the single-reading path"""
+    from metrics import stage_timer
+
+    print("\n📏 Stage timing overhead")
+    time_calls(api.predict_risk, readings, 1)
+    report("spans disabled", time_calls(api.predict_risk, readings, repeat))
+    stage_timer.enabled = True
+    try:
+        report("spans enabled", time_calls(api.predict_risk, readings, repeat))
+    finally:
+        stage_timer.enabled = False
+        stage_timer.reset()
+
+def bench_prediction_cache(model_file, readings, repeat):
+    """Single-reading latency when every reading repeats (cache hits) against no cache"""
+    from backend.app import RockfallAPI
+
+    print("\n🧠 Prediction cache")
+    api = RockfallAPI(model_path=model_file, engine='compiled')
+    report("no cache", time_calls(api.predict_risk, readings, repeat))
+    cache = api.enable_prediction_cache()
+    report("cache (hits after 1st pass)", time_calls(api.predict_risk, readings, repeat))
+    stats = cache.stats()
+    print(f"hits={stats['hits']}  misses={stats['misses']}  entries={stats['entries']}")
+
+def bench_forest(api, forest, batch_sizes):
+    """sklearn predict_proba against the compiled forest across batch sizes"""
+    print("\n🌲 Forest evaluation per batch")
+    readings = make_synthetic_readings(max(batch_sizes), seed=7)
+
+    for batch_size in batch_sizes:
+        X = api.scale_features(api.prepare_features_batch(
+            {col: readings[col].to_numpy()[:batch_size] for col in api.feature_columns},
+            readings['zone_id'].tolist()[:batch_size]
+        ))
+        repeat = max(10, 2000 // batch_size)
+        sklearn_ms = time_calls(api.model.predict_proba, [X], repeat)
+        compiled_ms = time_calls(forest.predict_proba, [X], repeat)
+        identical = np.array_equal(api.model.predict_proba(X), forest.predict_proba(X))
+        print(f"batch={batch_size:<6} sklearn p50={np.percentile(sklearn_ms, 50):8.3f} ms  "
+              f"compiled p50={np.percentile(compiled_ms, 50):8.3f} ms  identical={identical}")
+
+def bench_batch_formats(api, batch_sizes, repeat):
+    """End-to-end /predict/batch handler time: JSON against packed float32 and Arrow"""
+    from backend import app as app_module
+    from backend import batch_formats
+
+    print("\n📦 /predict/batch request formats (handler time, Flask test client)")
+    app_module.api = api
+    client = app_module.app.test_client()
+    readings = make_synthetic_readings(max(batch_sizes), seed=11)
+    columns = api.input_columns
+
+    for batch_size in batch_sizes:
+        batch = readings.iloc[:batch_size]
+        zone_batch = batch.assign(zone_id='A')
+        payloads = {
+            'json': (json.dumps({'sensors': zone_batch[columns + ['zone_id']].to_dict('records')}),
+                     'application/json', '/predict/batch'),
+            'packed': (batch[columns].to_numpy(dtype='<f4').tobytes(),
+                       batch_formats.PACKED_MIMETYPE, '/predict/batch?zone_id=A')
+        }
+        if batch_formats.arrow_available():
+            import pyarrow as pa
+            table = pa.Table.from_pandas(zone_batch[columns + ['zone_id']], preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            payloads['arrow'] = (sink.getvalue().to_pybytes(), batch_formats.ARROW_MIMETYPE,
+                                 '/predict/batch')
+
+        line = f"batch={batch_size:<6}"
+        for name, (body, content_type, url) in payloads.items():
+            def post(_):
+                response = client.post(url, data=body, content_type=content_type)
+                assert response.status_code == 200
+            post(None)
+            timings = time_calls(post, [None], max(3, repeat * 100 // batch_size))
+            line += f" {name} p50={np.percentile(timings, 50):9.3f} ms ({len(body) / 1024:8.1f} KiB)"
+        print(line)
+    if not batch_formats.arrow_available():
+        print("⚠️  pyarrow not installed, Arrow format not measured")
+
+def bench_micro_batching(api, readings, threads=32, rounds=20):
+    """Concurrent /predict throughput with and without request coalescing"""
+    from concurrent.futures import ThreadPoolExecutor
+    from backend import app as app_module
+
+    print(f"\n🧺 Concurrent /predict ({threads} client threads, {api.inference_engine} engine)")
+    app_module.api = api
+    payloads = readings * rounds
+
+    def post(reading):
+        app_module.app.test_client().post('/predict', json=reading)
+
+    for label, wait_ms in (('direct', None), ('micro-batched 2ms', 2.0)):
+        if wait_ms is not None:
+            batcher = app_module.enable_micro_batching(max_wait_ms=wait_ms, max_batch=256)
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            start = time.perf_counter()
+            timings = np.array(list(pool.map(
+                lambda r: time_calls(post, [r], 1)[0], payloads)))
+            elapsed = time.perf_counter() - start
+        line = (f"{label:<20} {len(payloads) / elapsed:8.0f} req/s  "
+                f"p50={np.percentile(timings, 50):7.2f} ms  p99={np.percentile(timings, 99):7.2f} ms")
+        if wait_ms is not None:
+            metrics = batcher.metrics()
+            app_module.disable_micro_batching()
+            line += (f"  mean batch={metrics['batch_size']['sum'] / metrics['batch_size']['count']:.1f}"
+                     f"  mean queue wait={metrics['queue_wait_ms']['sum'] / metrics['queue_wait_ms']['count']:.2f} ms")
+        print(line)
+
+def bench_inference_pool(api, batch_sizes, workers):
+    """predict_risk_batch in-process against the process pool"""
+    print(f"\n🏭 Process-pool inference ({workers} workers, {os.cpu_count()} CPUs)")
+    readings = make_synthetic_readings(max(batch_sizes), seed=5)
+    readings = readings.drop(columns=['timestamp', 'zone_name', 'risk_factors']).to_dict('records')
+
+    in_process = {size: time_calls(api.predict_risk_batch, [readings[:size]], 5) for size in batch_sizes}
+    api.enable_inference_pool(workers)
+    try:
+        for size in batch_sizes:
+            api.predict_risk_batch(readings[:size])
+            pooled = time_calls(api.predict_risk_batch, [readings[:size]], 5)
+            print(f"batch={size:<7} in-process p50={np.percentile(in_process[size], 50):9.2f} ms  "
+                  f"pool p50={np.percentile(pooled, 50):9.2f} ms")
+    finally:
+        api.disable_inference_pool()
+
+def bench_startup(model_file, reading, runs):
+    """Worker start cost: pickled sklearn model against the memory-mapped artifact"""
+    print("\n🚀 Worker startup (fresh interpreter, first prediction included)")
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("⚠️  /proc/self/smaps_rollup not available, skipping")
+        return
+
+    for engine in ('sklearn', 'auto'):
+        probe = STARTUP_PROBE.format(backend=BACKEND_DIR, model=model_file,
+                                     engine=engine, reading=reading)
+        samples = [json.loads(subprocess.run([sys.executable, '-c', probe], check=True,
+                                             capture_output=True, text=True).stdout)
+                   for _ in range(runs)]
+        median = {key: float(np.median([sample[key] for sample in samples]))
+                  for key in ('startup_ms', 'load_ms', 'Rss', 'Anonymous')}
+        print(f"{samples[0]['engine']:<9} startup={median['startup_ms']:7.1f} ms  "
+              f"model load={median['load_ms']:7.1f} ms  RSS={median['Rss'] / 1024:6.1f} MB  "
+              f"private anon={median['Anonymous'] / 1024:6.1f} MB")
+
+def main():
+    """Run the inference benchmarks"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Rockfall Inference Benchmark')
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='Passes over the demo readings per measurement')
+    parser.add_argument('--train-rows', type=int, default=20000,
+                        help='Synthetic training rows (0 trains on the demo CSV)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Inference pool worker processes')
+
+    args = parser.parse_args()
+
+    from backend.app import RockfallAPI
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        model_file = prepare_model(model_dir, args.train_rows)
+        reference = RockfallAPI(model_path=model_file, engine='sklearn')
+        api = RockfallAPI(model_path=model_file, engine='compiled')
+        readings = load_readings()
+
+        bench_single(reference, api, readings, args.repeat)
+        bench_stage_timing(api, readings, args.repeat * 5)
+        bench_prediction_cache(model_file, readings, args.repeat * 5)
+        bench_forest(reference, api.forest, [1, 10, 100, 1000, 10000])
+        bench_batch_formats(api, [100, 1000, 10000], args.repeat)
+        for engine_api in (reference, api):
+            bench_micro_batching(engine_api, readings)
+        bench_inference_pool(RockfallAPI(model_path=model_file), [10000, 100000], args.workers)
+        bench_startup(model_file, readings[0], runs=3)
+
+if __name__ == "__main__":
+    main()
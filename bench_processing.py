@@ -0,0 +1,300 @@
+"""
+Data Processing Benchmark Script
+Measures the DataProcessor pipeline steps on large synthetic sensor files
+"""
+
+import sys
+import os
+import json
+import time
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add paths to import modules
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+logging.disable(logging.WARNING)
+
+from backend.process_data import NORMALIZED_FEATURES
+
+def synthetic_zone_ids(n_zones):
+    """The demo zones A-D, or generated ids when more zones are needed"""
+    if n_zones <= 4:
+        return ['A', 'B', 'C', 'D'][:n_zones]
+    return [f'Z{i:05d}' for i in range(n_zones)]
+
+def write_zones_file(path, zone_ids, seed=42):
+    """zones.json with random thresholds for every zone id"""
+    rng = np.random.default_rng(seed)
+    zones = []
+    for zone_id in zone_ids:
+        displacement_warning = float(np.round(rng.uniform(3, 7), 1))
+        vibration_warning = float(np.round(rng.uniform(1, 2), 1))
+        zones.append({
+            'zone_id': zone_id,
+            'zone_name': f'Zone_{zone_id}',
+            'risk_thresholds': {
+                'displacement_warning': displacement_warning,
+                'displacement_critical': displacement_warning + 3,
+                'vibration_warning': vibration_warning,
+                'vibration_critical': vibration_warning + 1
+            }
+        })
+    with open(path, 'w') as f:
+        json.dump({'zones': zones}, f)
+    return path
+
+def make_synthetic_sensor_data(n_rows, zone_ids=('A', 'B', 'C', 'D'), seed=42, start_row=0):
+    """Sensor readings in the demo CSV layout, one 15-second tick per zone
+
+    start_row continues the sequence of an earlier call, so a large file can
+    be written in blocks.
+    """
+    rng = np.random.default_rng(seed + start_row)
+    zone_ids = np.asarray(zone_ids, dtype=object)
+    rows = np.arange(start_row, start_row + n_rows)
+    zone = zone_ids[rows % len(zone_ids)]
+    tick = rows // len(zone_ids)
+
+    # A slow drift per zone plus noise, so rates and anomalies look plausible
+    drift = np.sin(tick / 500.0)
+    df = pd.DataFrame({
+        'timestamp': pd.Timestamp('2024-09-19') + pd.to_timedelta(tick * 15, unit='s'),
+        'zone_id': zone,
+        'zone_name': 'synthetic',
+        'displacement_mm': np.abs(4 + 2 * drift + rng.normal(0, 1.5, n_rows)).round(2),
+        'vibration_mm_s': np.abs(1.2 + 0.5 * drift + rng.normal(0, 0.5, n_rows)).round(2),
+        'temperature_c': (22 + rng.normal(0, 3, n_rows)).round(1),
+        'humidity_percent': (60 + rng.normal(0, 8, n_rows)).round(1),
+        'pressure_kpa': (101.3 + rng.normal(0, 0.4, n_rows)).round(2),
+        'accelerometer_x': rng.normal(0.1, 0.05, n_rows).round(3),
+        'accelerometer_y': rng.normal(0.1, 0.05, n_rows).round(3),
+        'accelerometer_z': rng.normal(9.8, 0.05, n_rows).round(3),
+        'risk_factors': 'synthetic'
+    })
+    # Occasional sensor dropouts
+    for col in ('temperature_c', 'humidity_percent'):
+        df.loc[rng.random(n_rows) < 0.001, col] = np.nan
+    return df
+
+def write_synthetic_file(path, n_rows, zone_ids=('A', 'B', 'C', 'D'), block_rows=1_000_000):
+    """Write a synthetic sensor CSV block by block, so n_rows may exceed memory"""
+    for start in range(0, n_rows, block_rows):
+        block = make_synthetic_sensor_data(min(block_rows, n_rows - start), zone_ids, start_row=start)
+        block.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    return path
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def bench_threshold_flags(input_file, reference_rows):
+    """Vectorized threshold flags against the per-row apply() they replace"""
+    from backend.process_data import DataProcessor
+
+    print("\n🚩 Threshold flags (displacement + vibration)")
+    processor = DataProcessor()
+    df = pd.read_csv(input_file, usecols=['zone_id', 'displacement_mm', 'vibration_mm_s'])
+
+    def vectorized(frame):
+        return (processor._threshold_flags(frame, 'displacement_mm', 'displacement'),
+                processor._threshold_flags(frame, 'vibration_mm_s', 'vibration'))
+
+    def per_row(frame):
+        return (frame.apply(lambda row: processor._check_threshold(row, 'displacement_mm', 'displacement'), axis=1),
+                frame.apply(lambda row: processor._check_threshold(row, 'vibration_mm_s', 'vibration'), axis=1))
+
+    sample = df.head(reference_rows)
+    expected, apply_seconds = timed(per_row, sample)
+    flags, _ = timed(vectorized, sample)
+    assert all(a.equals(b) for a, b in zip(flags, expected)), "Vectorized flags differ from apply()"
+
+    _, vectorized_seconds = timed(vectorized, df)
+    apply_rate = len(sample) / apply_seconds
+    print(f"apply(axis=1)   {apply_seconds:8.2f} s for {len(sample):,} rows "
+          f"({apply_rate:,.0f} rows/s, ~{len(df) / apply_rate:,.0f} s for all rows)")
+    print(f"np.select       {vectorized_seconds:8.2f} s for {len(df):,} rows "
+          f"({len(df) / vectorized_seconds:,.0f} rows/s)")
+
+def bench_zone_normalization(n_rows, zone_counts):
+    """Grouped min/max normalization against per-group transform lambdas"""
+    from backend.process_data import DataProcessor
+
+    print(f"\n📐 Per-zone min-max normalization ({len(NORMALIZED_FEATURES)} features, {n_rows:,} rows)")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_zones in zone_counts:
+            zone_ids = synthetic_zone_ids(n_zones)
+            processor = DataProcessor(write_zones_file(os.path.join(work_dir, 'zones.json'), zone_ids))
+            df = processor.engineer_features(make_synthetic_sensor_data(n_rows, zone_ids))
+
+            def per_group(frame):
+                return {feature: frame.groupby('zone_id')[feature].transform(
+                    lambda x: (x - x.min()) / (x.max() - x.min()) if x.max() > x.min() else 0
+                ) for feature in NORMALIZED_FEATURES}
+
+            def grouped(frame):
+                stats = processor.zone_min_max(frame, NORMALIZED_FEATURES)
+                return processor._normalize_per_zone(frame, NORMALIZED_FEATURES, stats)
+
+            expected, lambda_seconds = timed(per_group, df)
+            normalized, grouped_seconds = timed(grouped, df)
+            assert all(normalized[f].equals(expected[f]) for f in NORMALIZED_FEATURES)
+            print(f"zones={n_zones:<6} transform(lambda) {lambda_seconds:7.3f} s   "
+                  f"grouped min/max {grouped_seconds:7.3f} s   ({lambda_seconds / grouped_seconds:5.1f}x)")
+
+def bench_anomalies(n_rows, zone_counts):
+    """Mask-based anomaly detection against the original zone-by-zone loop"""
+    from backend.process_data import DataProcessor
+    from test_processing import reference_detect_anomalies
+
+    print(f"\n🔎 Anomaly detection ({n_rows:,} rows)")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_zones in zone_counts:
+            zone_ids = synthetic_zone_ids(n_zones)
+            processor = DataProcessor(write_zones_file(os.path.join(work_dir, 'zones.json'), zone_ids))
+            df = processor.engineer_features(make_synthetic_sensor_data(n_rows, zone_ids))
+
+            expected, loop_seconds = timed(reference_detect_anomalies, df)
+            frame, frame_seconds = timed(processor.anomaly_frame, df)
+            anomalies, list_seconds = timed(processor.detect_anomalies, df)
+            assert len(anomalies) == len(expected) == len(frame)
+            print(f"zones={n_zones:<6} loop {loop_seconds:7.2f} s   anomaly_frame {frame_seconds:6.2f} s   "
+                  f"detect_anomalies {list_seconds:6.2f} s   ({len(anomalies):,} anomalies)")
+
+def directory_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def bench_storage(n_rows, n_zones):
+    """Processed output as CSV against a zone/date partitioned Parquet dataset"""
+    from backend.process_data import DataProcessor
+    from backend.sensor_storage import read_sensor_data, write_sensor_data, parquet_available
+
+    print(f"\n🗄️ Processed output storage ({n_rows:,} rows, {n_zones} zones)")
+    if not parquet_available():
+        print("⚠️  pyarrow not installed, Parquet storage not measured")
+        return
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        zone_ids = synthetic_zone_ids(n_zones)
+        processor = DataProcessor(write_zones_file(os.path.join(work_dir, 'zones.json'), zone_ids))
+        df = processor.calculate_risk_scores(
+            processor.engineer_features(processor.clean_sensor_data(make_synthetic_sensor_data(n_rows, zone_ids))))
+        training_columns = ['zone_id', 'displacement_mm', 'vibration_mm_s', 'temperature_c', 'humidity_percent',
+                            'pressure_kpa', 'accelerometer_x', 'accelerometer_y', 'accelerometer_z']
+        day = df['timestamp'].iloc[len(df) // 2].strftime('%Y-%m-%d')
+
+        for name in ('processed.csv', 'processed.parquet'):
+            path = os.path.join(work_dir, name)
+            _, write_seconds = timed(write_sensor_data, df, path)
+            _, full_seconds = timed(read_sensor_data, path)
+            _, training_seconds = timed(lambda: read_sensor_data(path, columns=training_columns))
+            _, zone_day_seconds = timed(lambda: read_sensor_data(path, zone_id=zone_ids[0], date=day))
+            print(f"{name:<18} {directory_size(path) / 2**20:7.1f} MB   write {write_seconds:6.2f} s   "
+                  f"read all {full_seconds:6.2f} s   training columns {training_seconds:6.2f} s   "
+                  f"one zone/day {zone_day_seconds:6.3f} s")
+
+def bench_parallel_scaling(n_rows, n_zones, worker_counts):
+    """process_batch throughput from one process up to every core"""
+    from backend.process_data import DataProcessor
+
+    print(f"\n⚙️ Parallel per-zone processing ({n_rows:,} rows, {n_zones} zones, {os.cpu_count()} cores)")
+    with tempfile.TemporaryDirectory() as work_dir:
+        zone_ids = synthetic_zone_ids(n_zones)
+        processor = DataProcessor(write_zones_file(os.path.join(work_dir, 'zones.json'), zone_ids))
+        input_file = write_synthetic_file(os.path.join(work_dir, 'sensors.csv'), n_rows, zone_ids)
+        # Output is written by the parent either way; time the pipeline itself
+        df = pd.read_csv(input_file)
+
+        def run(workers):
+            if workers > 1:
+                return processor.process_zones_parallel(df, workers)
+            scored = processor.calculate_risk_scores(processor.engineer_features(processor.clean_sensor_data(df)))
+            return scored, processor.detect_anomalies(scored), processor.generate_summary_report(scored)
+
+        baseline = None
+        for workers in worker_counts:
+            (scored, anomalies, _), seconds = timed(run, workers)
+            baseline = baseline or seconds
+            print(f"workers={workers:<3} {seconds:7.2f} s   {len(scored) / seconds:10,.0f} rows/s   "
+                  f"speedup {baseline / seconds:4.2f}x   ({len(anomalies):,} anomalies)")
+
+PEAK_RSS_SCRIPT = '''
+import sys, json, logging, resource
+sys.path.insert(0, sys.argv[1])
+logging.disable(logging.WARNING)
+from process_data import DataProcessor
+processor = DataProcessor(sys.argv[2])
+chunk_rows = int(sys.argv[5])
+processor.process_batch(sys.argv[3], sys.argv[4], chunk_rows=chunk_rows or None, two_pass=sys.argv[6] == 'two-pass')
+print(json.dumps(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+'''
+
+def bench_chunked_memory(row_counts, chunk_rows, n_zones):
+    """Peak RSS of process_batch in memory, chunked and two-pass chunked, each in a fresh process"""
+    import subprocess
+
+    print(f"\n🧱 Peak memory and time, in-memory vs chunked ({chunk_rows:,}-row chunks, {n_zones} zones)")
+    backend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+    with tempfile.TemporaryDirectory() as work_dir:
+        zone_ids = synthetic_zone_ids(n_zones)
+        zones_file = write_zones_file(os.path.join(work_dir, 'zones.json'), zone_ids)
+        for n_rows in row_counts:
+            input_file = write_synthetic_file(os.path.join(work_dir, 'sensors.csv'), n_rows, zone_ids)
+            results = []
+            for mode, mode_rows in (('in-memory', 0), ('chunked', chunk_rows), ('two-pass', chunk_rows)):
+                start = time.perf_counter()
+                output = subprocess.run(
+                    [sys.executable, '-c', PEAK_RSS_SCRIPT, backend_dir, zones_file, input_file,
+                     os.path.join(work_dir, 'processed.csv'), str(mode_rows), mode],
+                    capture_output=True, text=True, check=True, cwd=work_dir).stdout
+                # ru_maxrss is in kilobytes on Linux
+                results.append(f"{mode} {json.loads(output.strip().splitlines()[-1]) / 1024:6.0f} MB "
+                               f"{time.perf_counter() - start:6.1f} s")
+            print(f"rows={n_rows:<10,} " + "   ".join(results))
+
+def main():
+    """Run the data processing benchmarks"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Rockfall Data Processing Benchmark')
+    parser.add_argument('--rows', type=int, default=10_000_000,
+                        help='Rows in the synthetic sensor file')
+    parser.add_argument('--reference-rows', type=int, default=200_000,
+                        help='Rows timed with the original per-row implementations')
+    parser.add_argument('--input', help='Existing sensor CSV instead of a synthetic file')
+    parser.add_argument('--scoring-rows', type=int, default=1_000_000,
+                        help='Rows for the in-memory scoring benchmarks')
+    parser.add_argument('--zones', type=int, nargs='+', default=[4, 1000, 5000],
+                        help='Zone counts for the per-zone benchmarks')
+    parser.add_argument('--memory-rows', type=int, nargs='+', default=[250_000, 1_000_000, 4_000_000],
+                        help='File sizes for the peak memory comparison')
+    parser.add_argument('--chunk-rows', type=int, default=100_000,
+                        help='Chunk size for the chunked processing benchmark')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=list(range(1, (os.cpu_count() or 1) + 1)),
+                        help='Worker counts for the parallel scaling benchmark')
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_file = args.input
+        if input_file is None:
+            input_file = os.path.join(work_dir, 'sensors.csv')
+            print(f"Writing {args.rows:,} synthetic rows...")
+            write_synthetic_file(input_file, args.rows)
+
+        bench_threshold_flags(input_file, args.reference_rows)
+
+    bench_zone_normalization(args.scoring_rows, args.zones)
+    bench_anomalies(args.scoring_rows, args.zones)
+    bench_storage(args.scoring_rows, 100)
+    bench_parallel_scaling(args.scoring_rows, 1000, args.workers)
+    bench_chunked_memory(args.memory_rows, args.chunk_rows, 100)
+
+if __name__ == "__main__":
+    main()
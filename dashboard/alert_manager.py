@@ -309,10 +309,16 @@ class AlertManager:
             logger.error(f"Error sending notifications: {e}")
     
     def save_alerts(self):
-        """Save alerts to CSV file"""
+        """Save alerts to CSV file
+        
+        The file is replaced through a temporary file, so readers such as
+        the API's AlertLog never see a half-written or rewritten-in-place file.
+        """
         try:
             df = pd.DataFrame(self.alert_history)
-            df.to_csv(self.alerts_file, index=False)
+            temp_file = f"{self.alerts_file}.tmp"
+            df.to_csv(temp_file, index=False)
+            os.replace(temp_file, self.alerts_file)
         except Exception as e:
             logger.error(f"Error saving alerts: {e}")
     
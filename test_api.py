@@ -0,0 +1,617 @@
+"""
+API Endpoint Test Script
+Exercises the Flask endpoints through the test client
+"""
+
+import sys
+import os
+import json
+import shutil
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add paths to import modules
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+logging.disable(logging.WARNING)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'sample-data')
+
+def get_client():
+    """Flask test client for the main API"""
+    from backend import app as app_module
+    return app_module, app_module.app.test_client()
+
+def test_cached_zones_and_alerts():
+    """File-backed endpoints must serve cached bytes and honour If-None-Match"""
+    print("\n🗄️ Testing /zones and /alerts caching...")
+
+    app_module, client = get_client()
+    with open(os.path.join(DATA_DIR, 'zones.json')) as f:
+        zones = json.load(f)
+
+    response = client.get('/zones')
+    assert response.status_code == 200
+    assert response.get_json() == zones
+    etag = response.headers['ETag']
+
+    repeat = client.get('/zones', headers={'If-None-Match': etag})
+    assert repeat.status_code == 304
+    assert repeat.data == b''
+
+    alerts = client.get('/alerts')
+    assert alerts.status_code == 200
+    expected = pd.read_csv(os.path.join(DATA_DIR, 'fake_alerts.csv'))
+    assert len(alerts.get_json()['alerts']) == len(expected)
+    assert [alert['alert_id'] for alert in alerts.get_json()['alerts']] == expected['alert_id'].tolist()
+    assert client.get('/alerts', headers={'If-None-Match': alerts.headers['ETag']}).status_code == 304
+    print("✅ Cached responses served with ETags and 304 revalidation")
+
+def test_cache_follows_file_changes():
+    """Changing a backing file must produce a new body and a new ETag"""
+    print("\n🔁 Testing cache invalidation on file change...")
+
+    app_module, client = get_client()
+    work_dir = tempfile.mkdtemp(prefix='rockfall_cache_')
+    alerts_path = os.path.join(work_dir, 'fake_alerts.csv')
+    zones_path = os.path.join(work_dir, 'zones.json')
+    shutil.copy(os.path.join(DATA_DIR, 'fake_alerts.csv'), alerts_path)
+    shutil.copy(os.path.join(DATA_DIR, 'zones.json'), zones_path)
+
+    original_alerts, original_zones = app_module.alert_log, app_module.api.zones_path
+    app_module.alert_log = app_module.AlertLog(alerts_path)
+    app_module.api.zones_path = zones_path
+    try:
+        before = client.get('/alerts')
+        with open(alerts_path, 'a') as f:
+            f.write('ALT999,2024-09-20 10:00:00,A,North_Pit_Wall,WARNING,6.5,'
+                    'high_displacement,Monitor closely,ACTIVE,,,,,,\n')
+        after = client.get('/alerts', headers={'If-None-Match': before.headers['ETag']})
+        assert after.status_code == 200
+        assert after.headers['ETag'] != before.headers['ETag']
+        assert after.get_json()['alerts'][-1]['alert_id'] == 'ALT999'
+
+        with open(zones_path) as f:
+            zones = json.load(f)
+        zones['zones'][0]['risk_thresholds']['displacement_warning'] = 1.0
+        with open(zones_path, 'w') as f:
+            json.dump(zones, f)
+        assert client.get('/zones').get_json() == zones
+        # The rule engine follows the reloaded thresholds
+        assert app_module.api.zone_index.thresholds_for('A')['displacement_warning'] == 1.0
+    finally:
+        app_module.alert_log = original_alerts
+        app_module.api.zones_path = original_zones
+        client.get('/zones')
+    print("✅ Cache rebuilt after file changes")
+
+def test_incremental_alert_log():
+    """Appended alerts are parsed incrementally and filters match pandas"""
+    print("\n📜 Testing incremental alert log...")
+
+    import numpy as np
+    from backend.alert_log import AlertLog
+
+    work_dir = tempfile.mkdtemp(prefix='rockfall_alerts_')
+    alerts_path = os.path.join(work_dir, 'fake_alerts.csv')
+    source = pd.read_csv(os.path.join(DATA_DIR, 'fake_alerts.csv'))
+    source.iloc[:5].to_csv(alerts_path, index=False)
+
+    log = AlertLog(alerts_path)
+    assert log.refresh() == 5
+    assert log.refresh() == 0
+
+    # Append the remaining rows, the last one still being written
+    rest = source.iloc[5:].to_csv(index=False, header=False)
+    with open(alerts_path, 'a') as f:
+        f.write(rest[:-20])
+    assert log.refresh() == len(source) - 6
+    with open(alerts_path, 'a') as f:
+        f.write(rest[-20:])
+    assert log.refresh() == 1
+    offset = log.offset
+
+    def expected(df):
+        return [{key: (None if isinstance(value, float) and np.isnan(value) else value)
+                 for key, value in row.items()} for row in df.to_dict('records')]
+
+    assert log.query() == expected(source)
+    assert log.query(zone_id='B') == expected(source[source['zone_id'] == 'B'])
+    assert log.query(status='ACTIVE', limit=2) == expected(source[source['status'] == 'ACTIVE'].tail(2))
+    since = pd.Timestamp(source['timestamp'].iloc[6])
+    assert log.query(since=since) == expected(source[pd.to_datetime(source['timestamp']) > since])
+    assert log.query(limit=0) == []
+
+    # A rewrite in place (as AlertManager.save_alerts does) is read from scratch
+    rewritten = source.copy()
+    rewritten.loc[0, 'status'] = 'ACKNOWLEDGED'
+    rewritten.to_csv(alerts_path, index=False)
+    log.refresh()
+    assert log.query(limit=len(source))[0]['status'] == 'ACKNOWLEDGED'
+    assert len(log) == len(source) and log.offset != offset
+
+    # A same-size rewrite in place is caught by its modification time
+    with open(alerts_path, 'r+b') as f:
+        data = f.read()
+        f.seek(0)
+        f.write(data.replace(b'ACKNOWLEDGED', b'ACKNOWLEDGEX', 1))
+    stat = os.stat(alerts_path)
+    os.utime(alerts_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    log.refresh()
+    assert log.query(limit=len(source))[0]['status'] == 'ACKNOWLEDGEX'
+    assert log.refresh() == 0
+
+    # The endpoint answers the same filters
+    app_module, client = get_client()
+    original = app_module.alert_log
+    app_module.alert_log = log
+    try:
+        response = client.get('/alerts?zone_id=B&limit=1')
+        assert response.get_json()['alerts'] == log.query(zone_id='B', limit=1)
+        assert client.get('/alerts?limit=-3').status_code == 400
+        assert client.get('/alerts?since=yesterday-ish').status_code == 400
+    finally:
+        app_module.alert_log = original
+    print(f"✅ Incremental alert log matches pandas on {len(source)} alerts")
+
+def test_predict_stream():
+    """NDJSON readings are scored in chunks and streamed back line by line"""
+    print("\n🌊 Testing /predict/stream...")
+
+    import io
+
+    app_module, client = get_client()
+    readings = pd.read_csv(os.path.join(DATA_DIR, 'demo_sensor.csv')).drop(
+        columns=['timestamp', 'zone_name', 'risk_factors']).to_dict('records')
+    lines = [json.dumps(reading) for reading in readings]
+    lines[3:3] = ['{not json', '', '[1, 2]', json.dumps({'zone_id': 'B', 'displacement_mm': 'x'})]
+    body = ('\n'.join(lines) + '\n').encode()
+
+    response = client.post('/predict/stream', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    results = [json.loads(line) for line in response.data.decode().splitlines()]
+
+    # One result per non-blank line, errors reported in place
+    assert [result['line'] for result in results] == [n for n in range(1, len(lines) + 1) if n != 5]
+    assert [result['line'] for result in results if 'error' in result] == [4, 6, 7]
+
+    batch = client.post('/predict/batch', json={'sensors': readings}).get_json()['results']
+    streamed = [result for result in results if 'error' not in result]
+    assert [r['prediction'] for r in streamed] == [r['prediction'] for r in batch]
+
+    # Chunk boundaries must not change the results
+    chunks = list(app_module.stream_predictions(
+        app_module.read_ndjson_lines(io.BytesIO(body)), chunk_rows=3))
+    assert len(chunks) == -(-len(results) // 3)
+    assert [json.loads(line) for line in ''.join(chunks).splitlines()] == results
+
+    # Oversized lines are skipped without reading them into memory whole
+    oversized = io.BytesIO(b'{"a": "' + b'x' * 5000 + b'"}\n' + lines[0].encode() + b'\n')
+    parsed = list(app_module.read_ndjson_lines(oversized, max_line_bytes=1024))
+    assert parsed[0][2].startswith('Line exceeds') and parsed[1][1] == readings[0]
+    print(f"✅ Streamed {len(results)} results with per-line errors")
+
+def test_binary_batch_formats():
+    """Packed float32 batches must score exactly like the JSON batch path"""
+    print("\n🧮 Testing binary batch formats...")
+
+    from test_inference import get_model_path, _MODEL_DIR
+
+    app_module, client = get_client()
+    original_api = app_module.api
+    try:
+        app_module.api = app_module.RockfallAPI(model_path=get_model_path())
+        check_binary_batches(app_module, client, app_module.api)
+
+        # Without a model every record goes through the threshold rules
+        app_module.api = app_module.RockfallAPI(model_path=os.path.join(_MODEL_DIR, 'missing.pkl'))
+        check_binary_batches(app_module, client, app_module.api)
+    finally:
+        app_module.api = original_api
+
+def check_binary_batches(app_module, client, api):
+    import numpy as np
+    from backend import batch_formats
+    from backend.rule_engine import RISK_LEVELS
+
+    columns = api.input_columns
+    demo = pd.read_csv(os.path.join(DATA_DIR, 'demo_sensor.csv'))
+    readings = demo.drop(columns=['timestamp', 'zone_name', 'risk_factors']).to_dict('records')
+
+    # Matrix scoring agrees with the dict-based batch path row for row
+    raw = demo[columns].to_numpy(dtype=np.float64)
+    raw[2, 0] = np.nan  # falls back to the threshold rules
+    readings[2]['displacement_mm'] = None
+    levels, scores, probabilities = api.predict_risk_matrix(raw, demo['zone_id'].tolist())
+    for i, expected in enumerate(api.predict_risk_batch(readings)):
+        assert RISK_LEVELS[levels[i]] == expected['risk_level']
+        assert scores[i] == expected['risk_score']
+        assert dict(zip(RISK_LEVELS, probabilities[i].tolist())) == {
+            level: expected['risk_probabilities'].get(level, 0.0) for level in RISK_LEVELS}
+
+    # Packed float32 request for one zone, answered in the same layout
+    zone_a = demo[demo['zone_id'] == 'A']
+    packed = zone_a[columns].to_numpy(dtype='<f4')
+    response = client.post('/predict/batch?zone_id=A', data=packed.tobytes(),
+                           content_type=batch_formats.PACKED_MIMETYPE)
+    assert response.status_code == 200
+    assert response.mimetype == batch_formats.PACKED_MIMETYPE
+    assert response.headers['X-Feature-Columns'].split(',') == columns
+    results = np.frombuffer(response.data, dtype='<f4').reshape(-1, len(batch_formats.RESULT_COLUMNS))
+    expected_levels, expected_scores, _ = api.predict_risk_matrix(packed, ['A'] * len(packed))
+    assert np.array_equal(results[:, 0], expected_levels)
+    assert np.array_equal(results[:, 1], expected_scores.astype('<f4'))
+
+    bad = client.post('/predict/batch', data=b'\x00' * 7, content_type=batch_formats.PACKED_MIMETYPE)
+    assert bad.status_code == 400
+
+    if batch_formats.arrow_available():
+        import pyarrow as pa
+        table = pa.Table.from_pandas(demo[columns + ['zone_id']], preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        response = client.post('/predict/batch', data=sink.getvalue().to_pybytes(),
+                               content_type=batch_formats.ARROW_MIMETYPE)
+        result = pa.ipc.open_stream(response.data).read_all()
+        _, arrow_scores, _ = api.predict_risk_matrix(demo[columns].to_numpy(), demo['zone_id'].tolist())
+        assert result.column('risk_score').to_pylist() == arrow_scores.tolist()
+    else:
+        response = client.post('/predict/batch', data=b'', content_type=batch_formats.ARROW_MIMETYPE)
+        assert response.status_code == 415
+        print("⚠️ pyarrow not installed, Arrow round trip skipped")
+    print(f"✅ Binary batches match the JSON path on {len(readings)} readings "
+          f"({'model' if api.model_loaded else 'rules'})")
+
+def test_micro_batching():
+    """Concurrent /predict calls are coalesced without changing their results"""
+    print("\n🧺 Testing /predict micro-batching...")
+
+    from concurrent.futures import ThreadPoolExecutor
+    from test_inference import get_model_path
+
+    app_module, client = get_client()
+    readings = pd.read_csv(os.path.join(DATA_DIR, 'demo_sensor.csv')).drop(
+        columns=['timestamp', 'zone_name', 'risk_factors']).to_dict('records')
+
+    original_api = app_module.api
+    app_module.api = app_module.RockfallAPI(model_path=get_model_path())
+    try:
+        expected = [client.post('/predict', json=r).get_json()['prediction'] for r in readings]
+
+        batcher = app_module.enable_micro_batching(max_wait_ms=20, max_batch=8)
+
+        def post(reading):
+            return app_module.app.test_client().post('/predict', json=reading).get_json()['prediction']
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            coalesced = list(pool.map(post, readings * 4))
+        # Non-finite readings are rejected before they reach the batcher
+        nan_reading = {**readings[0], 'temperature_c': 'nan'}
+        assert app_module.app.test_client().post('/predict', json=nan_reading).status_code == 400
+
+        metrics = client.get('/').get_json()['micro_batching']
+
+        # A stopped batcher refuses work and /predict scores directly
+        batcher.stop()
+        assert post(readings[0]) == expected[0]
+    finally:
+        app_module.disable_micro_batching()
+        app_module.api = original_api
+
+    assert coalesced == expected * 4
+    assert metrics['batch_size']['count'] < len(readings) * 4
+    assert metrics['queue_wait_ms']['count'] == len(readings) * 4
+    assert metrics['batch_size']['buckets']['+Inf'] == metrics['batch_size']['count']
+    assert batcher.batch_sizes.snapshot()['buckets']['4'] < metrics['batch_size']['count']
+
+    # Submitters racing stop() all finish, scored or refused, and none hangs
+    import time
+    from backend.micro_batcher import MicroBatcher
+
+    slow = MicroBatcher(lambda batch: time.sleep(0.005) or [len(batch)] * len(batch),
+                        max_wait_ms=1, max_batch=4).start()
+
+    def racing_submit(_):
+        try:
+            return slow.submit({})
+        except RuntimeError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        futures = [pool.submit(racing_submit, i) for i in range(64)]
+        time.sleep(0.01)
+        slow.stop()
+        outcomes = [future.result(timeout=5) for future in futures]
+    assert not slow.running and len(outcomes) == 64
+    assert racing_submit(None) is None
+    print(f"✅ {len(coalesced)} requests scored in {metrics['batch_size']['count']} batches")
+
+def test_stage_metrics():
+    """Stage timing fills the /metrics histograms only while it is enabled"""
+    print("\n⏱️ Testing per-stage latency metrics...")
+
+    from test_inference import get_model_path
+    from metrics import stage_timer
+
+    app_module, client = get_client()
+    reading = {'zone_id': 'A', 'displacement_mm': 3.5, 'vibration_mm_s': 1.2}
+
+    original_api = app_module.api
+    app_module.api = app_module.RockfallAPI(model_path=get_model_path())
+    stage_timer.reset()
+    try:
+        # Disabled spans are shared no-ops and record nothing
+        assert stage_timer.span('predict') is stage_timer.span('other')
+        client.post('/predict', json=reading)
+        assert stage_timer.histograms == {}
+
+        app_module.enable_stage_timing()
+        for _ in range(3):
+            assert client.post('/predict', json=reading).status_code == 200
+        client.post('/predict/batch', json={'sensors': [reading]})
+        # A packed record with a NaN reading takes the rule fallback
+        from backend.batch_formats import PACKED_MIMETYPE
+        record = np.ones((1, len(app_module.api.input_columns)), dtype='<f4')
+        record[0, 0] = np.nan
+        client.post('/predict/batch?zone_id=B', data=record.tobytes(), content_type=PACKED_MIMETYPE)
+        response = client.get('/metrics')
+    finally:
+        app_module.enable_stage_timing(False)
+        app_module.api = original_api
+        stage_timer.reset()
+
+    text = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    for stage in ('parse_request', 'validate_request', 'prepare_features', 'model_predict',
+                  'recommendation', 'serialize_response', 'rule_fallback'):
+        assert f'rockfall_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}}' in text, stage
+    assert 'rockfall_stage_duration_seconds_count{stage="validate_request"} 4' in text
+    assert 'rockfall_request_duration_seconds_count{endpoint="predict"} 3' in text
+    assert 'rockfall_model_reloads_total' in text
+    assert 'rockfall_response_cache_hits_total' in text
+    # Buckets are cumulative and exported in seconds
+    assert 'le="0.001"' in text
+    print(f"✅ /metrics exported {text.count('_bucket{')} bucket lines")
+
+def test_prediction_cache():
+    """Quantized readings share a prediction until the model or zones change"""
+    print("\n🧠 Testing the prediction cache...")
+
+    from test_inference import get_model_path
+
+    app_module, client = get_client()
+    work_dir = tempfile.mkdtemp(prefix='rockfall_prediction_cache_')
+    zones_path = os.path.join(work_dir, 'zones.json')
+    shutil.copy(os.path.join(DATA_DIR, 'zones.json'), zones_path)
+    readings = pd.read_csv(os.path.join(DATA_DIR, 'demo_sensor.csv')).drop(
+        columns=['timestamp', 'zone_name', 'risk_factors']).to_dict('records')
+
+    original_api = app_module.api
+    api = app_module.api = app_module.RockfallAPI(model_path=get_model_path())
+    api.zones_path = zones_path
+    try:
+        expected = [api.predict_risk(reading) for reading in readings]
+        cache = api.enable_prediction_cache(max_entries=4)
+
+        reading = readings[0]
+        first = api.predict_risk(reading)
+        # Below the sensor resolution: same key, cached result
+        jittered = api.predict_risk({**reading, 'displacement_mm': reading['displacement_mm'] + 0.001})
+        assert first == jittered == expected[0]
+        assert (cache.hits, cache.misses) == (1, 1)
+        # Callers get copies, so mutating one can't corrupt the cache
+        jittered['risk_probabilities'].clear()
+        assert api.predict_risk(reading) == expected[0]
+
+        # A real change is a miss; non-finite readings bypass the cache
+        api.predict_risk({**reading, 'displacement_mm': reading['displacement_mm'] + 0.5})
+        assert cache.misses == 2
+        api.predict_risk({**reading, 'temperature_c': float('nan')})
+        assert cache.misses == 2
+
+        # Cached results match uncached ones, and eviction keeps the size bounded
+        assert [api.predict_risk(r) for r in readings] == expected
+        assert len(cache) == 4
+
+        # A model reload empties the cache
+        api.reload_model()
+        api.predict_risk(reading)
+        assert cache.invalidations == 1 and len(cache) == 1
+
+        # So does a changed zones.json, picked up on the next /predict
+        assert client.post('/predict', json=reading).status_code == 200
+        invalidations = cache.invalidations
+        with open(zones_path) as f:
+            zones = json.load(f)
+        zones['zones'][0]['risk_thresholds']['displacement_warning'] = 1.25
+        with open(zones_path, 'w') as f:
+            json.dump(zones, f)
+        client.post('/predict', json=reading)
+        assert cache.invalidations == invalidations + 1
+        client.post('/predict', json=reading)
+        assert cache.invalidations == invalidations + 1
+
+        stats = client.get('/').get_json()['prediction_cache']
+        assert stats['hits'] == cache.hits and stats['max_entries'] == 4
+        assert 'rockfall_prediction_cache_hits_total' in client.get('/metrics').get_data(as_text=True)
+    finally:
+        app_module.api = original_api
+        client.get('/zones')
+    print(f"✅ {cache.hits} hits, {cache.misses} misses, {cache.invalidations} invalidations")
+
+def test_live_features():
+    """Live readings get the rates and moving averages of the batch pipeline"""
+    print("\n📈 Testing live feature state...")
+
+    from test_inference import get_model_path
+    from backend.process_data import DataProcessor
+    from backend.feature_state import LIVE_FEATURE_COLUMNS
+
+    app_module, client = get_client()
+    df = pd.read_csv(os.path.join(DATA_DIR, 'demo_sensor.csv'))
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    engineered = DataProcessor().engineer_features(df.copy())
+    readings = df.drop(columns=['timestamp', 'zone_name', 'risk_factors']).to_dict('records')
+
+    original_api = app_module.api
+    api = app_module.api = app_module.RockfallAPI(model_path=get_model_path())
+    try:
+        state = api.enable_live_features()
+        # The file is in time order, so arrival order matches the batch sort
+        for i, reading in enumerate(readings):
+            body = client.post('/predict', json=reading).get_json()
+            for col in LIVE_FEATURE_COLUMNS:
+                assert np.isclose(body['features'][col], engineered.loc[i, col]), (i, col)
+            # Scored with the live rates, not zeros
+            rates = {col: engineered.loc[i, col] for col in ('displacement_rate', 'vibration_rate')}
+            assert body['prediction'] == api.predict_risk({**reading, **rates})
+        assert state.stats()['sensors'] == 4 and state.updates == len(readings)
+        assert any(engineered['displacement_rate'] != 0)
+
+        # /predict/batch records its rows in order, each sensor separately
+        state.clear()
+        tagged = [{**reading, 'sensor_id': 'S1'} for reading in readings]
+        batch = client.post('/predict/batch', json={'sensors': tagged}).get_json()['results']
+        state.clear()
+        singles = [client.post('/predict', json=reading).get_json()['prediction'] for reading in tagged]
+        assert [result['prediction'] for result in batch] == singles
+
+        # /predict/stream validates and defaults rows before tracking them
+        state.clear()
+        updates = state.updates
+        lines = [json.dumps({**reading, 'temperature_c': str(reading['temperature_c'])}) for reading in tagged]
+        lines.insert(3, json.dumps({**tagged[0], 'displacement_mm': 'x'}))
+        body = ('\n'.join(lines) + '\n').encode()
+        streamed = [json.loads(line) for line in client.post(
+            '/predict/stream', data=body, content_type='application/x-ndjson').data.decode().splitlines()]
+        assert 'displacement_mm' in streamed[3]['error']
+        assert [r['prediction'] for r in streamed if 'error' not in r] == singles
+        assert state.updates == updates + len(tagged)
+        api.live_features({**readings[0], 'sensor_id': 'S2'}, 'S2')
+        assert len(state) == 5
+
+        # Untrackable readings are scored without rates and leave the state alone
+        updates = state.updates
+        untracked = {**readings[0], 'displacement_mm': float('nan')}
+        assert api.live_features(untracked) == (untracked, None)
+        assert api.live_features({'zone_id': 'A', 'displacement_mm': 1.0})[1] is None
+        assert api.live_features(readings[0], ['S1']) == (readings[0], None)
+        assert state.update(['A'], readings[0]) is None
+        features = state.update_columns([{'id': 'A'}, 'A'], {
+            col: np.array([readings[0][col]] * 2, dtype=np.float64) for col in readings[0] if col != 'zone_id'
+        }, sensor_ids=['S1', {'id': 'S1'}])
+        assert features['displacement_rate'] == [None, None]
+        assert state.updates == updates
+
+        assert client.get('/').get_json()['live_features']['updates'] == state.updates
+    finally:
+        app_module.api = original_api
+    print(f"✅ {len(readings)} live readings matched engineer_features")
+
+def test_request_validation():
+    """/predict and /predict/batch share one schema and report bad rows by index"""
+    print("\n🧾 Testing request validation...")
+
+    from test_inference import get_model_path
+
+    app_module, client = get_client()
+    validator = app_module.reading_validator
+    readings = pd.read_csv(os.path.join(DATA_DIR, 'demo_sensor.csv')).drop(
+        columns=['timestamp', 'zone_name', 'risk_factors']).to_dict('records')[:4]
+
+    original_api = app_module.api
+    api = app_module.api = app_module.RockfallAPI(model_path=get_model_path())
+    try:
+        missing = client.post('/predict', json={'zone_id': 'A', 'displacement_mm': 1.0})
+        assert missing.status_code == 400
+        assert missing.get_json()['error'] == 'Missing required field: vibration_mm_s'
+        garbage = client.post('/predict', json={'zone_id': 'A', 'displacement_mm': 'x',
+                                                'vibration_mm_s': 1.0})
+        assert garbage.status_code == 400
+        assert 'displacement_mm' in garbage.get_json()['error']
+        nested = client.post('/predict', json={**readings[0], 'zone_id': ['A']})
+        assert nested.status_code == 400
+        assert 'zone_id' in nested.get_json()['error']
+
+        minimal = {'zone_id': 'B', 'displacement_mm': '9.5', 'vibration_mm_s': 0.5}
+        sensors = readings[:2] + [
+            'not a reading',
+            {'zone_id': 'B', 'displacement_mm': 'broken', 'vibration_mm_s': [1]},
+            minimal,
+            {'displacement_mm': 1.0}
+        ] + readings[2:] + [
+            {**readings[0], 'zone_id': {'id': 'A'}},
+            {**readings[0], 'sensor_id': ['S1']}
+        ]
+        body = client.post('/predict/batch', json={'sensors': sensors}).get_json()
+
+        assert [error['index'] for error in body['errors']] == [2, 3, 5, 8, 9]
+        assert 'zone_id' in body['errors'][3]['error'] and 'sensor_id' in body['errors'][4]['error']
+        assert body['errors'][1]['error'].count('Invalid value') == 2
+        assert 'zone_id' in body['errors'][2]['error'] and 'vibration_mm_s' in body['errors'][2]['error']
+        assert [result['index'] for result in body['results']] == [0, 1, 4, 6, 7]
+        # Valid rows get the same defaults and predictions as /predict
+        for result in body['results']:
+            single = client.post('/predict', json=sensors[result['index']]).get_json()
+            assert result['prediction'] == single['prediction']
+        assert body['results'][0]['prediction'] == api.predict_risk(validator.validate(sensors[0]))
+
+        # NaN and infinite readings get the same field error on every endpoint
+        for value in (float('nan'), float('inf'), float('-inf'), 'NaN', 'Infinity'):
+            bad = {**readings[0], 'vibration_mm_s': value}
+            single = client.post('/predict', json=bad)
+            assert single.status_code == 400
+            assert single.get_json()['error'] == f'Invalid value for vibration_mm_s: {value!r}'
+            batched = client.post('/predict/batch', json={'sensors': [bad]}).get_json()
+            assert batched['results'] == []
+            assert batched['errors'] == [{'index': 0, 'error': single.get_json()['error']}]
+            streamed = json.loads(client.post('/predict/stream', data=(json.dumps(bad) + '\n').encode(),
+                                              content_type='application/x-ndjson').data)
+            assert streamed == {'line': 1, 'error': single.get_json()['error']}
+
+        batch = validator.validate_batch(sensors)
+        assert all(values.dtype == np.float64 for values in batch.columns.values())
+        assert batch.columns['temperature_c'][4] == 22.0
+        assert batch.columns['displacement_mm'][4] == 9.5
+        assert validator.validate(minimal) == {**validator.validate(minimal), 'temperature_c': 22.0}
+    finally:
+        app_module.api = original_api
+    print(f"✅ {len(body['results'])} rows scored, {len(body['errors'])} rejected by index")
+
+def run_api_tests():
+    """Run all API endpoint tests"""
+    print("🚀 Starting API Endpoint Tests")
+    print("=" * 60)
+
+    tests = [
+        ("Cached Zones and Alerts", test_cached_zones_and_alerts),
+        ("Cache Invalidation", test_cache_follows_file_changes),
+        ("Incremental Alert Log", test_incremental_alert_log),
+        ("Streaming Predictions", test_predict_stream),
+        ("Binary Batch Formats", test_binary_batch_formats),
+        ("Micro-Batching", test_micro_batching),
+        ("Stage Metrics", test_stage_metrics),
+        ("Prediction Cache", test_prediction_cache),
+        ("Live Features", test_live_features),
+        ("Request Validation", test_request_validation)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+
+    print("\n" + "=" * 60)
+    print(f"🎯 API Test Results: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    run_api_tests()
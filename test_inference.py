@@ -0,0 +1,397 @@
+"""
+Inference Path Test Script
+Checks the optimized prediction paths against the reference implementation
+"""
+
+import sys
+import os
+import logging
+import tempfile
+import pandas as pd
+
+# Add paths to import modules
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+logging.disable(logging.WARNING)
+
+SENSOR_FILE = os.path.join(os.path.dirname(__file__), 'sample-data', 'demo_sensor.csv')
+_MODEL_DIR = tempfile.mkdtemp(prefix='rockfall_test_')
+
+def get_model_path():
+    """Train the demo model once per test session"""
+    model_file = os.path.join(_MODEL_DIR, 'ml_model.pkl')
+    if not os.path.exists(model_file):
+        from backend.train_model import RockfallRiskModel
+
+        model = RockfallRiskModel()
+        model.train(SENSOR_FILE)
+        model.save_model(model_file)
+    return model_file
+
+def load_demo_readings():
+    """Demo sensor rows as API request payloads"""
+    df = pd.read_csv(SENSOR_FILE)
+    return df.drop(columns=['timestamp', 'zone_name', 'risk_factors']).to_dict('records')
+
+def test_fast_path_matches_dataframe():
+    """Dict readings skip pandas but must score exactly like a DataFrame"""
+    print("\n⚡ Testing single-reading fast path...")
+
+    from backend.app import RockfallAPI
+
+    api = RockfallAPI(model_path=get_model_path())
+    readings = load_demo_readings() + [
+        {**load_demo_readings()[0], 'zone_id': 'unknown_zone'}
+    ]
+
+    for reading in readings:
+        assert api.predict_risk(reading) == api.predict_risk(pd.DataFrame([reading]))
+    print(f"✅ Fast path matches DataFrame path on {len(readings)} readings")
+
+def test_batch_matches_single():
+    """Batched inference must reproduce per-reading predictions exactly"""
+    print("\n📦 Testing batched inference...")
+
+    from backend.app import RockfallAPI
+
+    api = RockfallAPI(model_path=get_model_path())
+    readings = load_demo_readings()
+
+    single = [api.predict_risk(reading) for reading in readings]
+    batch = api.predict_risk_batch(readings)
+
+    assert batch == single
+    print(f"✅ Batch of {len(batch)} matches single predictions")
+
+def test_batch_isolates_bad_rows():
+    """Invalid rows must not affect the rest of the batch"""
+    print("\n🧱 Testing batch error isolation...")
+
+    from backend.app import RockfallAPI
+
+    api = RockfallAPI(model_path=get_model_path())
+    readings = load_demo_readings()[:4]
+    payload = readings[:2] + [
+        'not a reading',
+        {'zone_id': 'B', 'displacement_mm': 'broken', 'vibration_mm_s': 1.0},
+        {'zone_id': 'B', 'displacement_mm': 9.0, 'vibration_mm_s': 0.5},
+    ] + readings[2:] + [{**readings[0], 'zone_id': ['A']}]
+
+    results = api.predict_risk_batch(payload)
+
+    assert results[2] is None
+    assert results[3] is None
+    # Missing optional sensors fall back to the zone threshold rules
+    assert results[4]['risk_level'] == 'critical'
+    assert results[:2] + results[5:-1] == api.predict_risk_batch(readings)
+    # A malformed zone id gets the default zone code for its row only
+    assert results[-1] == api.predict_risk(payload[-1])
+    print("✅ Invalid rows isolated, valid rows unaffected")
+
+def test_compiled_forest_matches_sklearn():
+    """The flattened forest must reproduce sklearn probabilities bit for bit"""
+    print("\n🌲 Testing compiled forest...")
+
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier
+    from backend.compiled_forest import CompiledForest
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(0, 1, (2000, 12))
+    y = np.where(X[:, 0] + X[:, 1] ** 2 > 1.5, 'critical', np.where(X[:, 2] > 0, 'high', 'low'))
+    model = RandomForestClassifier(n_estimators=20, max_depth=10, random_state=42).fit(X, y)
+    forest = CompiledForest.from_sklearn(model)
+
+    X_test = rng.normal(0, 2, (3000, 12))
+    assert np.array_equal(forest.predict_proba(X_test), model.predict_proba(X_test))
+
+    X_test[rng.random(X_test.shape) < 0.1] = np.nan
+    assert np.array_equal(forest.predict_proba(X_test), model.predict_proba(X_test))
+    print(f"✅ Compiled forest matches sklearn (depth {forest.depth}, {forest.n_trees} trees)")
+
+def test_engines_agree():
+    """API predictions must not depend on the selected inference engine"""
+    print("\n⚙️ Testing inference engines...")
+
+    import numpy as np
+    from backend.app import RockfallAPI
+
+    compiled = RockfallAPI(model_path=get_model_path())
+    reference = RockfallAPI(model_path=get_model_path(), engine='sklearn')
+    readings = load_demo_readings()
+
+    assert compiled.inference_engine == 'compiled'
+    assert reference.inference_engine == 'sklearn'
+    assert compiled.predict_risk_batch(readings) == reference.predict_risk_batch(readings)
+    assert [compiled.predict_risk(r) for r in readings] == [reference.predict_risk(r) for r in readings]
+
+    # Both engines reject infinite readings, which then take the same rule fallback
+    X = compiled.prepare_features_batch({col: np.array([1.0, np.inf]) for col in compiled.feature_columns},
+                                        ['A', 'A'])
+    for api in (compiled, reference):
+        try:
+            api.predict_proba(X)
+            raise AssertionError(f"{api.inference_engine} scored an infinite input")
+        except ValueError:
+            pass
+    infinite = [{**reading, 'vibration_mm_s': float('inf')} for reading in readings[:4]]
+    assert [compiled.predict_risk(r) for r in infinite] == [reference.predict_risk(r) for r in infinite]
+    print("✅ Compiled and sklearn engines agree")
+
+def test_scaler_folded_model():
+    """A scaler-folded export must skip the scaler without changing predictions"""
+    print("\n📐 Testing scaler-folded model...")
+
+    from backend.app import RockfallAPI
+    from backend.train_model import RockfallRiskModel
+
+    folded_dir = tempfile.mkdtemp(prefix='rockfall_folded_')
+    model_file = os.path.join(folded_dir, 'ml_model.pkl')
+    model = RockfallRiskModel()
+    model.train(SENSOR_FILE)
+    model.save_model(model_file, fold_scaler=True)
+
+    folded = RockfallAPI(model_path=model_file)
+    reference = RockfallAPI(model_path=model_file, engine='sklearn')
+    readings = load_demo_readings()
+    readings += [{**reading, 'displacement_mm': reading['displacement_mm'] * 3}
+                 for reading in readings]
+
+    assert folded.forest.scaler_folded
+    assert folded.predict_risk_batch(readings) == reference.predict_risk_batch(readings)
+    print("✅ Scaler-folded model matches scaler + sklearn")
+
+def test_artifact_is_memory_mapped():
+    """The model artifact must be mapped, not unpickled, and still predict the same"""
+    print("\n🗺️ Testing memory-mapped model artifact...")
+
+    import numpy as np
+    from backend.app import RockfallAPI
+
+    mapped = RockfallAPI(model_path=get_model_path())
+    reference = RockfallAPI(model_path=get_model_path(), engine='sklearn')
+    readings = load_demo_readings()
+
+    assert mapped.model is None
+    assert isinstance(mapped.forest.value.base, np.memmap)
+    assert [mapped.predict_risk(r) for r in readings] == [reference.predict_risk(r) for r in readings]
+
+    # The artifact alone is enough to serve predictions
+    import shutil
+    from backend.model_artifact import artifact_path_for
+
+    deploy_dir = tempfile.mkdtemp(prefix='rockfall_artifact_only_')
+    deployed_model = os.path.join(deploy_dir, 'ml_model.pkl')
+    shutil.copytree(artifact_path_for(get_model_path()), artifact_path_for(deployed_model))
+    artifact_only = RockfallAPI(model_path=deployed_model)
+    assert artifact_only.predict_risk(readings[0]) == reference.predict_risk(readings[0])
+    print("✅ Artifact is memory-mapped and prediction-identical")
+
+def test_hot_model_reload():
+    """A changed model artifact must be swapped in without disturbing requests"""
+    print("\n🔄 Testing hot model reload...")
+
+    import time
+    import shutil
+    import threading
+    import joblib
+    from backend.app import RockfallAPI
+    from backend.model_artifact import ModelArtifact, artifact_path_for
+
+    deploy_dir = tempfile.mkdtemp(prefix='rockfall_reload_')
+    model_file = os.path.join(deploy_dir, 'ml_model.pkl')
+    shutil.copy2(get_model_path(), model_file)
+    shutil.copytree(artifact_path_for(get_model_path()), artifact_path_for(model_file))
+
+    api = RockfallAPI(model_path=model_file)
+    readings = load_demo_readings()
+    expected = [api.predict_risk(r) for r in readings]
+    assert not api.forest.scaler_folded
+
+    # Keep requests running for the whole reload
+    errors = []
+    stop = threading.Event()
+
+    def serve():
+        while not stop.is_set():
+            for reading, prediction in zip(readings, expected):
+                if api.predict_risk(reading) != prediction:
+                    errors.append(reading)
+            if api.predict_risk_batch(readings) != expected:
+                errors.append('batch')
+
+    client = threading.Thread(target=serve)
+    client.start()
+    watcher = api.start_model_watcher(interval=0.05)
+    try:
+        # Touching the files without changing them must not reload
+        time.sleep(0.2)
+        os.utime(os.path.join(artifact_path_for(model_file), 'meta.json'))
+        time.sleep(0.5)
+        assert api.reload_metrics['reloads'] == 0
+
+        # A scaler-folded export is a different artifact with identical predictions
+        ModelArtifact.from_model_data(joblib.load(model_file), fold_scaler=True).save(
+            artifact_path_for(model_file))
+        deadline = time.time() + 10
+        while api.reload_metrics['reloads'] == 0 and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        watcher.stop()
+        stop.set()
+        client.join()
+
+    assert api.reload_metrics['reloads'] == 1
+    assert api.forest.scaler_folded
+    assert api.reload_metrics['last_swap_pause_us'] is not None
+    assert not errors
+    assert [api.predict_risk(r) for r in readings] == expected
+
+    # A failed reload is retried on the next check, not forgotten
+    from backend.model_reload import ModelWatcher, model_signature, model_digest
+    watcher = ModelWatcher(api, interval=0.01)
+    watcher.signature, watcher.digest = model_signature(model_file), model_digest(model_file)
+    ModelArtifact.from_model_data(joblib.load(model_file)).save(artifact_path_for(model_file))
+    api.reload_model = lambda: False
+    assert not watcher.check()
+    del api.reload_model
+    assert watcher.check()
+    assert not api.forest.scaler_folded
+    print(f"✅ Reloaded in {api.reload_metrics['last_reload_ms']:.1f} ms, "
+          f"swap pause {api.reload_metrics['last_swap_pause_us']:.1f} µs")
+
+def reference_rule_prediction(zones_data, sensor_data):
+    """The original scalar threshold fallback, kept as the reference"""
+    displacement = sensor_data.get('displacement_mm', 0)
+    vibration = sensor_data.get('vibration_mm_s', 0)
+    thresholds = {'displacement_warning': 5, 'displacement_critical': 8,
+                  'vibration_warning': 1.5, 'vibration_critical': 2.5}
+    for zone in zones_data['zones']:
+        if zone.get('zone_id') == sensor_data.get('zone_id', 'A') and 'risk_thresholds' in zone:
+            thresholds.update(zone['risk_thresholds'])
+            break
+
+    if (displacement >= thresholds['displacement_critical'] or
+            vibration >= thresholds['vibration_critical']):
+        risk_level, risk_score = 'critical', min(10.0, 7.0 + (displacement / 10.0) + (vibration / 2.0))
+    elif (displacement >= thresholds['displacement_warning'] or
+            vibration >= thresholds['vibration_warning']):
+        risk_level, risk_score = 'high', min(8.0, 5.0 + (displacement / 10.0) + (vibration / 2.0))
+    else:
+        risk_level, risk_score = 'low', min(5.0, 1.0 + (displacement / 10.0) + (vibration / 2.0))
+    return {
+        'risk_level': risk_level,
+        'risk_score': float(risk_score),
+        'risk_probabilities': {level: 0.8 if level == risk_level else 0.1
+                               for level in ('low', 'high', 'critical')}
+    }
+
+def test_rule_batch_matches_single():
+    """The vectorized threshold rules must reproduce the scalar fallback exactly"""
+    print("\n📏 Testing batched rule-based fallback...")
+
+    import numpy as np
+    from backend.app import RockfallAPI
+
+    api = RockfallAPI(model_path=os.path.join(_MODEL_DIR, 'missing_model.pkl'))
+    assert not api.model_loaded
+
+    rng = np.random.default_rng(7)
+    zone_ids = list(rng.choice(['A', 'B', 'C', 'D', 'unknown_zone'], 2000))
+    displacement = rng.uniform(0, 15, 2000).round(1)
+    vibration = rng.uniform(0, 4, 2000).round(2)
+    readings = [
+        {'zone_id': zone_id, 'displacement_mm': d, 'vibration_mm_s': v}
+        for zone_id, d, v in zip(zone_ids, displacement.tolist(), vibration.tolist())
+    ]
+
+    single = [api.dummy_prediction(reading) for reading in readings]
+    assert single == [reference_rule_prediction(api.zones_data, reading) for reading in readings]
+    assert api.dummy_prediction_batch(zone_ids, displacement, vibration) == single
+    assert api.predict_risk_batch(readings) == single
+    assert api.zone_index.get('B')['zone_id'] == 'B'
+    assert api.zone_index.get(['B']) is None
+    print(f"✅ Batched rules match dummy_prediction on {len(readings)} readings")
+
+def test_inference_pool():
+    """Worker processes must return exactly the in-process probabilities"""
+    print("\n🏭 Testing process-pool inference...")
+
+    import signal
+    import numpy as np
+    from backend.app import RockfallAPI
+    from backend.inference_pool import MIN_POOL_ROWS
+
+    api = RockfallAPI(model_path=get_model_path())
+    demo = pd.read_csv(SENSOR_FILE).drop(columns=['timestamp', 'zone_name', 'risk_factors'])
+    rng = np.random.default_rng(3)
+    batch = demo.sample(3 * MIN_POOL_ROWS, replace=True, random_state=3).reset_index(drop=True)
+    batch['displacement_mm'] += rng.normal(0, 2, len(batch))
+    batch['vibration_mm_s'] += rng.normal(0, 0.5, len(batch))
+    readings = batch.to_dict('records')
+
+    expected = api.predict_risk_batch(readings)
+    pool = api.enable_inference_pool(workers=2)
+    try:
+        calls = []
+        original = pool.predict_proba
+        pool.predict_proba = lambda X: calls.append(len(X)) or original(X)
+        assert api.predict_risk_batch(readings) == expected
+        assert calls == [len(readings)]
+
+        # Workers re-map the artifact after a reload and keep agreeing
+        assert api.reload_model()
+        assert api.predict_risk_batch(readings) == expected
+
+        # A dead worker fails only its call, which is scored in-process, and is replaced
+        dead = pool._workers[0]
+        dead.process.kill()
+        dead.process.join()
+        assert api.predict_risk_batch(readings) == expected
+        assert pool.respawns == 1 and dead not in pool._workers
+        X = np.random.default_rng(5).normal(size=(2 * MIN_POOL_ROWS, api.n_features))
+        assert np.allclose(pool.predict_proba(X), api.active_model.predict_proba(X))
+
+        # So does a hung one, once the reply timeout passes
+        if hasattr(signal, 'SIGSTOP'):
+            pool.timeout = 1.0
+            os.kill(pool._workers[1].process.pid, signal.SIGSTOP)
+            assert api.predict_risk_batch(readings) == expected
+            assert pool.respawns == 2
+            assert np.allclose(pool.predict_proba(X), api.active_model.predict_proba(X))
+    finally:
+        api.disable_inference_pool()
+    print(f"✅ Pool of {pool.n_workers} workers matches in-process scoring on {len(readings)} readings")
+
+def run_inference_tests():
+    """Run all inference path tests"""
+    print("🚀 Starting Inference Path Tests")
+    print("=" * 60)
+
+    tests = [
+        ("Fast Path Matches DataFrame", test_fast_path_matches_dataframe),
+        ("Batch Matches Single", test_batch_matches_single),
+        ("Batch Error Isolation", test_batch_isolates_bad_rows),
+        ("Compiled Forest", test_compiled_forest_matches_sklearn),
+        ("Inference Engines", test_engines_agree),
+        ("Scaler-Folded Model", test_scaler_folded_model),
+        ("Memory-Mapped Artifact", test_artifact_is_memory_mapped),
+        ("Hot Model Reload", test_hot_model_reload),
+        ("Batched Rule Fallback", test_rule_batch_matches_single),
+        ("Process-Pool Inference", test_inference_pool)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+
+    print("\n" + "=" * 60)
+    print(f"🎯 Inference Test Results: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    run_inference_tests()
@@ -0,0 +1,419 @@
+"""
+Data Processing Test Script
+Checks the vectorized DataProcessor steps against the original implementations
+"""
+
+import sys
+import os
+import logging
+import numpy as np
+import pandas as pd
+
+# Add paths to import modules
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+logging.disable(logging.WARNING)
+
+SENSOR_FILE = os.path.join(os.path.dirname(__file__), 'sample-data', 'demo_sensor.csv')
+
+def reference_zone_normalization(df, feature):
+    """The original per-group lambda normalization"""
+    return df.groupby('zone_id')[feature].transform(
+        lambda x: (x - x.min()) / (x.max() - x.min()) if x.max() > x.min() else 0
+    )
+
+def reference_detect_anomalies(df):
+    """The original zone-by-zone anomaly loop"""
+    anomalies = []
+    for zone_id in df['zone_id'].unique():
+        zone_data = df[df['zone_id'] == zone_id].copy()
+        for column in ['displacement_mm', 'vibration_mm_s']:
+            if len(zone_data) > 5:
+                threshold = zone_data[column].mean() + 3 * zone_data[column].std()
+                for idx in zone_data[zone_data[column] > threshold].index:
+                    anomalies.append({
+                        'timestamp': zone_data.loc[idx, 'timestamp'],
+                        'zone_id': zone_id,
+                        'anomaly_type': f'{column}_statistical',
+                        'value': zone_data.loc[idx, column],
+                        'threshold': threshold,
+                        'severity': 'high' if zone_data.loc[idx, column] > threshold * 1.5 else 'medium'
+                    })
+        for column in ['displacement_rate', 'vibration_rate']:
+            if column in zone_data.columns:
+                for idx in zone_data[np.abs(zone_data[column]) > zone_data[column].std() * 2].index:
+                    anomalies.append({
+                        'timestamp': zone_data.loc[idx, 'timestamp'],
+                        'zone_id': zone_id,
+                        'anomaly_type': f'{column}_spike',
+                        'value': zone_data.loc[idx, column],
+                        'severity': 'medium'
+                    })
+    return anomalies
+
+def engineered_frame(n_rows, n_zones, seed=42):
+    """Cleaned and engineered synthetic rows plus the processor for their zones"""
+    import tempfile
+    from backend.process_data import DataProcessor
+    from bench_processing import make_synthetic_sensor_data, synthetic_zone_ids, write_zones_file
+
+    zone_ids = synthetic_zone_ids(n_zones)
+    zones_file = write_zones_file(os.path.join(tempfile.mkdtemp(prefix='rockfall_zones_'), 'zones.json'),
+                                  zone_ids, seed)
+    processor = DataProcessor(zones_file)
+    df = make_synthetic_sensor_data(n_rows, zone_ids, seed)
+    return processor, processor.engineer_features(processor.clean_sensor_data(df))
+
+def test_threshold_flags_match_apply():
+    """np.select threshold flags must equal the per-row _check_threshold"""
+    print("\n🚩 Testing vectorized threshold flags...")
+
+    from backend.process_data import DataProcessor
+    from bench_processing import make_synthetic_sensor_data
+
+    processor = DataProcessor()
+    # Unknown zones, a zone missing a threshold key, exact boundaries and NaN/inf readings
+    processor.zone_thresholds['E'] = {'displacement_warning': 4.0}
+    df = make_synthetic_sensor_data(5000, zone_ids=['A', 'B', 'C', 'D', 'E', 'X'])
+    df.loc[:5, 'displacement_mm'] = [5.0, 8.0, np.nan, np.inf, 4.0, np.inf]
+    df.loc[:5, 'zone_id'] = ['A', 'A', 'B', 'C', 'E', 'X']
+    df.index = df.index[::-1]
+
+    for column, threshold_type in (('displacement_mm', 'displacement'), ('vibration_mm_s', 'vibration')):
+        expected = df.apply(lambda row: processor._check_threshold(row, column, threshold_type), axis=1)
+        flags = processor._threshold_flags(df, column, threshold_type)
+        assert flags.equals(expected), column
+        assert set(flags.unique()) == {0, 1, 2}
+
+    demo = processor.engineer_features(processor.clean_sensor_data(pd.read_csv(SENSOR_FILE)))
+    for column, threshold_type in (('displacement_mm', 'displacement'), ('vibration_mm_s', 'vibration')):
+        expected = demo.apply(lambda row: processor._check_threshold(row, column, threshold_type), axis=1)
+        assert demo[f'{threshold_type}_risk_flag'].equals(expected)
+    print(f"✅ Flags match apply() on {len(df)} synthetic and {len(demo)} demo rows")
+
+def test_zone_normalization_matches_transform():
+    """One grouped min/max aggregation must reproduce the per-group lambdas exactly"""
+    print("\n📐 Testing grouped min-max normalization...")
+
+    from backend.process_data import DataProcessor
+    from backend.process_data import NORMALIZED_FEATURES
+
+    processor, df = engineered_frame(20000, 500)
+    # A constant zone, a zone with an all-NaN feature and a row without a zone
+    df.loc[df['zone_id'] == 'Z00001', 'vibration_mm_s'] = 1.5
+    df.loc[df['zone_id'] == 'Z00002', 'weather_index'] = np.nan
+    df.loc[df.index[:3], 'displacement_rate'] = np.nan
+    df.loc[df.index[5], 'zone_id'] = np.nan
+
+    normalized = processor._normalize_per_zone(df, NORMALIZED_FEATURES,
+                                               processor.zone_min_max(df, NORMALIZED_FEATURES))
+    for feature in NORMALIZED_FEATURES:
+        expected = reference_zone_normalization(df, feature)
+        assert normalized[feature].equals(expected), feature
+
+    # Every zone constant: the transform yields integer zeros
+    constant = pd.DataFrame({'zone_id': ['A', 'A', 'B'], 'displacement_mm': [2.0, 2.0, 3.0]})
+    result = processor._normalize_per_zone(constant, ['displacement_mm'],
+                                           processor.zone_min_max(constant, ['displacement_mm']))
+    assert result['displacement_mm'].equals(reference_zone_normalization(constant, 'displacement_mm'))
+
+    # The full scoring step on the demo data
+    demo_processor = DataProcessor()
+    demo = demo_processor.engineer_features(demo_processor.clean_sensor_data(pd.read_csv(SENSOR_FILE)))
+    scored = demo_processor.calculate_risk_scores(demo.copy())
+    for feature in NORMALIZED_FEATURES:
+        assert scored[f'{feature}_norm'].equals(reference_zone_normalization(demo, feature)), feature
+    print(f"✅ Normalization matches transform() on {len(df)} rows in 500 zones")
+
+def test_anomalies_match_reference():
+    """Mask-based anomaly detection must reproduce the zone-by-zone loop"""
+    print("\n🔎 Testing vectorized anomaly detection...")
+
+    import json
+    from backend.process_data import DataProcessor, _json_default
+
+    processor = DataProcessor()
+    demo = processor.calculate_risk_scores(
+        processor.engineer_features(processor.clean_sensor_data(pd.read_csv(SENSOR_FILE))))
+    anomalies = processor.detect_anomalies(demo)
+    assert anomalies == reference_detect_anomalies(demo)
+    with open(os.path.join(os.path.dirname(__file__), 'backend', 'processed_demo_anomalies.json')) as f:
+        assert json.loads(json.dumps(anomalies, default=_json_default)) == json.load(f)
+
+    # Many zones, a zone too small for statistics and a row without a zone
+    processor, df = engineered_frame(30000, 200)
+    df = df[~((df['zone_id'] == 'Z00003') & (df.index > 100))].copy()
+    df.loc[df.index[10], 'zone_id'] = np.nan
+    df.loc[df.index[20], 'displacement_mm'] = 40.0
+    anomalies = processor.detect_anomalies(df)
+    expected = reference_detect_anomalies(df)
+    assert len(anomalies) == len(expected)
+    for found, reference in zip(anomalies, expected):
+        # Grouped std may differ from Series.std in the last bits
+        if 'threshold' in reference:
+            assert np.isclose(found.pop('threshold'), reference.pop('threshold'), rtol=1e-12, atol=0)
+        assert found == reference
+    assert any(a['severity'] == 'high' for a in anomalies)
+    print(f"✅ {len(anomalies)} anomalies match the reference loop")
+
+def test_chunked_matches_in_memory():
+    """Chunked processing must carry rates, moving averages and zone stats across chunks"""
+    print("\n🧱 Testing chunked processing...")
+
+    import json
+    import tempfile
+    from backend.process_data import DataProcessor, NORMALIZED_FEATURES
+    from bench_processing import make_synthetic_sensor_data, synthetic_zone_ids, write_zones_file
+
+    work_dir = tempfile.mkdtemp(prefix='rockfall_chunks_')
+    zone_ids = synthetic_zone_ids(20)
+    processor = DataProcessor(write_zones_file(os.path.join(work_dir, 'zones.json'), zone_ids))
+    # No dropouts: chunks fill missing values with their own median
+    data = make_synthetic_sensor_data(6000, zone_ids).dropna()
+    input_file = os.path.join(work_dir, 'sensors.csv')
+    data.to_csv(input_file, index=False)
+
+    expected, expected_anomalies, expected_report = processor.process_batch(
+        input_file, os.path.join(work_dir, 'memory.csv'))
+    report, anomaly_count = processor.process_batch_chunked(
+        input_file, os.path.join(work_dir, 'chunked.csv'), chunk_rows=700)
+    chunked = pd.read_csv(os.path.join(work_dir, 'chunked.csv'), parse_dates=['timestamp'])
+    with open(os.path.join(work_dir, 'chunked_anomalies.json')) as f:
+        anomalies = json.load(f)
+    assert len(anomalies) == anomaly_count
+
+    key = ['zone_id', 'timestamp']
+    expected = expected.set_index(key).sort_index()
+    chunked = chunked.set_index(key).sort_index()
+    assert chunked.index.equals(expected.index)
+    for column in ['displacement_rate', 'vibration_rate', 'temperature_rate',
+                   'displacement_ma', 'vibration_ma', 'gravity_deviation', 'weather_index']:
+        assert np.allclose(chunked[column], expected[column], rtol=1e-12, atol=1e-12), column
+
+    # The last chunk has seen every row, so its zone stats are the global ones
+    last_chunk = data.iloc[(len(data) - 1) // 700 * 700:].set_index(key).index
+    for feature in NORMALIZED_FEATURES:
+        column = f'{feature}_norm'
+        assert np.allclose(chunked.loc[last_chunk, column], expected.loc[last_chunk, column],
+                           rtol=1e-9, atol=1e-12), column
+    def last_chunk_anomalies(records):
+        records = [a for a in records if (a['zone_id'], pd.Timestamp(a['timestamp'])) in last_chunk]
+        return sorted(records, key=lambda a: (a['zone_id'], a['anomaly_type'], pd.Timestamp(a['timestamp'])))
+
+    found = last_chunk_anomalies(anomalies)
+    reference = last_chunk_anomalies(expected_anomalies)
+    assert found and len(found) == len(reference)
+    for a, b in zip(found, reference):
+        assert (a['zone_id'], a['anomaly_type'], a['severity']) == (b['zone_id'], b['anomaly_type'], b['severity'])
+        assert np.isclose(a['value'], b['value']) and np.isclose(a.get('threshold', 0), b.get('threshold', 0))
+
+    assert report['total_records'] == expected_report['total_records']
+    assert report['time_range'] == expected_report['time_range']
+    for zone_id, zone in expected_report['zone_summary'].items():
+        for name, value in zone.items():
+            if isinstance(value, float):
+                assert np.isclose(report['zone_summary'][zone_id][name], value), (zone_id, name)
+            else:
+                assert report['zone_summary'][zone_id][name] == value, (zone_id, name)
+    print(f"✅ {len(chunked)} rows in {-(-len(data) // 700)} chunks match the in-memory pipeline")
+
+def test_two_pass_matches_in_memory():
+    """Two-pass chunked scoring must reproduce the in-memory rows (moving averages up to the last bits)"""
+    print("\n🧮 Testing two-pass chunked processing...")
+
+    import json
+    import tempfile
+    from backend.process_data import DataProcessor
+    from bench_processing import make_synthetic_sensor_data, synthetic_zone_ids, write_zones_file
+
+    work_dir = tempfile.mkdtemp(prefix='rockfall_two_pass_')
+    zone_ids = synthetic_zone_ids(20)
+    processor = DataProcessor(write_zones_file(os.path.join(work_dir, 'zones.json'), zone_ids))
+    # Sensor dropouts, plus a duplicated reading straddling a chunk boundary
+    data = make_synthetic_sensor_data(6000, zone_ids)
+    data.loc[data.index[:50:7], 'displacement_mm'] = np.nan
+    data = pd.concat([data.iloc[:700], data.iloc[699:]], ignore_index=True)
+    input_file = os.path.join(work_dir, 'sensors.csv')
+    data.to_csv(input_file, index=False)
+
+    _, expected_anomalies, expected_report = processor.process_batch(input_file, os.path.join(work_dir, 'memory.csv'))
+    stats_file = os.path.join(work_dir, 'sensors_stats.json')
+    _, _, report = processor.process_batch(input_file, os.path.join(work_dir, 'chunked.csv'),
+                                           chunk_rows=700, stats_file=stats_file)
+    assert os.path.exists(stats_file)
+
+    key = ['zone_id', 'timestamp']
+    expected = pd.read_csv(os.path.join(work_dir, 'memory.csv')).set_index(key).sort_index()
+    chunked = pd.read_csv(os.path.join(work_dir, 'chunked.csv')).set_index(key).sort_index()
+    assert chunked.index.equals(expected.index)
+    for column in expected.columns:
+        if column.endswith('_ma'):
+            # rolling().mean() keeps a running sum, so its last bits depend on where the window starts
+            assert np.allclose(chunked[column], expected[column], rtol=1e-12, atol=0), column
+        else:
+            assert chunked[column].equals(expected[column]), column
+
+    with open(os.path.join(work_dir, 'chunked_anomalies.json')) as f:
+        anomalies = json.load(f)
+    order = lambda a: (a['zone_id'], a['anomaly_type'], pd.Timestamp(a['timestamp']))
+    anomalies, expected_anomalies = sorted(anomalies, key=order), sorted(expected_anomalies, key=order)
+    assert [order(a) for a in anomalies] == [order(a) for a in expected_anomalies]
+    for found, reference in zip(anomalies, expected_anomalies):
+        assert found['value'] == reference['value'] and found['severity'] == reference['severity']
+        assert np.isclose(found.get('threshold', 0), reference.get('threshold', 0), rtol=1e-12)
+
+    for zone_id, zone in expected_report['zone_summary'].items():
+        for name, value in zone.items():
+            assert np.isclose(report['zone_summary'][zone_id][name], value) if isinstance(value, float) \
+                else report['zone_summary'][zone_id][name] == value, (zone_id, name)
+
+    # A second run scores from the sidecar without rescanning
+    stats = processor.collect_file_statistics(input_file, 700, stats_file)
+    fresh = processor.collect_file_statistics(input_file, 700)
+    assert stats.fill_values == fresh.fill_values
+    assert stats.zone_stats.min_max_frame().equals(fresh.zone_stats.min_max_frame())
+    assert stats.zone_stats.moments_frame().equals(fresh.zone_stats.moments_frame())
+    print(f"✅ {len(chunked)} rows scored in two passes match the in-memory pipeline")
+
+def test_bounded_medians():
+    """Chunked medians are exact at low cardinality and bounded, approximately, beyond it"""
+    print("\n📏 Testing bounded chunked medians...")
+
+    from backend.zone_stream import ExactMedians
+
+    rng = np.random.default_rng(11)
+    rounded = pd.DataFrame({'displacement_mm': rng.normal(5, 2, 20000).round(2)})
+    exact = ExactMedians(['displacement_mm'])
+    for start in range(0, len(rounded), 3000):
+        exact.update(rounded.iloc[start:start + 3000])
+    assert not exact.approximate
+    assert exact.medians()['displacement_mm'] == rounded['displacement_mm'].median()
+
+    # Unrounded floats: nearly every value is distinct
+    raw = pd.DataFrame({'displacement_mm': rng.normal(5, 2, 20000)})
+    bounded = ExactMedians(['displacement_mm'], max_distinct=500)
+    for start in range(0, len(raw), 3000):
+        bounded.update(raw.iloc[start:start + 3000])
+        assert len(bounded.counts['displacement_mm']) <= 500
+    assert bounded.approximate
+    step = 10.0 ** -bounded.decimals['displacement_mm']
+    error = abs(bounded.medians()['displacement_mm'] - raw['displacement_mm'].median())
+    assert error <= step / 2, (error, step)
+    print(f"✅ Exact on rounded readings; within {step / 2:g} using {len(bounded.counts['displacement_mm'])} counts")
+
+def test_sensor_storage():
+    """CSV and partitioned Parquet reads must agree on projection and zone/day filters"""
+    print("\n🗄️ Testing sensor storage...")
+
+    import json
+    import tempfile
+    from backend.process_data import DataProcessor
+    from backend.sensor_storage import read_sensor_data, output_path_for, parquet_available
+
+    raw = pd.read_csv(SENSOR_FILE)
+    projected = read_sensor_data(SENSOR_FILE, columns=['displacement_mm', 'vibration_mm_s'], zone_id='B')
+    assert list(projected.columns) == ['displacement_mm', 'vibration_mm_s']
+    assert projected.equals(raw.loc[raw['zone_id'] == 'B', ['displacement_mm', 'vibration_mm_s']].reset_index(drop=True))
+    assert len(read_sensor_data(SENSOR_FILE, zone_id=['A', 'C'], date='2024-09-19')) == raw['zone_id'].isin(['A', 'C']).sum()
+    assert read_sensor_data(SENSOR_FILE, date='2024-09-20').empty
+    assert output_path_for('out/processed.csv', '_report.json') == os.path.join('out', 'processed_report.json')
+    assert output_path_for('out/processed.parquet/', '_report.json') == os.path.join('out', 'processed_report.json')
+
+    work_dir = tempfile.mkdtemp(prefix='rockfall_storage_')
+    dataset = os.path.join(work_dir, 'processed.parquet')
+    if not parquet_available():
+        try:
+            read_sensor_data(dataset)
+            raise AssertionError("Parquet read without pyarrow should fail")
+        except ImportError:
+            pass
+        print("⚠️ pyarrow not installed, Parquet round trip skipped")
+        return
+
+    processor = DataProcessor()
+    expected, _, _ = processor.process_batch(SENSOR_FILE, os.path.join(work_dir, 'processed.csv'))
+    processor.process_batch(SENSOR_FILE, dataset)
+    assert os.path.isdir(os.path.join(dataset, 'zone_id=A', 'date=2024-09-19'))
+    with open(os.path.join(work_dir, 'processed_report.json')) as f:
+        assert json.load(f)['total_records'] == len(expected)
+
+    # One zone and day, projected, straight from its partition
+    zone = read_sensor_data(dataset, columns=['timestamp', 'risk_score_10'], zone_id='D', date='2024-09-19')
+    reference = expected.loc[expected['zone_id'] == 'D', ['timestamp', 'risk_score_10']].reset_index(drop=True)
+    assert list(zone.columns) == ['timestamp', 'risk_score_10']
+    assert np.array_equal(zone['timestamp'].to_numpy(), reference['timestamp'].to_numpy())
+    assert np.array_equal(zone['risk_score_10'].to_numpy(), reference['risk_score_10'].to_numpy())
+
+    # The dataset feeds the pipelines back: in memory, chunked and for training
+    reloaded, _, _ = processor.process_batch(dataset, os.path.join(work_dir, 'reprocessed.csv'))
+    assert len(reloaded) == len(expected)
+    _, _, report = processor.process_batch(dataset, os.path.join(work_dir, 'chunked.parquet'), chunk_rows=10)
+    assert report['total_records'] == len(expected)
+    chunked = read_sensor_data(os.path.join(work_dir, 'chunked.parquet'))
+    assert len(chunked) == len(expected) and 'date' not in chunked.columns
+    print(f"✅ Parquet dataset round trip of {len(expected)} rows in {expected['zone_id'].nunique()} zones")
+
+def test_parallel_matches_single_process():
+    """Zones processed in a process pool must merge back to the single-process result"""
+    print("\n⚙️ Testing parallel per-zone processing...")
+
+    import json
+    import tempfile
+    from backend.process_data import DataProcessor, _json_default
+    from bench_processing import make_synthetic_sensor_data, synthetic_zone_ids, write_zones_file
+
+    work_dir = tempfile.mkdtemp(prefix='rockfall_parallel_')
+    zone_ids = synthetic_zone_ids(30)
+    processor = DataProcessor(write_zones_file(os.path.join(work_dir, 'zones.json'), zone_ids))
+    # Dropouts filled with the whole-file median, duplicates and a zone missing from zones.json
+    data = make_synthetic_sensor_data(6000, zone_ids)
+    data.loc[data.index[:40:3], 'displacement_mm'] = np.nan
+    data.loc[data.index[7], 'zone_id'] = 'UNKNOWN'
+    data = pd.concat([data, data.iloc[100:120]])
+    input_file = os.path.join(work_dir, 'sensors.csv')
+    data.to_csv(input_file, index=False)
+
+    expected, expected_anomalies, expected_report = processor.process_batch(
+        input_file, os.path.join(work_dir, 'single.csv'))
+    merged, anomalies, report = processor.process_batch(
+        input_file, os.path.join(work_dir, 'parallel.csv'), workers=2)
+
+    assert merged.equals(expected) and merged.index.equals(expected.index)
+    assert json.dumps(anomalies, default=_json_default) == json.dumps(expected_anomalies, default=_json_default)
+    for result in (report, expected_report):
+        result.pop('processing_timestamp')
+    assert report == expected_report
+    with open(os.path.join(work_dir, 'single.csv')) as f, open(os.path.join(work_dir, 'parallel.csv')) as g:
+        assert f.read() == g.read()
+    print(f"✅ {len(merged)} rows in {report['zones_processed']} zones match on 2 workers")
+
+def run_processing_tests():
+    """Run all data processing tests"""
+    print("🚀 Starting Data Processing Tests")
+    print("=" * 60)
+
+    tests = [
+        ("Threshold Flags", test_threshold_flags_match_apply),
+        ("Zone Normalization", test_zone_normalization_matches_transform),
+        ("Anomaly Detection", test_anomalies_match_reference),
+        ("Chunked Processing", test_chunked_matches_in_memory),
+        ("Two-Pass Processing", test_two_pass_matches_in_memory),
+        ("Bounded Medians", test_bounded_medians),
+        ("Sensor Storage", test_sensor_storage),
+        ("Parallel Processing", test_parallel_matches_single_process)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+
+    print("\n" + "=" * 60)
+    print(f"🎯 Processing Test Results: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    run_processing_tests()
@@ -0,0 +1,99 @@
+"""
+Scaler Folding Validation Script
+Proves the scaler-folded forest predicts exactly like StandardScaler + RandomForest
+"""
+
+import sys
+import os
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add paths to import modules
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from bench_inference import SENSOR_FILE, make_synthetic_readings, prepare_model
+
+logging.disable(logging.WARNING)
+
+def feature_matrix(api, df):
+    """Raw (unscaled) model features for a frame of readings"""
+    return api.prepare_features_batch(
+        {col: df[col].to_numpy(dtype=np.float64) for col in api.feature_columns},
+        df['zone_id'].tolist()
+    )
+
+def boundary_matrix(folded, rng, n_rows):
+    """Rows sitting exactly on, or one ulp either side of, the folded thresholds"""
+    splits = np.flatnonzero(np.isfinite(folded.threshold))
+    picks = rng.choice(splits, n_rows)
+    values = folded.threshold[picks]
+    shift = rng.integers(-1, 2, n_rows)
+    values = np.where(shift < 0, np.nextafter(values, -np.inf),
+                      np.where(shift > 0, np.nextafter(values, np.inf), values))
+
+    X = rng.normal(0, 50, (n_rows, folded.feature.max() + 1))
+    X[np.arange(n_rows), folded.feature[picks]] = values
+    return X
+
+def check(name, api, folded, X):
+    """Compare the folded forest with the scaler + sklearn reference"""
+    from backend.inference_model import DERIVED_FEATURE_COLUMNS
+
+    columns = api.feature_columns + DERIVED_FEATURE_COLUMNS
+    reference = api.model.predict_proba(api.scaler.transform(pd.DataFrame(X, columns=columns)))
+    candidate = folded.predict_proba(X)
+    identical = np.array_equal(reference, candidate)
+    same_labels = np.array_equal(reference.argmax(axis=1), candidate.argmax(axis=1))
+    status = "✅" if identical else "❌"
+    print(f"{status} {name}: {len(X)} rows, identical probabilities={identical}, "
+          f"identical labels={same_labels}")
+    return identical
+
+def validate(synthetic_rows, train_rows):
+    """Run every validation set; True when all predictions are identical"""
+    from backend.app import RockfallAPI
+    from backend.compiled_forest import CompiledForest
+
+    print("🔬 Validating scaler folding")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    results = []
+    with tempfile.TemporaryDirectory() as model_dir:
+        api = RockfallAPI(model_path=prepare_model(model_dir, train_rows), engine='sklearn')
+        folded = CompiledForest.from_sklearn(api.model).fold_scaler(api.scaler.mean_, api.scaler.scale_)
+
+        results.append(check("demo_sensor.csv", api, folded,
+                             feature_matrix(api, pd.read_csv(SENSOR_FILE))))
+        results.append(check("synthetic readings", api, folded,
+                             feature_matrix(api, make_synthetic_readings(synthetic_rows, seed=1))))
+        results.append(check("wide random inputs", api, folded,
+                             rng.normal(0, 100, (synthetic_rows, api.n_features))))
+        results.append(check("threshold boundaries", api, folded,
+                             boundary_matrix(folded, rng, min(synthetic_rows, 300000))))
+
+    print("=" * 60)
+    if all(results):
+        print("🎉 Scaler-folded forest is prediction-identical")
+    else:
+        print("⚠️  Scaler-folded forest diverges from the reference")
+    return all(results)
+
+def main():
+    """Validate scaler folding from the command line"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Rockfall Scaler Folding Validation')
+    parser.add_argument('--rows', type=int, default=500000,
+                        help='Rows in each synthetic validation set')
+    parser.add_argument('--train-rows', type=int, default=20000,
+                        help='Synthetic training rows (0 trains on the demo CSV)')
+
+    args = parser.parse_args()
+
+    sys.exit(0 if validate(args.rows, args.train_rows) else 1)
+
+if __name__ == "__main__":
+    main()